@@ -2,77 +2,215 @@
 Simple Flask App
 Study Abroad Platform without complex security middleware
 """
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables before importing modules that read them at import time
+load_dotenv()
+
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
-import os
-from dotenv import load_dotenv
 from models import init_db
 from routes.auth import auth_bp
 from routes.users import users_bp
 from routes.universities import universities_bp
 from routes.bookmarks import bookmarks_bp
 from routes.recommendations import recommendations_bp
+from utils.write_behind import history_writer
+from utils.json_provider import FastJSONProvider
+from utils.compression import compress_response
 
-# Load environment variables
-load_dotenv()
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
 
-# Initialize Flask app
-app = Flask(__name__)
-
-# Simple CORS configuration
-CORS(app, origins=['http://localhost:3000', 'http://127.0.0.1:3000'])
-
-# Basic configuration
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
-app.config['DATABASE_URL'] = os.getenv('DATABASE_URL', 'sqlite:///database/student_abroad.db')
-
-# JWT configuration
-app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-change-in-production')
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = False
-
-jwt = JWTManager(app)
-
-# Initialize database
-with app.app_context():
-    init_db()
-
-# Register blueprints
-app.register_blueprint(auth_bp)
-app.register_blueprint(users_bp)
-app.register_blueprint(universities_bp)
-app.register_blueprint(bookmarks_bp)
-app.register_blueprint(recommendations_bp)
-
-# Basic routes
-@app.route('/')
-def home():
-    """Home endpoint"""
-    return jsonify({
-        'message': 'Study Abroad Platform API',
-        'version': '1.0',
-        'status': 'running'
-    })
-
-@app.route('/api/health')
-def health_check():
-    """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'database': 'connected',
-        'firebase': 'connected' if os.path.exists('studyabroad-e9afb-firebase-adminsdk-fbsvc-a1e7ee1a7f.json') else 'not configured'
-    })
-
-# Error handlers
-@app.errorhandler(404)
-def not_found(error):
-    return jsonify({'error': 'Endpoint not found'}), 404
-
-@app.errorhandler(500)
-def internal_error(error):
-    return jsonify({'error': 'Internal server error'}), 500
+
+def create_app():
+    """
+    Build the Flask app. Nothing heavy happens here: the database, university
+    service and ML models are created on first use or by warmup().
+    """
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    
+    # Simple CORS configuration
+    CORS(app, origins=['http://localhost:3000', 'http://127.0.0.1:3000'])
+    
+    # Basic configuration
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
+    app.config['DATABASE_URL'] = os.getenv('DATABASE_URL', 'sqlite:///database/student_abroad.db')
+    
+    # JWT configuration
+    app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-change-in-production')
+    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = False
+    
+    JWTManager(app)
+    
+    # Register blueprints
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(users_bp)
+    app.register_blueprint(universities_bp)
+    app.register_blueprint(bookmarks_bp)
+    app.register_blueprint(recommendations_bp)
+    
+    register_base_routes(app)
+    app.after_request(compress_response)
+    return app
+
+
+def warmup(include_database=True, include_university_service=True):
+    """
+    Load everything that is otherwise built lazily on the first request.
+    Returns (step, seconds, error) tuples for the startup report.
+    """
+    from services.catalog_snapshot import get_catalog_snapshot
+    from services.university_service_provider import get_university_service
+    from ml.ml_service import get_ml_service
+    
+    steps = []
+    if include_database:
+        steps.append(('database', init_db))
+    steps.append(('catalog snapshot', lambda: get_catalog_snapshot().encoded_records()))
+    if include_university_service:
+        steps.append(('university service', get_university_service))
+    steps += [
+        ('recommendation engine', get_ml_service),
+        ('admission model', lambda: get_ml_service().predictor),
+    ]
+    
+    timings = []
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+            error = None
+        except Exception as e:
+            error = str(e)
+        timings.append((name, time.perf_counter() - started, error))
+    return timings
+
+
+def prefork_warmup():
+    """
+    Warm up in a pre-forking master (gunicorn --preload) so workers share the
+    catalog, indexes and models copy-on-write. Database connections and the
+    Firestore client are left to each worker: sockets and gRPC channels must
+    not be shared across fork().
+    """
+    from utils.prefork import freeze_shared_state
+    
+    timings = warmup(include_database=False, include_university_service=False)
+    freeze_shared_state()
+    return timings
+
+
+def _sample_workload():
+    """What a worker does for its first few requests"""
+    from services.university_service_provider import get_university_service
+    from ml.ml_service import get_ml_service
+    
+    service = get_university_service()
+    service.search_universities('university')
+    service.get_statistics()
+    get_ml_service().generate_recommendations({
+        'cgpa': 3.5, 'gre_score': 320, 'ielts_score': 7.0,
+        'field_of_study': 'Computer Science', 'budget_max': 50000
+    }, None, 10)
+
+
+def check_prefork(workers=2):
+    """Print worker memory with and without prefork_warmup() (python app.py --check-prefork [N])"""
+    from utils.prefork import fork_report, memory_usage
+    
+    def print_rows(mode, results):
+        for result in results:
+            before, after = result['before'], result['after']
+            status = f"  FAILED: {result['error']}" if result['error'] else ""
+            print(f"{mode:<8}{result['pid']:>8}{before['rss_kb'] / 1024:>10.1f}{after['rss_kb'] / 1024:>10.1f}"
+                  f"{after['private_kb'] / 1024:>10.1f}{after['shared_kb'] / 1024:>10.1f}"
+                  f"{result['workload_ms']:>11.1f}{status}")
+    
+    print("WORKER MEMORY (MiB)")
+    print("=" * 67)
+    print(f"{'mode':<8}{'pid':>8}{'rss 0':>10}{'rss 1':>10}{'private':>10}{'shared':>10}{'first ms':>11}")
+    print_rows('cold', fork_report(_sample_workload, workers))
+    
+    master_before = memory_usage()['rss_kb']
+    prefork_warmup()
+    master_after = memory_usage()['rss_kb']
+    print_rows('preload', fork_report(_sample_workload, workers))
+    print("-" * 67)
+    print(f"master rss {master_before / 1024:.1f} -> {master_after / 1024:.1f} MiB after prefork_warmup()")
+    print("rss 0 = right after fork, rss 1 / private / shared = after the first requests")
+    print("=" * 67)
+
+
+def check_startup():
+    """Print how long each startup phase takes (python app.py --check-startup)"""
+    started = time.perf_counter()
+    create_app()
+    create_seconds = time.perf_counter() - started
+    
+    print("STARTUP TIMING")
+    print("=" * 50)
+    print(f"{'import app and routes':<28}{IMPORT_SECONDS * 1000:>10.1f} ms")
+    print(f"{'create_app()':<28}{create_seconds * 1000:>10.1f} ms")
+    print("-" * 50)
+    print("Deferred until first use or warmup():")
+    for name, seconds, error in warmup():
+        status = f"  FAILED: {error}" if error else ""
+        print(f"  {name:<26}{seconds * 1000:>10.1f} ms{status}")
+    print("=" * 50)
+
+
+def register_base_routes(app):
+    """Home, health check and error handlers"""
+    # Basic routes
+    @app.route('/')
+    def home():
+        """Home endpoint"""
+        return jsonify({
+            'message': 'Study Abroad Platform API',
+            'version': '1.0',
+            'status': 'running'
+        })
+
+    @app.route('/api/health')
+    def health_check():
+        """Health check endpoint"""
+        return jsonify({
+            'status': 'healthy',
+            'database': 'connected',
+            'firebase': 'connected' if os.path.exists('studyabroad-e9afb-firebase-adminsdk-fbsvc-a1e7ee1a7f.json') else 'not configured',
+            'history_writer': history_writer.get_stats()
+        })
+
+    # Error handlers
+    @app.errorhandler(404)
+    def not_found(error):
+        return jsonify({'error': 'Endpoint not found'}), 404
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+# Module-level app for `flask run` and imports of app.app
+app = create_app()
 
 if __name__ == '__main__':
+    if '--check-startup' in sys.argv:
+        check_startup()
+        sys.exit(0)
+    
+    if '--check-prefork' in sys.argv:
+        position = sys.argv.index('--check-prefork') + 1
+        check_prefork(int(sys.argv[position]) if position < len(sys.argv) else 2)
+        sys.exit(0)
+    
     print("🚀 STARTING STUDY ABROAD PLATFORM")
     print("=" * 50)
     print("✅ Simple Flask app (no complex security)")
@@ -18,6 +18,10 @@ class Config:
     # API settings
     API_RATE_LIMIT = os.getenv('API_RATE_LIMIT', '100 per hour')
     
+    # Encryption settings
+    ENCRYPTION_KEY = os.getenv('ENCRYPTION_KEY')
+    SECURE_STORAGE_PATH = os.getenv('SECURE_STORAGE_PATH', 'secure_storage')
+    
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
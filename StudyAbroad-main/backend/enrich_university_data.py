@@ -0,0 +1,207 @@
+"""
+Enrich University Data
+Refresh websites, logos and tuition fees for the whole catalog concurrently
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+from services.catalog_writer import CatalogPatch, read_catalog, write_catalog
+from services.name_index import NameIndex, report_unresolved
+from utils.add_university_logos import UNIVERSITY_LOGOS
+from utils.fetch_pipeline import FetchPipeline, FetchResult, FetchTask
+
+CATALOG_FILE = 'data/universities.json'
+CHECKPOINT_FILE = 'data/enrichment_checkpoint.jsonl'
+
+JOBS = ('websites', 'logos', 'fees')
+
+# Only the head of a page is searched for icons
+HTML_HEAD_BYTES = 65536
+ICON_LINK_RE = re.compile(r'<link\b[^>]*\brel=["\'][^"\']*\b(?:apple-touch-icon|icon)\b[^"\']*["\'][^>]*>', re.I)
+HREF_RE = re.compile(r'\bhref=["\']([^"\']+)["\']', re.I)
+
+
+def find_icon(result: FetchResult) -> Optional[str]:
+    """Absolute URL of the first icon linked from an HTML page"""
+    if 'html' not in result.headers.get('content-type', ''):
+        return None
+    for link in ICON_LINK_RE.findall(result.text(HTML_HEAD_BYTES)):
+        href = HREF_RE.search(link)
+        if href:
+            return urljoin(result.final_url or result.url, href.group(1))
+    return None
+
+
+def check_website(task: FetchTask, result: FetchResult) -> Dict[str, Any]:
+    """Final URL after redirects and the site icon, or the failure"""
+    if not result.ok:
+        return {'ok': False, 'status': result.status, 'error': result.error}
+    final = urlsplit(result.final_url or result.url)
+    return {
+        'ok': True,
+        'status': result.status,
+        'website': f"{final.scheme}://{final.netloc}" + (final.path.rstrip('/') or ''),
+        'icon': find_icon(result)
+    }
+
+
+def check_logo(task: FetchTask, result: FetchResult) -> Dict[str, Any]:
+    """Whether a logo URL serves an image"""
+    content_type = result.headers.get('content-type', '')
+    return {'ok': result.ok and content_type.startswith('image/'), 'status': result.status, 'error': result.error}
+
+
+def parse_fee_list(task: FetchTask, result: FetchResult) -> Optional[Dict[str, Any]]:
+    """Fee list as {university name: annual fee}"""
+    if not result.ok:
+        return None
+    fees = json.loads(result.body)
+    return {name: fee for name, fee in fees.items() if isinstance(fee, (int, float)) and not isinstance(fee, bool)}
+
+
+def build_tasks(universities: List[Dict[str, Any]], jobs, fees_url: Optional[str]) -> List[FetchTask]:
+    """One task per website and logo to check, plus the fee list"""
+    tasks = []
+    index = NameIndex((university['id'], university.get('name', '')) for university in universities)
+    known_logos, unresolved = index.resolve_all(UNIVERSITY_LOGOS) if 'logos' in jobs else ({}, [])
+    report_unresolved(unresolved)
+
+    for university in universities:
+        university_id = university['id']
+        if 'websites' in jobs and university.get('website'):
+            tasks.append(FetchTask(f"website:{university_id}", university['website']))
+        if 'logos' in jobs:
+            match = known_logos.get(university_id)
+            logo = university.get('logo') or (UNIVERSITY_LOGOS[match.query] if match else None)
+            if logo:
+                tasks.append(FetchTask(f"logo:{university_id}", logo, 'HEAD'))
+    if 'fees' in jobs and fees_url:
+        tasks.append(FetchTask('fees', fees_url))
+    return tasks
+
+
+def build_patches(universities: List[Dict[str, Any]], tasks: List[FetchTask],
+                  results: Dict[str, Any]) -> List[CatalogPatch]:
+    """Catalog updates for the fetched values"""
+    now = datetime.now().isoformat()
+    urls = {task.key: task.url for task in tasks}
+    updates = {}
+
+    for university in universities:
+        university_id = university['id']
+        changes = {}
+
+        website = results.get(f"website:{university_id}")
+        # Only moved sites are updated, not redirects to a landing page on the same host
+        if website and website['ok'] and urlsplit(website['website'])[:2] != urlsplit(university['website'])[:2]:
+            changes['website'] = website['website']
+            print(f"   🌐 {university['name']}: {university.get('website')} → {website['website']}")
+        elif website and not website['ok']:
+            print(f"   ⚠️  {university['name']}: website unreachable ({website['status'] or website['error']})")
+
+        logo = results.get(f"logo:{university_id}")
+        if logo and logo['ok']:
+            changes['logo'] = urls[f"logo:{university_id}"]
+        elif website and website['ok'] and website['icon']:
+            # Missing or broken logo: fall back to the icon the website links
+            changes['logo'] = website['icon']
+        if changes.get('logo') == university.get('logo'):
+            changes.pop('logo', None)
+        elif 'logo' in changes:
+            print(f"   🖼️  {university['name']}: logo → {changes['logo']}")
+
+        if changes:
+            updates[university_id] = changes
+
+    fees = results.get('fees')
+    if fees:
+        index = NameIndex((university['id'], university.get('name', '')) for university in universities)
+        matches, unresolved = index.resolve_all(fees)
+        by_id = {university['id']: university for university in universities}
+        for university_id, match in matches.items():
+            new_fee = fees[match.query]
+            if by_id[university_id].get('tuitionFee') != new_fee:
+                updates.setdefault(university_id, {}).update(tuitionFee=new_fee, tuition_updated=now)
+                print(f"   💰 {match.name}: ${by_id[university_id].get('tuitionFee', 'N/A')} → ${new_fee:,}")
+        report_unresolved(unresolved)
+
+    return [CatalogPatch.update(university_id, dict(changes, enriched_at=now))
+            for university_id, changes in updates.items()]
+
+
+def enrich_universities(jobs=JOBS, fees_url: Optional[str] = None, workers: Optional[int] = None,
+                        use_cache: bool = True, restart: bool = False,
+                        catalog_file: str = CATALOG_FILE, checkpoint_file: str = CHECKPOINT_FILE) -> bool:
+    """Fetch everything the jobs need in parallel and write one catalog batch"""
+    print("🔎 ENRICHING UNIVERSITY DATA")
+    print("=" * 50)
+
+    pipeline = FetchPipeline(workers=workers, checkpoint_path=checkpoint_file,
+                             **({} if use_cache else {'cache_dir': None}))
+    if restart:
+        pipeline.checkpoint.clear()
+
+    try:
+        universities = read_catalog(catalog_file)
+        tasks = build_tasks(universities, jobs, fees_url)
+        print(f"📊 {len(universities)} universities, {len(tasks)} URLs to check with {pipeline.workers} workers")
+
+        handlers = {'website': check_website, 'logo': check_logo, 'fees': parse_fee_list}
+        started = time.monotonic()
+
+        def progress(done: int, total: int):
+            if done % 50 == 0 or done == total:
+                print(f"   ... {done}/{total}")
+
+        results = pipeline.run(tasks, lambda task, result: handlers[task.key.split(':')[0]](task, result), progress)
+        print(f"⏱️  Fetched in {time.monotonic() - started:.1f}s: {pipeline.stats}")
+
+        patches = build_patches(universities, tasks, results)
+        result = write_catalog(patches, catalog_file)
+
+        # Everything is in the catalog now; the next run starts fresh
+        if len(results) == len(tasks) and not pipeline.stats['failed']:
+            pipeline.checkpoint.clear()
+        else:
+            print(f"⚠️  {pipeline.stats['failed']} URLs failed; rerun to retry them")
+
+        print(f"\n📊 ENRICHMENT SUMMARY:")
+        print(f"   Universities Updated: {len(result.updated)}")
+        print(f"   Catalog Version: {result.version}")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error enriching universities: {e}")
+        return False
+    finally:
+        pipeline.close()
+
+
+def main():
+    """Main function for catalog enrichment"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', default=','.join(JOBS), help="Comma-separated jobs: websites,logos,fees")
+    parser.add_argument('--fees-url', help="JSON document of {university name: annual tuition fee}")
+    parser.add_argument('--workers', type=int, help="Concurrent fetches (FETCH_WORKERS)")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore the on-disk response cache")
+    parser.add_argument('--restart', action='store_true', help="Discard the checkpoint of an interrupted run")
+    parser.add_argument('--catalog', default=CATALOG_FILE)
+    args = parser.parse_args()
+
+    jobs = [job for job in args.jobs.split(',') if job]
+    unknown = set(jobs) - set(JOBS)
+    if unknown:
+        parser.error(f"unknown jobs: {', '.join(sorted(unknown))}")
+
+    return enrich_universities(jobs, args.fees_url, args.workers, not args.no_cache, args.restart, args.catalog)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,84 @@
+"""
+Gunicorn configuration for the Study Abroad API
+
+Every setting can be overridden through the environment. Defaults depend on
+WORKLOAD_PROFILE:
+
+    cpu (default)  Recommendation scoring and admission prediction are pure
+                   Python and hold the GIL, so throughput scales with
+                   processes, not threads: one worker per core plus one,
+                   two threads each to overlap the short database calls.
+
+    io             With the Firestore backend most of a request is spent
+                   waiting on the network, where threads release the GIL:
+                   fewer processes (one per core) with eight threads each
+                   serve more concurrent requests in less memory.
+
+Run load_test.py against both profiles on the target machine and keep the
+one with the better p95 at the expected concurrency.
+"""
+
+import os
+import multiprocessing
+
+WORKLOAD_PROFILE = os.getenv('WORKLOAD_PROFILE', 'cpu').lower()
+if WORKLOAD_PROFILE not in ('cpu', 'io'):
+    raise ValueError(f"WORKLOAD_PROFILE must be 'cpu' or 'io', got {WORKLOAD_PROFILE!r}")
+
+_cores = multiprocessing.cpu_count()
+_profile_defaults = {
+    'cpu': {'workers': _cores + 1, 'threads': 2},
+    'io': {'workers': _cores, 'threads': 8}
+}[WORKLOAD_PROFILE]
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Worker and thread model
+workers = int(os.getenv('WEB_CONCURRENCY', str(_profile_defaults['workers'])))
+threads = int(os.getenv('GUNICORN_THREADS', str(_profile_defaults['threads'])))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Seconds an idle keep-alive connection is held open; behind a load balancer,
+# keep this above the balancer's own idle timeout
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+
+# Recycle workers to bound slow memory growth; jitter avoids restarting them all at once
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+# Import the app in the master and warm it up before forking (see on_starting)
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    """Load the catalog and models once in the master so workers share them copy-on-write"""
+    if not server.cfg.preload_app:
+        return
+
+    from app import prefork_warmup
+    from utils.prefork import memory_usage
+
+    before = memory_usage()['rss_kb']
+    for step, seconds, error in prefork_warmup():
+        if error:
+            server.log.warning(f"Warmup step {step} failed after {seconds * 1000:.0f} ms: {error}")
+        else:
+            server.log.info(f"Warmup step {step}: {seconds * 1000:.0f} ms")
+    after = memory_usage()['rss_kb']
+    server.log.info(f"Master RSS {before / 1024:.1f} -> {after / 1024:.1f} MiB after warmup "
+                    f"({WORKLOAD_PROFILE} profile: {workers} workers x {threads} threads)")
+
+
+def post_worker_init(worker):
+    """Report each worker's memory right after boot"""
+    from utils.prefork import memory_usage
+
+    usage = memory_usage()
+    worker.log.info(f"Worker {worker.pid} booted: RSS {usage['rss_kb'] / 1024:.1f} MiB "
+                    f"(private {usage['private_kb'] / 1024:.1f}, shared {usage['shared_kb'] / 1024:.1f})")
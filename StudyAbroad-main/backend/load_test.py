@@ -0,0 +1,126 @@
+"""
+Load Test
+Drives a running API with concurrent clients and reports throughput and latency
+
+Usage:
+    python load_test.py --url http://localhost:5000 --concurrency 32 --duration 30
+
+Compare gunicorn.conf.py profiles by starting the server with
+WORKLOAD_PROFILE=cpu and then WORKLOAD_PROFILE=io and running the same test.
+--mix cpu exercises recommendation scoring, --mix io the catalog endpoints.
+A run where most requests fail (401, 422 for a bad --token, 5xx) exits
+with an error instead of reporting them as throughput.
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.request
+import urllib.error
+from collections import Counter
+
+# (method, path, body) per request mix
+REQUEST_MIXES = {
+    'io': [
+        ('GET', '/api/universities?q=university&page=1&per_page=20', None),
+        ('GET', '/api/universities?country=US,UK&sort_by=ranking', None),
+        ('GET', '/api/universities/1', None),
+        ('GET', '/api/universities/countries', None),
+        ('GET', '/api/universities/statistics', None),
+    ],
+    'cpu': [
+        ('POST', '/api/recommendations/generate', {
+            'max_recommendations': 10,
+            'user_profile': {
+                'cgpa': 3.5, 'gre_score': 320, 'ielts_score': 7.0,
+                'field_of_study': 'Computer Science', 'budget_max': 50000
+            }
+        }),
+    ],
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_client(base_url, requests_mix, token, deadline, latencies, statuses, lock):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    
+    while time.perf_counter() < deadline:
+        method, path, body = random.choice(requests_mix)
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(base_url + path, data=data, headers=headers, method=method)
+        
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except Exception:
+            status = 'error'
+        elapsed = (time.perf_counter() - started) * 1000
+        
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the Study Abroad API')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds')
+    parser.add_argument('--mix', choices=sorted(REQUEST_MIXES), default='io')
+    parser.add_argument('--token', help='JWT access token sent with every request')
+    args = parser.parse_args()
+    
+    latencies = []
+    statuses = Counter()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    
+    clients = [
+        threading.Thread(target=run_client, args=(args.url.rstrip('/'), REQUEST_MIXES[args.mix],
+                                                   args.token, deadline, latencies, statuses, lock))
+        for _ in range(args.concurrency)
+    ]
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    print("LOAD TEST RESULTS")
+    print("=" * 40)
+    print(f"Mix:          {args.mix}")
+    print(f"Concurrency:  {args.concurrency}")
+    print(f"Requests:     {len(latencies)} in {elapsed:.1f} s")
+    print(f"Throughput:   {len(latencies) / elapsed:.1f} req/s")
+    print(f"Latency p50:  {percentile(latencies, 0.50):.1f} ms")
+    print(f"Latency p95:  {percentile(latencies, 0.95):.1f} ms")
+    print(f"Latency p99:  {percentile(latencies, 0.99):.1f} ms")
+    print(f"Statuses:     {dict(statuses)}")
+    
+    # Numbers from rejected requests say nothing about the workload
+    failed = sum(count for status, count in statuses.items() if not (isinstance(status, int) and 200 <= status < 300))
+    if failed * 2 > len(latencies):
+        print(f"\nERROR: {failed} of {len(latencies)} requests failed (401/422 mean a missing or "
+              f"invalid --token); these results are not valid")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,5 @@
 # ML package initialization
 
-from .admission_predictor import AdmissionPredictor, get_predictor
 from .recommendation_engine import RecommendationEngine, get_recommendation_engine
 from .ml_service import MLService, get_ml_service
 
@@ -11,4 +10,12 @@ __all__ = [
     'get_recommendation_engine',
     'MLService',
     'get_ml_service'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    """Import the scikit-learn predictor only when it is asked for"""
+    if name in ('AdmissionPredictor', 'get_predictor'):
+        from . import admission_predictor
+        return getattr(admission_predictor, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -15,6 +15,8 @@ import json
 import os
 from typing import Dict, List, Tuple, Optional
 
+from services.catalog_schema import normalize_catalog
+
 
 class AdmissionPredictor:
     """
@@ -137,7 +139,7 @@ class AdmissionPredictor:
             min_cgpa = university.get('min_cgpa', 3.0)
             min_gre = university.get('min_gre', 300)
             min_ielts = university.get('min_ielts', 6.0)
-            acceptance_rate = university.get('acceptanceRate', 0.5)
+            acceptance_rate = university.get('acceptance_rate', 0.5)
             
             # Generate more realistic student data with wider variation
             # Some students will be below requirements, some above, some around
@@ -360,7 +362,7 @@ class AdmissionPredictor:
 
 def load_universities_data(file_path: str = None) -> List[Dict]:
     """
-    Load universities data from JSON file
+    Load universities data from JSON file, normalized to the canonical fields
     """
     if file_path is None:
         # Default path relative to this file
@@ -369,7 +371,7 @@ def load_universities_data(file_path: str = None) -> List[Dict]:
     
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            return normalize_catalog(json.load(f))[1]
     except FileNotFoundError:
         print(f"Universities data file not found at {file_path}")
         return []
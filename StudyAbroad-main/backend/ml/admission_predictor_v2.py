@@ -58,7 +58,8 @@ class RealisticAdmissionPredictor:
         
         # Get university ranking and acceptance rate
         ranking = university_data.get('ranking', 1000)
-        acceptance_rate = university_data.get('acceptanceRate', 0.5)
+        # Canonical acceptance rate is a fraction (acceptanceRate in the raw catalog is a percentage)
+        acceptance_rate = university_data.get('acceptance_rate', 0.5)
         
         # Calculate admission probability using realistic rules
         admission_prob = self._calculate_admission_probability(
@@ -6,10 +6,10 @@ including admission prediction and university recommendations.
 """
 
 import json
-import os
 from typing import Dict, List, Optional
-from .admission_predictor import get_predictor
 from .recommendation_engine import get_recommendation_engine
+from services.catalog_schema import UniversityRecord
+from services.catalog_snapshot import CatalogSnapshot, get_catalog_snapshot
 
 
 class MLService:
@@ -18,26 +18,36 @@ class MLService:
     """
     
     def __init__(self):
-        self.predictor = get_predictor()
+        self._predictor = None
         self.recommendation_engine = get_recommendation_engine()
-        self._universities_cache = None
+    
+    @property
+    def predictor(self):
+        """
+        RandomForest admission predictor, imported and trained on first use
+        (pandas and scikit-learn are only loaded here)
+        """
+        if self._predictor is None:
+            from .admission_predictor import get_predictor
+            self._predictor = get_predictor()
+        return self._predictor
+    
+    def _load_snapshot(self) -> Optional[CatalogSnapshot]:
+        """
+        Normalized catalog snapshot, shared with the university service
+        """
+        try:
+            return get_catalog_snapshot()
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            print(f"Error loading universities data: {str(e)}")
+            return None
     
     def _load_universities(self) -> List[Dict]:
         """
         Load universities data with caching
         """
-        if self._universities_cache is None:
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            file_path = os.path.join(current_dir, '..', 'data', 'universities.json')
-            
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    self._universities_cache = json.load(f)
-            except (FileNotFoundError, json.JSONDecodeError) as e:
-                print(f"Error loading universities data: {str(e)}")
-                self._universities_cache = []
-        
-        return self._universities_cache
+        snapshot = self._load_snapshot()
+        return list(snapshot.universities) if snapshot else []
     
     def predict_admission_probability(self, user_profile: Dict, university_id: int) -> Dict:
         """
@@ -127,22 +137,25 @@ class MLService:
         Returns:
             Dictionary with recommendations and summary
         """
-        universities = self._load_universities()
+        snapshot = self._load_snapshot()
+        records = list(snapshot.records) if snapshot else []
         
         # Apply filters if provided
         if filters:
-            universities = self._apply_filters(universities, filters)
+            records = self._apply_filters(records, filters)
         
-        if not universities:
+        if not records:
             return {
                 'recommendations': [],
                 'summary': {},
                 'message': 'No universities match the specified criteria'
             }
         
+        universities = [snapshot.get(record.id) for record in records]
+        
         try:
             recommendations = self.recommendation_engine.generate_recommendations(
-                user_profile, universities, max_recommendations
+                user_profile, universities, max_recommendations, records=records
             )
             
             summary = self.recommendation_engine.get_recommendation_summary(recommendations)
@@ -159,43 +172,42 @@ class MLService:
                 'summary': {}
             }
     
-    def _apply_filters(self, universities: List[Dict], filters: Dict) -> List[Dict]:
+    def _apply_filters(self, records: List[UniversityRecord], filters: Dict) -> List[UniversityRecord]:
         """
-        Apply filters to university list
+        Apply filters to normalized university records
         """
-        filtered = universities.copy()
+        filtered = records
         
         # Country filter
         if 'countries' in filters and filters['countries']:
-            country_list = [c.strip().lower() for c in filters['countries']]
-            filtered = [u for u in filtered if u.get('country', '').lower() in country_list]
+            country_list = {c.strip().lower() for c in filters['countries']}
+            filtered = [r for r in filtered if r.country.lower() in country_list]
         
         # Field filter
         if 'fields' in filters and filters['fields']:
-            field_list = [f.strip().lower() for f in filters['fields']]
-            filtered = [u for u in filtered 
-                       if any(field.lower() in [uf.lower() for uf in u.get('fields', [])] 
-                             for field in field_list)]
+            field_list = {f.strip().lower() for f in filters['fields']}
+            filtered = [r for r in filtered 
+                       if any(field.lower() in field_list for field in r.fields)]
         
-        # Budget filter
+        # Budget filter (tuition plus living cost, where the catalog has them)
         if 'max_budget' in filters and filters['max_budget']:
             max_budget = float(filters['max_budget'])
-            filtered = [u for u in filtered 
-                       if (u.get('tuition_fee', 0) + u.get('living_cost', 0)) <= max_budget]
+            filtered = [r for r in filtered 
+                       if (r.tuition_fee or 0) + (r.living_cost or 0) <= max_budget]
         
         # Ranking filter
         if 'max_ranking' in filters and filters['max_ranking']:
             max_ranking = int(filters['max_ranking'])
-            filtered = [u for u in filtered 
-                       if u.get('ranking', 1000) <= max_ranking]
+            filtered = [r for r in filtered 
+                       if (r.ranking if r.ranking is not None else 1000) <= max_ranking]
         
-        # Minimum acceptance rate filter
+        # Minimum acceptance rate filter (a fraction, like acceptance_rate)
         if 'min_acceptance_rate' in filters and filters['min_acceptance_rate']:
             min_rate = float(filters['min_acceptance_rate'])
-            filtered = [u for u in filtered 
-                       if u.get('acceptance_rate', 0) >= min_rate]
+            filtered = [r for r in filtered 
+                       if (r.acceptance_rate or 0) >= min_rate]
         
-        return filtered
+        return list(filtered)
     
     def get_recommendation_explanation(self, user_profile: Dict, university_id: int) -> Dict:
         """
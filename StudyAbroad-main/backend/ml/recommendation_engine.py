@@ -9,8 +9,8 @@ import json
 import os
 from typing import Dict, List, Tuple, Optional
 import numpy as np
-from .admission_predictor import get_predictor
 from .admission_predictor_v2 import get_realistic_predictor, RealisticAdmissionPredictor
+from services.catalog_schema import UniversityRecord, normalize_university
 
 
 class RecommendationEngine:
@@ -29,7 +29,8 @@ class RecommendationEngine:
         }
     
     def generate_recommendations(self, user_profile: Dict, universities: List[Dict], 
-                               max_recommendations: int = 10) -> List[Dict]:
+                               max_recommendations: int = 10,
+                               records: Optional[List[UniversityRecord]] = None) -> List[Dict]:
         """
         Generate personalized university recommendations
         
@@ -37,33 +38,40 @@ class RecommendationEngine:
             user_profile: User's academic profile and preferences
             universities: List of all available universities
             max_recommendations: Maximum number of recommendations to return
+            records: Normalized records aligned with universities (from the
+                catalog snapshot); normalized here when not given
             
         Returns:
             List of recommended universities with scores and explanations
         """
         recommendations = []
         
+        if records is None:
+            records = [normalize_university(university)[0] for university in universities]
+        
         # Filter universities by preferred countries if specified
-        filtered_universities = self._filter_by_country(user_profile, universities)
+        filtered_universities = self._filter_by_country(
+            user_profile, [pair for pair in zip(universities, records) if pair[1] is not None]
+        )
         
-        for university in filtered_universities:
+        for university, record in filtered_universities:
             try:
                 # Calculate individual scores
-                scores = self._calculate_scores(user_profile, university)
+                scores = self._calculate_scores(user_profile, university, record)
                 
                 # Calculate overall recommendation score
                 overall_score = self._calculate_overall_score(scores)
                 
                 # Generate explanation
-                explanation = self._generate_explanation(scores, user_profile, university)
+                explanation = self._generate_explanation(scores, user_profile, record)
                 
                 # Generate comprehensive cost breakdown
-                cost_breakdown = self._generate_cost_breakdown(user_profile, university)
+                cost_breakdown = self._generate_cost_breakdown(user_profile, university, record)
                 
                 # Get estimated tuition fee for display (if original is 0)
-                display_tuition_fee = university.get('tuitionFee', 0)
+                display_tuition_fee = record.tuition_fee or 0
                 if display_tuition_fee == 0:
-                    ranking = university.get('ranking', 500)
+                    ranking = record.ranking if record.ranking is not None else 500
                     if ranking <= 10:
                         display_tuition_fee = 60000
                     elif ranking <= 50:
@@ -74,10 +82,10 @@ class RecommendationEngine:
                         display_tuition_fee = 25000
                 
                 recommendation = {
-                    'university_id': university['id'],
-                    'university_name': university['name'],
-                    'country': university['country'],
-                    'city': university['city'],
+                    'university_id': record.id,
+                    'university_name': record.name,
+                    'country': record.country,
+                    'city': record.city,
                     'overall_score': round(overall_score, 3),
                     'match_score': round(overall_score, 3),  # Frontend expects this field
                     'admission_probability': scores.get('admission_probability', 0),
@@ -86,11 +94,11 @@ class RecommendationEngine:
                     'explanation': explanation,
                     'cost_breakdown': cost_breakdown,
                     'tuition_fee': display_tuition_fee,  # Frontend expects this field (estimated if needed)
-                    'living_cost': self._estimate_living_cost(university.get('country', '')),  # Frontend expects this field
-                    'ranking': university.get('ranking', 1000),  # Frontend expects this field
-                    'min_cgpa': university.get('min_cgpa', 0),  # Frontend expects this field
-                    'min_gre': university.get('min_gre', 0),  # Frontend expects this field
-                    'website': university.get('website', ''),  # Frontend expects this field
+                    'living_cost': self._estimate_living_cost(record.country),  # Frontend expects this field
+                    'ranking': record.ranking if record.ranking is not None else 1000,  # Frontend expects this field
+                    'min_cgpa': record.min_cgpa or 0,  # Frontend expects this field
+                    'min_gre': record.min_gre or 0,  # Frontend expects this field
+                    'website': record.website or '',  # Frontend expects this field
                     'field_match_score': scores.get('field_match', 0),  # Frontend expects this field
                     'cost_fit_score': scores.get('cost_fit', 0),  # Frontend expects this field
                     'country_preference_score': scores.get('country_preference', 0),  # Frontend expects this field
@@ -100,7 +108,7 @@ class RecommendationEngine:
                 recommendations.append(recommendation)
                 
             except Exception as e:
-                print(f"Error processing university {university.get('name', 'Unknown')}: {str(e)}")
+                print(f"Error processing university {record.name}: {str(e)}")
                 continue
         
         # Calculate cost percentiles for all recommendations
@@ -112,7 +120,7 @@ class RecommendationEngine:
         # Return top recommendations
         return recommendations[:max_recommendations]
     
-    def _calculate_scores(self, user_profile: Dict, university: Dict) -> Dict:
+    def _calculate_scores(self, user_profile: Dict, university: Dict, record: UniversityRecord) -> Dict:
         """
         Calculate individual scoring components
         """
@@ -120,9 +128,9 @@ class RecommendationEngine:
         
         # 1. Admission Probability Score
         try:
-            print(f"DEBUG: Predicting admission for {university.get('name', 'Unknown')}")
+            print(f"DEBUG: Predicting admission for {record.name}")
             print(f"DEBUG: Student - CGPA: {user_profile.get('cgpa')}, GRE: {user_profile.get('gre_score')}, IELTS: {user_profile.get('ielts_score')}")
-            print(f"DEBUG: University - Min CGPA: {university.get('min_cgpa')}, Min GRE: {university.get('min_gre')}, Min IELTS: {university.get('min_ielts')}")
+            print(f"DEBUG: University - Min CGPA: {record.min_cgpa}, Min GRE: {record.min_gre}, Min IELTS: {record.min_ielts}")
             
             prediction = self.predictor.predict(user_profile, university)
             print(f"DEBUG: Prediction result - Probability: {prediction['admission_probability']}, Category: {prediction['probability_category']}")
@@ -137,32 +145,31 @@ class RecommendationEngine:
             scores['admission_category'] = 'Moderate'
         
         # 2. Cost Fit Score
-        scores['cost_fit'] = self._calculate_cost_fit(user_profile, university)
+        scores['cost_fit'] = self._calculate_cost_fit(user_profile, record)
         
         # 3. Field Match Score
-        scores['field_match'] = self._calculate_field_match(user_profile, university)
+        scores['field_match'] = self._calculate_field_match(user_profile, record)
         
         # 4. Country Preference Score
-        scores['country_preference'] = self._calculate_country_preference(user_profile, university)
+        scores['country_preference'] = self._calculate_country_preference(user_profile, record)
         
         # 5. Ranking Score
-        scores['ranking'] = self._calculate_ranking_score(university)
+        scores['ranking'] = self._calculate_ranking_score(record)
         
         return scores
     
-    def _calculate_cost_fit(self, user_profile: Dict, university: Dict) -> float:
+    def _calculate_cost_fit(self, user_profile: Dict, record: UniversityRecord) -> float:
         """
         Calculate how well the university cost fits the user's budget
         """
         budget_min = user_profile.get('budget_min', 0)
         budget_max = user_profile.get('budget_max', 100000)
         
-        # Use the correct field name from the data
-        tuition_fee = university.get('tuitionFee', 0)
+        tuition_fee = record.tuition_fee or 0
         
         # If tuition fee is 0 (missing data), use ranking-based estimate
         if tuition_fee == 0:
-            ranking = university.get('ranking', 500)
+            ranking = record.ranking if record.ranking is not None else 500
             if ranking <= 10:
                 tuition_fee = 60000  # Top 10 universities
             elif ranking <= 50:
@@ -173,7 +180,7 @@ class RecommendationEngine:
                 tuition_fee = 25000  # Other universities
         
         # Estimate living cost based on country if not available
-        living_cost = self._estimate_living_cost(university.get('country', ''))
+        living_cost = self._estimate_living_cost(record.country)
         total_cost = tuition_fee + living_cost
         
         if budget_max <= 0:
@@ -191,12 +198,12 @@ class RecommendationEngine:
             penalty = min(0.7, over_budget_ratio)  # Maximum penalty of 0.7
             return max(0.0, 0.3 - penalty)
     
-    def _calculate_field_match(self, user_profile: Dict, university: Dict) -> float:
+    def _calculate_field_match(self, user_profile: Dict, record: UniversityRecord) -> float:
         """
         Calculate field of study match score
         """
         user_field = user_profile.get('field_of_study', '').lower().strip()
-        university_programs = university.get('programs', [])
+        university_programs = record.fields
         
         if not user_field or not university_programs:
             return 0.5  # Neutral score if no field specified
@@ -216,9 +223,10 @@ class RecommendationEngine:
         
         return 0.2  # No match found
     
-    def _filter_by_country(self, user_profile: Dict, universities: List[Dict]) -> List[Dict]:
+    def _filter_by_country(self, user_profile: Dict,
+                           universities: List[Tuple[Dict, UniversityRecord]]) -> List[Tuple[Dict, UniversityRecord]]:
         """
-        Filter universities by preferred countries if specified
+        Filter (university, record) pairs by preferred countries if specified
         """
         preferred_countries = user_profile.get('preferred_countries', '')
         
@@ -236,15 +244,15 @@ class RecommendationEngine:
         
         # Filter universities
         filtered = []
-        for university in universities:
-            university_country = university.get('country', '').lower()
+        for university, record in universities:
+            university_country = record.country.lower()
             
             # Check for exact or partial match
             for pref_country in preferred_list:
                 if (pref_country in university_country or 
                     university_country in pref_country or
                     self._country_code_match(pref_country, university_country)):
-                    filtered.append(university)
+                    filtered.append((university, record))
                     break
         
         return filtered if filtered else universities  # Return all if no matches found
@@ -284,12 +292,12 @@ class RecommendationEngine:
         
         return False
     
-    def _calculate_country_preference(self, user_profile: Dict, university: Dict) -> float:
+    def _calculate_country_preference(self, user_profile: Dict, record: UniversityRecord) -> float:
         """
         Calculate country preference match score
         """
         preferred_countries = user_profile.get('preferred_countries', '')
-        university_country = university.get('country', '')
+        university_country = record.country
         
         if not preferred_countries:
             return 0.5  # No preference specified, neutral score
@@ -315,11 +323,11 @@ class RecommendationEngine:
         
         return 0.1  # No match
     
-    def _calculate_ranking_score(self, university: Dict) -> float:
+    def _calculate_ranking_score(self, record: UniversityRecord) -> float:
         """
         Calculate ranking-based score (higher rank = higher score)
         """
-        ranking = university.get('ranking', 1000)
+        ranking = record.ranking if record.ranking is not None else 1000
         
         if ranking <= 0:
             return 0.5  # Invalid ranking, neutral score
@@ -350,21 +358,21 @@ class RecommendationEngine:
         
         return min(1.0, max(0.0, overall_score))
     
-    def _generate_cost_breakdown(self, user_profile: Dict, university: Dict) -> Dict:
+    def _generate_cost_breakdown(self, user_profile: Dict, university: Dict, record: UniversityRecord) -> Dict:
         """
         Generate comprehensive cost breakdown with multiple currency support and analysis
         """
         # Base costs from university data
-        tuition_fee = university.get('tuitionFee', 0)
-        living_cost = self._estimate_living_cost(university.get('country', ''))
+        tuition_fee = record.tuition_fee or 0
+        living_cost = self._estimate_living_cost(record.country)
         application_fee = university.get('application_fee', 100)  # Default application fee
         other_fees = university.get('other_fees', 0)
         
         # Calculate additional estimated costs
         books_supplies = tuition_fee * 0.02  # Estimate 2% of tuition for books/supplies
         personal_expenses = living_cost * 0.15  # Estimate 15% of living cost for personal expenses
-        health_insurance = 2000 if university.get('country') == 'USA' else 1000  # Estimate health insurance
-        visa_fees = 500 if university.get('country') != user_profile.get('home_country', '') else 0
+        health_insurance = 2000 if record.country == 'USA' else 1000  # Estimate health insurance
+        visa_fees = 500 if record.country != user_profile.get('home_country', '') else 0
         
         # Calculate total annual cost
         total_annual_cost = (tuition_fee + living_cost + other_fees + 
@@ -393,7 +401,7 @@ class RecommendationEngine:
         
         # Calculate cost per credit/year ratios for comparison
         cost_efficiency = {
-            'cost_per_ranking_point': total_annual_cost / max(1, 1000 - university.get('ranking', 500)),
+            'cost_per_ranking_point': total_annual_cost / max(1, 1000 - (record.ranking if record.ranking is not None else 500)),
             'tuition_to_living_ratio': tuition_fee / max(1, living_cost),
             'total_cost_percentile': 0  # Will be calculated relative to other universities
         }
@@ -441,7 +449,7 @@ class RecommendationEngine:
                 'living_percentage': round((living_cost / total_annual_cost) * 100, 1),
                 'other_percentage': round(((other_fees + books_supplies + personal_expenses + health_insurance) / total_annual_cost) * 100, 1)
             },
-            'financial_aid_potential': self._estimate_financial_aid_potential(user_profile, university),
+            'financial_aid_potential': self._estimate_financial_aid_potential(user_profile, record),
             'cost_trends': {
                 'inflation_adjusted_2_years': round(total_annual_cost * 2 * 1.06, 2),  # 3% annual inflation
                 'inflation_adjusted_4_years': round(total_annual_cost * 4 * 1.125, 2)  # Compound inflation
@@ -469,7 +477,7 @@ class RecommendationEngine:
         }
         return symbols.get(currency_code, currency_code)
     
-    def _estimate_financial_aid_potential(self, user_profile: Dict, university: Dict) -> Dict:
+    def _estimate_financial_aid_potential(self, user_profile: Dict, record: UniversityRecord) -> Dict:
         """Estimate potential for financial aid based on user profile and university"""
         cgpa = user_profile.get('cgpa', 0)
         gre_score = user_profile.get('gre_score', 0)
@@ -488,23 +496,24 @@ class RecommendationEngine:
         
         # University-specific factors
         university_generosity = 0.3  # Default assumption
-        if university.get('ranking', 1000) <= 50:
+        ranking = record.ranking if record.ranking is not None else 1000
+        if ranking <= 50:
             university_generosity = 0.5  # Top universities often have better aid
-        elif university.get('ranking', 1000) <= 200:
+        elif ranking <= 200:
             university_generosity = 0.4
         
         aid_potential = min(1.0, academic_strength + university_generosity)
         
-        estimated_aid_amount = university.get('tuitionFee', 0) * aid_potential * 0.3  # Conservative estimate
+        estimated_aid_amount = (record.tuition_fee or 0) * aid_potential * 0.3  # Conservative estimate
         
         return {
             'potential_score': round(aid_potential, 2),
             'estimated_aid_amount': round(estimated_aid_amount, 2),
             'aid_likelihood': 'high' if aid_potential >= 0.7 else 'moderate' if aid_potential >= 0.4 else 'low',
-            'scholarship_types': self._get_potential_scholarships(user_profile, university)
+            'scholarship_types': self._get_potential_scholarships(user_profile, record)
         }
     
-    def _get_potential_scholarships(self, user_profile: Dict, university: Dict) -> List[str]:
+    def _get_potential_scholarships(self, user_profile: Dict, record: UniversityRecord) -> List[str]:
         """Get list of potential scholarship types based on profile"""
         scholarships = []
         
@@ -529,7 +538,7 @@ class RecommendationEngine:
             scholarships.append('Business School Fellowship')
         
         # International student scholarships
-        if user_profile.get('home_country', '').lower() != university.get('country', '').lower():
+        if user_profile.get('home_country', '').lower() != record.country.lower():
             scholarships.append('International Student Aid')
         
         return scholarships[:4]  # Limit to top 4 most relevant
@@ -549,7 +558,7 @@ class RecommendationEngine:
             percentile = (costs.index(cost) + 1) / len(costs) * 100
             rec['cost_breakdown']['cost_efficiency']['total_cost_percentile'] = round(percentile, 1)
     
-    def _generate_explanation(self, scores: Dict, user_profile: Dict, university: Dict) -> List[str]:
+    def _generate_explanation(self, scores: Dict, user_profile: Dict, record: UniversityRecord) -> List[str]:
         """
         Generate human-readable explanation for the recommendation
         """
@@ -588,7 +597,7 @@ class RecommendationEngine:
             explanations.append("Different from your preferred countries")
         
         # Ranking explanation
-        ranking = university.get('ranking', 1000)
+        ranking = record.ranking if record.ranking is not None else 1000
         if ranking <= 50:
             explanations.append(f"Highly ranked institution (#{ranking} globally)")
         elif ranking <= 200:
@@ -596,7 +605,7 @@ class RecommendationEngine:
         
         # Academic requirements comparison
         user_cgpa = user_profile.get('cgpa', 0)
-        min_cgpa = university.get('min_cgpa', 0)
+        min_cgpa = record.min_cgpa or 0
         if user_cgpa >= min_cgpa + 0.2:
             explanations.append("Your CGPA exceeds requirements")
         elif user_cgpa >= min_cgpa:
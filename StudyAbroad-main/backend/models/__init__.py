@@ -4,6 +4,7 @@
 from .user import User
 from .bookmark import Bookmark, UserPreference, SearchHistory
 from .recommendation import RecommendationResult, AdmissionPrediction, RecommendationSession
+from .university import University, Program, Field
 from .database import DatabaseManager, db_manager, get_db_session, init_db
 
 # Export all models and database utilities
@@ -15,6 +16,9 @@ __all__ = [
     'RecommendationResult',
     'AdmissionPrediction',
     'RecommendationSession',
+    'University',
+    'Program',
+    'Field',
     'DatabaseManager',
     'db_manager',
     'get_db_session',
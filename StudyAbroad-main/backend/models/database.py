@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 import os
+import threading
 
 # Database configuration
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///database/student_abroad.db')
@@ -10,23 +11,28 @@ class DatabaseManager:
         self.database_url = database_url or DATABASE_URL
         self.engine = None
         self.SessionLocal = None
+        self._init_lock = threading.Lock()
         
     def initialize_database(self):
         """Initialize database connection and create tables"""
-        # Create engine
-        self.engine = create_engine(
-            self.database_url,
-            echo=False,  # Set to True for SQL debugging
-            connect_args={"check_same_thread": False} if "sqlite" in self.database_url else {}
-        )
-        
-        # Create session factory
-        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
-        
-        # Create all tables
-        self.create_tables()
-        
-        return self.engine
+        with self._init_lock:
+            if self.SessionLocal is not None:
+                return self.engine
+            
+            # Create engine
+            self.engine = create_engine(
+                self.database_url,
+                echo=False,  # Set to True for SQL debugging
+                connect_args={"check_same_thread": False} if "sqlite" in self.database_url else {}
+            )
+            
+            # Create all tables
+            self.create_tables()
+            
+            # Create session factory last, other threads wait until tables exist
+            self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+            
+            return self.engine
     
     def create_tables(self):
         """Create all database tables"""
@@ -34,6 +40,7 @@ class DatabaseManager:
         from .user import Base, User
         from .bookmark import Bookmark, UserPreference, SearchHistory
         from .recommendation import RecommendationResult, AdmissionPrediction, RecommendationSession
+        from .university import University, Program, Field
         
         # Create all tables
         Base.metadata.create_all(bind=self.engine)
@@ -41,9 +48,9 @@ class DatabaseManager:
         print("Database tables created successfully")
     
     def get_session(self):
-        """Get a database session"""
+        """Get a database session, connecting and creating tables on first use"""
         if not self.SessionLocal:
-            raise Exception("Database not initialized. Call initialize_database() first.")
+            self.initialize_database()
         return self.SessionLocal()
     
     def close_connection(self):
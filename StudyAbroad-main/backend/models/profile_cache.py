@@ -0,0 +1,147 @@
+"""
+Cache-aside layer for the scoring profile of a user
+
+Recommendation endpoints only need a handful of academic and preference
+fields, so those are cached per user ID for a short TTL instead of loading
+the full User row on every request. Profile update handlers call
+invalidate() after they commit.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, NamedTuple, Optional
+
+from models.user_repository import UserRepository
+
+logger = logging.getLogger(__name__)
+
+
+class UserProfile(NamedTuple):
+    """Immutable snapshot of the fields used for scoring"""
+    id: int
+    cgpa: Optional[float] = None
+    gre_score: Optional[int] = None
+    ielts_score: Optional[float] = None
+    toefl_score: Optional[int] = None
+    field_of_study: Optional[str] = None
+    preferred_countries: Optional[str] = None
+    budget_min: Optional[float] = None
+    budget_max: Optional[float] = None
+
+    @classmethod
+    def from_user(cls, user) -> 'UserProfile':
+        """Build a profile from a User model instance"""
+        return cls(**{field: getattr(user, field) for field in cls._fields})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Fresh dictionary in the shape the ML service expects"""
+        return self._asdict()
+
+
+class ProfileCache:
+    """Per-process TTL cache of user profiles, optionally backed by Redis"""
+
+    KEY_PREFIX = 'user_profile:'
+
+    def __init__(self, ttl_seconds: Optional[int] = None, max_entries: int = 10000,
+                 redis_url: Optional[str] = None, repository: Optional[UserRepository] = None):
+        self.ttl_seconds = ttl_seconds or int(os.getenv('PROFILE_CACHE_TTL', '300'))
+        self.max_entries = max_entries
+        self.repository = repository or UserRepository()
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._redis = self._connect_redis(redis_url or os.getenv('REDIS_URL'))
+
+    def _connect_redis(self, redis_url: Optional[str]):
+        """Use Redis when configured so all workers share one cache"""
+        if not redis_url:
+            return None
+        try:
+            import redis
+            client = redis.Redis.from_url(redis_url, socket_timeout=0.5)
+            client.ping()
+            return client
+        except Exception as e:
+            logger.warning(f"Profile cache Redis unavailable, using in-process cache: {str(e)}")
+            return None
+
+    def get_profile(self, user_id: int) -> Optional[UserProfile]:
+        """Return the cached profile, loading it from the database on a miss"""
+        user_id = int(user_id)
+
+        profile = self._get_cached(user_id)
+        if profile is not None:
+            return profile
+
+        user = self.repository.get_user_by_id(user_id)
+        if not user:
+            return None
+
+        profile = UserProfile.from_user(user)
+        self._set_cached(user_id, profile)
+        return profile
+
+    def invalidate(self, user_id: int):
+        """Drop a user's cached profile after it has been changed"""
+        user_id = int(user_id)
+        with self._lock:
+            self._entries.pop(user_id, None)
+        if self._redis is not None:
+            try:
+                self._redis.delete(f"{self.KEY_PREFIX}{user_id}")
+            except Exception as e:
+                logger.warning(f"Profile cache invalidation failed for user {user_id}: {str(e)}")
+
+    def clear(self):
+        """Drop every in-process entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def _get_cached(self, user_id: int) -> Optional[UserProfile]:
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(f"{self.KEY_PREFIX}{user_id}")
+                return UserProfile(**json.loads(raw)) if raw else None
+            except Exception as e:
+                logger.warning(f"Profile cache read failed for user {user_id}: {str(e)}")
+                return None
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            profile, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            return profile
+
+    def _set_cached(self, user_id: int, profile: UserProfile):
+        if self._redis is not None:
+            try:
+                self._redis.setex(f"{self.KEY_PREFIX}{user_id}", self.ttl_seconds,
+                                  json.dumps(profile.to_dict()))
+            except Exception as e:
+                logger.warning(f"Profile cache write failed for user {user_id}: {str(e)}")
+            return
+
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict_expired()
+                if len(self._entries) >= self.max_entries:
+                    # Still full: drop the oldest insertion
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[user_id] = (profile, time.monotonic() + self.ttl_seconds)
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        expired = [key for key, (_, expires_at) in self._entries.items() if expires_at < now]
+        for key in expired:
+            del self._entries[key]
+
+
+# Global profile cache instance
+profile_cache = ProfileCache()
@@ -149,6 +149,47 @@ class RecommendationRepository:
         session.refresh(result)
         return result
     
+    @staticmethod
+    def create_recommendation_sessions(session: Session,
+                                       sessions_data: List[Dict[str, Any]]) -> int:
+        """Insert several recommendation sessions in a single commit"""
+        rec_sessions = [
+            RecommendationSession(
+                user_id=data['user_id'],
+                session_type=data['session_type'],
+                user_profile_snapshot=json.dumps(data['user_profile_snapshot']),
+                filters_applied=json.dumps(data['filters_applied']) if data.get('filters_applied') else None,
+                total_recommendations=data.get('total_recommendations', 0)
+            )
+            for data in sessions_data
+        ]
+        session.add_all(rec_sessions)
+        session.commit()
+        return len(rec_sessions)
+    
+    @staticmethod
+    def create_recommendation_results(session: Session,
+                                      results_data: List[Dict[str, Any]]) -> int:
+        """Insert several recommendation results in a single commit"""
+        results = [
+            RecommendationResult(
+                user_id=data['user_id'],
+                university_id=data['university_id'],
+                university_name=data['university_name'],
+                university_country=data.get('university_country'),
+                admission_probability=data.get('admission_probability'),
+                cost_fit_score=data.get('cost_fit_score'),
+                overall_score=data.get('overall_score'),
+                ranking_position=data.get('ranking_position'),
+                reasons=json.dumps(data.get('reasons') or []),
+                confidence_level=data.get('confidence_level')
+            )
+            for data in results_data
+        ]
+        session.add_all(results)
+        session.commit()
+        return len(results)
+    
     @staticmethod
     def get_user_recommendations(session: Session, user_id: int, 
                                limit: int = 20) -> List[RecommendationResult]:
@@ -195,6 +236,22 @@ class SearchHistoryRepository:
         session.refresh(search_record)
         return search_record
     
+    @staticmethod
+    def create_search_records(session: Session, records_data: List[Dict[str, Any]]) -> int:
+        """Insert several search history records in a single commit"""
+        records = [
+            SearchHistory(
+                user_id=data['user_id'],
+                search_query=json.dumps(data['search_query']),
+                search_type=data['search_type'],
+                results_count=data.get('results_count', 0)
+            )
+            for data in records_data
+        ]
+        session.add_all(records)
+        session.commit()
+        return len(records)
+    
     @staticmethod
     def get_user_search_history(session: Session, user_id: int, 
                               search_type: str = None, limit: int = 50) -> List[SearchHistory]:
@@ -0,0 +1,86 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Table, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+import json
+from .user import Base
+
+# Universities offering each field of study
+university_fields = Table(
+    'university_fields',
+    Base.metadata,
+    Column('university_id', Integer, ForeignKey('universities.id', ondelete='CASCADE'), primary_key=True),
+    Column('field_id', Integer, ForeignKey('fields.id', ondelete='CASCADE'), primary_key=True),
+    Index('idx_university_fields_field', 'field_id')
+)
+
+class University(Base):
+    """
+    Catalog entry imported from universities.json (see services/sql_catalog.py).
+
+    The filterable values are columns; the full record is kept in `data` so the
+    API returns exactly what the JSON catalog returns.
+    """
+    __tablename__ = 'universities'
+
+    id = Column(Integer, primary_key=True)  # Same ID as in universities.json
+    position = Column(Integer, nullable=False)  # Order in the catalog file
+    name = Column(String(255))
+    country = Column(String(100), index=True)
+    city = Column(String(100))
+    type = Column(String(50))
+    ranking = Column(Float, index=True)
+    tuition_fee = Column(Float, index=True)
+    acceptance_rate = Column(Float, index=True)
+    min_cgpa = Column(Float, index=True)
+    min_gre = Column(Float, index=True)
+    min_ielts = Column(Float, index=True)
+    min_toefl = Column(Float, index=True)
+    data = Column(Text, nullable=False)  # Full university record as JSON
+    imported_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    programs = relationship('Program', back_populates='university', cascade='all, delete-orphan')
+    fields = relationship('Field', secondary=university_fields, back_populates='universities')
+
+    __table_args__ = (
+        # Country filter followed by a range or sort on ranking or tuition
+        Index('idx_universities_country_ranking', 'country', 'ranking'),
+        Index('idx_universities_country_tuition', 'country', 'tuition_fee'),
+    )
+
+    def to_dict(self):
+        """The university record as stored in the catalog"""
+        return json.loads(self.data)
+
+class Program(Base):
+    __tablename__ = 'programs'
+
+    id = Column(Integer, primary_key=True)
+    university_id = Column(Integer, ForeignKey('universities.id', ondelete='CASCADE'), nullable=False, index=True)
+    name = Column(String(255), nullable=False, index=True)
+    degree = Column(String(100))
+
+    university = relationship('University', back_populates='programs')
+
+    def to_dict(self):
+        """Convert program object to dictionary"""
+        return {
+            'id': self.id,
+            'university_id': self.university_id,
+            'name': self.name,
+            'degree': self.degree
+        }
+
+class Field(Base):
+    __tablename__ = 'fields'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(255), nullable=False, unique=True)
+
+    universities = relationship('University', secondary=university_fields, back_populates='fields')
+
+    def to_dict(self):
+        """Convert field object to dictionary"""
+        return {
+            'id': self.id,
+            'name': self.name
+        }
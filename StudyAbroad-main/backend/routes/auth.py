@@ -1,8 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, create_refresh_token
-from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy.exc import IntegrityError
 from models import get_db_session, User
+from utils.password_policy import password_policy, PasswordHashingBusy
 import re
 from datetime import timedelta
 
@@ -68,7 +68,7 @@ def register():
                 }), 409
             
             # Hash password
-            password_hash = generate_password_hash(password)
+            password_hash = password_policy.hash(password)
             
             # Create new user
             new_user = User(
@@ -105,6 +105,12 @@ def register():
                 'error': 'User with this email already exists',
                 'code': 'USER_EXISTS'
             }), 409
+        except PasswordHashingBusy:
+            session.rollback()
+            return jsonify({
+                'error': 'Server is busy, please retry shortly',
+                'code': 'AUTH_BUSY'
+            }), 503
         except Exception as e:
             session.rollback()
             return jsonify({
@@ -151,12 +157,15 @@ def login():
             # Find user by email
             user = session.query(User).filter_by(email=email).first()
             
-            if not user or not check_password_hash(user.password_hash, password):
+            if not user or not password_policy.verify(user.password_hash, password):
                 return jsonify({
                     'error': 'Invalid email or password',
                     'code': 'INVALID_CREDENTIALS'
                 }), 401
             
+            # Upgrade hashes stored with an outdated algorithm or cost
+            password_policy.schedule_rehash(user.id, password, user.password_hash)
+            
             # Create access and refresh tokens
             access_token = create_access_token(
                 identity=str(user.id),
@@ -177,6 +186,12 @@ def login():
                 'refresh_token': refresh_token
             }), 200
             
+        except PasswordHashingBusy:
+            session.rollback()
+            return jsonify({
+                'error': 'Server is busy, please retry shortly',
+                'code': 'AUTH_BUSY'
+            }), 503
         except Exception as e:
             session.rollback()
             return jsonify({
@@ -331,7 +346,7 @@ def change_password():
                 }), 404
             
             # Verify current password
-            if not check_password_hash(user.password_hash, current_password):
+            if not password_policy.verify(user.password_hash, current_password):
                 log_security_event('PASSWORD_CHANGE_INVALID_CURRENT', {
                     'ip': get_client_ip(),
                     'user_id': current_user_id,
@@ -343,7 +358,7 @@ def change_password():
                 }), 401
             
             # Update password
-            user.password_hash = generate_password_hash(new_password)
+            user.password_hash = password_policy.hash(new_password)
             session.commit()
             
             log_security_event('PASSWORD_CHANGE_SUCCESS', {
@@ -356,6 +371,12 @@ def change_password():
                 'message': 'Password changed successfully'
             }), 200
             
+        except PasswordHashingBusy:
+            session.rollback()
+            return jsonify({
+                'error': 'Server is busy, please retry shortly',
+                'code': 'AUTH_BUSY'
+            }), 503
         except Exception as e:
             session.rollback()
             log_security_event('PASSWORD_CHANGE_DATABASE_ERROR', {
@@ -1,35 +1,16 @@
+import json
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import get_db_session, User
 from models.bookmark import Bookmark
+from models.university import University
 from sqlalchemy.exc import IntegrityError
 
-# Import services with error handling
-try:
-    from services.firebase_university_service import FirebaseUniversityService
-    FIREBASE_AVAILABLE = True
-except ImportError as e:
-    print(f"Firebase service not available: {e}")
-    FIREBASE_AVAILABLE = False
-
-from services.university_service_simple import UniversityService
+from services.university_service_provider import get_university_service
 
 # Create blueprint for bookmark routes
 bookmarks_bp = Blueprint('bookmarks', __name__, url_prefix='/api/bookmarks')
 
-# Initialize university service with Firebase fallback
-if FIREBASE_AVAILABLE:
-    try:
-        university_service = FirebaseUniversityService()
-        print("✅ Bookmarks using Firebase University Service")
-    except Exception as e:
-        print(f"⚠️ Bookmarks Firebase failed, using JSON fallback: {e}")
-        university_service = UniversityService()
-        print("✅ Bookmarks using JSON University Service")
-else:
-    university_service = UniversityService()
-    print("✅ Bookmarks using JSON University Service (Firebase not available)")
-
 @bookmarks_bp.route('', methods=['GET'])
 @jwt_required()
 def get_user_bookmarks():
@@ -41,13 +22,26 @@ def get_user_bookmarks():
         session = next(get_db_session())
         
         try:
-            # Get user's bookmarks
-            bookmarks = session.query(Bookmark).filter_by(user_id=current_user_id).all()
-            
-            # Get university details for each bookmark
+            if get_university_service().backend.in_database:
+                # Catalog is in the same database: bookmarks and universities in one join
+                rows = session.query(Bookmark, University.data).outerjoin(
+                    University, University.id == Bookmark.university_id
+                ).filter(Bookmark.user_id == current_user_id).all()
+                bookmarks = [bookmark for bookmark, _ in rows]
+                universities = {
+                    bookmark.university_id: json.loads(data) for bookmark, data in rows if data
+                }
+            else:
+                # Get user's bookmarks
+                bookmarks = session.query(Bookmark).filter_by(user_id=current_user_id).all()
+                
+                # Get university details for all bookmarks in one batched lookup
+                universities = get_university_service().get_universities_by_ids(
+                    [bookmark.university_id for bookmark in bookmarks]
+                )
             bookmarked_universities = []
             for bookmark in bookmarks:
-                university = university_service.get_university_by_id(bookmark.university_id)
+                university = universities.get(bookmark.university_id)
                 if university:
                     bookmarked_universities.append({
                         'bookmark_id': bookmark.id,
@@ -96,7 +90,7 @@ def add_bookmark():
         notes = data.get('notes', '')
         
         # Validate university exists
-        university = university_service.get_university_by_id(university_id)
+        university = get_university_service().get_university_by_id(university_id)
         if not university:
             return jsonify({
                 'error': 'University not found',
@@ -11,15 +11,57 @@ from datetime import datetime
 from typing import Dict, List, Optional
 
 from ml.ml_service import get_ml_service
-from models.user_repository import UserRepository
+from models.profile_cache import profile_cache
 from utils.data_validator import validate_user_profile_data
+from utils.write_behind import history_writer
 
 # Create blueprint
 recommendations_bp = Blueprint('recommendations', __name__, url_prefix='/api/recommendations')
 
-# Initialize services
-ml_service = get_ml_service()
-user_repository = UserRepository()
+# Recommendation keys returned by each response profile (dotted paths select nested keys).
+# None keeps every key.
+RESPONSE_PROFILES = {
+    'full': None,
+    'compact': (
+        'university_id', 'university_name', 'country', 'city', 'ranking',
+        'tuition_fee', 'living_cost', 'website',
+        'overall_score', 'admission_probability', 'scores.admission_category',
+        'cost_breakdown.total_annual_cost'
+    )
+}
+
+
+def parse_response_fields(args) -> tuple:
+    """
+    Keys to keep in each recommendation, from ?fields=a,b.c or ?profile=compact.
+    Returns (paths or None for everything, error message or None).
+    """
+    fields = args.get('fields', '').strip()
+    if fields:
+        return tuple(path.strip() for path in fields.split(',') if path.strip()), None
+
+    profile = args.get('profile', 'full').strip().lower()
+    if profile not in RESPONSE_PROFILES:
+        return None, f"profile must be one of: {', '.join(RESPONSE_PROFILES)}"
+    return RESPONSE_PROFILES[profile], None
+
+
+def select_fields(item: Dict, paths: tuple) -> Dict:
+    """Copy of item with only the given (possibly dotted) paths; missing paths are skipped"""
+    selected = {}
+    for path in paths:
+        keys = path.split('.')
+        value = item
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = selected
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = value
+    return selected
 
 
 @recommendations_bp.route('/predict/<int:university_id>', methods=['POST'])
@@ -59,11 +101,11 @@ def predict_admission_probability(university_id: int):
                 }), 400
         else:
             # Use current user's profile from database
-            user = user_repository.get_user_by_id(current_user_id)
-            if not user:
+            profile = profile_cache.get_profile(current_user_id)
+            if not profile:
                 return jsonify({'error': 'User not found'}), 404
             
-            user_profile = user.to_dict()
+            user_profile = profile.to_dict()
             
             # Check if user has sufficient profile data
             required_fields = ['cgpa', 'gre_score']
@@ -76,7 +118,7 @@ def predict_admission_probability(university_id: int):
                 }), 400
         
         # Make prediction
-        prediction = ml_service.predict_admission_probability(user_profile, university_id)
+        prediction = get_ml_service().predict_admission_probability(user_profile, university_id)
         
         if 'error' in prediction:
             return jsonify(prediction), 404
@@ -139,14 +181,14 @@ def predict_batch_admission():
                 }), 400
         else:
             # Use current user's profile from database
-            user = user_repository.get_user_by_id(current_user_id)
-            if not user:
+            profile = profile_cache.get_profile(current_user_id)
+            if not profile:
                 return jsonify({'error': 'User not found'}), 404
             
-            user_profile = user.to_dict()
+            user_profile = profile.to_dict()
         
         # Make batch predictions
-        predictions = ml_service.predict_batch_admission(user_profile, university_ids)
+        predictions = get_ml_service().predict_batch_admission(user_profile, university_ids)
         
         # Separate successful predictions from errors
         successful_predictions = [p for p in predictions if 'error' not in p]
@@ -190,11 +232,20 @@ def generate_recommendations():
             // ... other profile fields
         }
     }
+    
+    Query Parameters:
+    - profile: full (default) or compact
+    - fields: Comma-separated recommendation keys to return, e.g.
+      university_id,overall_score,scores.admission_category (overrides profile)
     """
     try:
         current_user_id = get_jwt_identity()
         data = request.get_json() or {}
         
+        response_fields, fields_error = parse_response_fields(request.args)
+        if fields_error:
+            return jsonify({'error': fields_error}), 400
+        
         # Get parameters
         max_recommendations = data.get('max_recommendations', 10)
         filters = data.get('filters', {})
@@ -218,11 +269,11 @@ def generate_recommendations():
                 }), 400
         elif current_user_id:
             # Use current user's profile from database if authenticated
-            user = user_repository.get_user_by_id(current_user_id)
-            if not user:
+            profile = profile_cache.get_profile(current_user_id)
+            if not profile:
                 return jsonify({'error': 'User not found'}), 404
             
-            user_profile = user.to_dict()
+            user_profile = profile.to_dict()
             
             # Check if user has sufficient profile data
             required_fields = ['cgpa', 'field_of_study']
@@ -247,14 +298,28 @@ def generate_recommendations():
             }
         
         # Generate recommendations
-        result = ml_service.generate_recommendations(user_profile, filters, max_recommendations)
+        result = get_ml_service().generate_recommendations(user_profile, filters, max_recommendations)
         
         if 'error' in result:
             return jsonify(result), 500
         
+        # Log the session and its results without waiting on the database
+        if current_user_id:
+            history_writer.record_recommendations(
+                user_id=int(current_user_id),
+                session_type='full_recommendation',
+                user_profile_snapshot=user_profile,
+                recommendations=result['recommendations'],
+                filters_applied=filters
+            )
+        
+        recommendations = result['recommendations']
+        if response_fields is not None:
+            recommendations = [select_fields(rec, response_fields) for rec in recommendations]
+        
         return jsonify({
             'success': True,
-            'recommendations': result['recommendations'],
+            'recommendations': recommendations,
             'summary': result['summary'],
             'total_universities_considered': result.get('total_universities_considered', 0),
             'filters_applied': filters,
@@ -305,14 +370,14 @@ def explain_recommendation(university_id: int):
                 }), 400
         else:
             # Use current user's profile from database
-            user = user_repository.get_user_by_id(current_user_id)
-            if not user:
+            profile = profile_cache.get_profile(current_user_id)
+            if not profile:
                 return jsonify({'error': 'User not found'}), 404
             
-            user_profile = user.to_dict()
+            user_profile = profile.to_dict()
         
         # Get explanation
-        explanation = ml_service.get_recommendation_explanation(user_profile, university_id)
+        explanation = get_ml_service().get_recommendation_explanation(user_profile, university_id)
         
         if 'error' in explanation:
             return jsonify(explanation), 404
@@ -337,7 +402,7 @@ def get_model_info():
     Get information about the ML models
     """
     try:
-        model_info = ml_service.get_model_info()
+        model_info = get_ml_service().get_model_info()
         
         if 'error' in model_info:
             return jsonify(model_info), 500
@@ -387,13 +452,13 @@ def get_cost_analysis():
         if 'user_profile' in data and data['user_profile']:
             user_profile = data['user_profile']
         else:
-            user = user_repository.get_user_by_id(current_user_id)
-            if not user:
+            profile = profile_cache.get_profile(current_user_id)
+            if not profile:
                 return jsonify({'error': 'User not found'}), 404
-            user_profile = user.to_dict()
+            user_profile = profile.to_dict()
         
         # Generate cost analysis
-        cost_analysis = ml_service.generate_cost_analysis(user_profile, university_ids, analysis_type)
+        cost_analysis = get_ml_service().generate_cost_analysis(user_profile, university_ids, analysis_type)
         
         if 'error' in cost_analysis:
             return jsonify(cost_analysis), 500
@@ -439,13 +504,13 @@ def get_cost_trends(university_id: int):
         if 'user_profile' in data and data['user_profile']:
             user_profile = data['user_profile']
         else:
-            user = user_repository.get_user_by_id(current_user_id)
-            if not user:
+            profile = profile_cache.get_profile(current_user_id)
+            if not profile:
                 return jsonify({'error': 'User not found'}), 404
-            user_profile = user.to_dict()
+            user_profile = profile.to_dict()
         
         # Generate cost trends
-        cost_trends = ml_service.generate_cost_trends(user_profile, university_id, years, inflation_rate)
+        cost_trends = get_ml_service().generate_cost_trends(user_profile, university_id, years, inflation_rate)
         
         if 'error' in cost_trends:
             return jsonify(cost_trends), 404
@@ -472,7 +537,7 @@ def health_check():
     """
     try:
         # Check if ML service is working
-        model_info = ml_service.get_model_info()
+        model_info = get_ml_service().get_model_info()
         
         return jsonify({
             'status': 'healthy',
@@ -1,34 +1,15 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from typing import Dict, Any, List
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from typing import Dict, Any, List, Optional
 import math
 
-# Import services with error handling
-try:
-    from services.firebase_university_service import FirebaseUniversityService
-    FIREBASE_AVAILABLE = True
-except ImportError as e:
-    print(f"Firebase service not available: {e}")
-    FIREBASE_AVAILABLE = False
-
-from services.university_service_simple import UniversityService
+from services.university_service_provider import get_university_service
+from utils.write_behind import history_writer
+from utils.http_cache import cached_by_version
 
 # Create blueprint for university routes
 universities_bp = Blueprint('universities', __name__, url_prefix='/api/universities')
 
-# Initialize university service with Firebase fallback
-if FIREBASE_AVAILABLE:
-    try:
-        university_service = FirebaseUniversityService()
-        print("✅ Using Firebase University Service")
-    except Exception as e:
-        print(f"⚠️ Firebase failed, using JSON fallback: {e}")
-        university_service = UniversityService()
-        print("✅ Using JSON University Service")
-else:
-    university_service = UniversityService()
-    print("✅ Using JSON University Service (Firebase not available)")
-
 def parse_query_params(request_args: Dict[str, Any]) -> Dict[str, Any]:
     """Parse and validate query parameters for university search"""
     filters = {}
@@ -150,16 +131,25 @@ def parse_query_params(request_args: Dict[str, Any]) -> Dict[str, Any]:
     
     return filters
 
-def paginate_results(results: List[Dict[str, Any]], page: int, per_page: int) -> Dict[str, Any]:
-    """Paginate search results"""
-    total = len(results)
-    start = (page - 1) * per_page
-    end = start + per_page
-    
-    paginated_results = results[start:end]
+def get_optional_user_id() -> Optional[int]:
+    """Return the authenticated user ID, or None for anonymous requests"""
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+        return int(identity) if identity else None
+    except Exception:
+        return None
+
+def get_catalog_version() -> Optional[str]:
+    """Catalog version of the active university service, None when it has none"""
+    return get_university_service().catalog_version()
+
+def paginate_results(page_results: List[Dict[str, Any]], total: int, page: int, per_page: int) -> Dict[str, Any]:
+    """Pagination envelope for one page of search results out of `total` matches"""
+    end = page * per_page
     
     return {
-        'universities': paginated_results,
+        'universities': page_results,
         'pagination': {
             'page': page,
             'per_page': per_page,
@@ -215,30 +205,30 @@ def search_universities():
         if per_page < 1:
             per_page = 20
         
-        # Get universities
-        if search_query:
-            # Search by name or city first, then apply filters
-            universities = university_service.search_universities(search_query)
-            if filters:
-                # Apply additional filters to search results
-                filtered_universities = []
-                for university in universities:
-                    if university_service._matches_filters(university, filters):
-                        filtered_universities.append(university)
-                universities = filtered_universities
-        else:
-            # Apply filters only
-            if filters:
-                universities = university_service.filter_universities(filters)
-            else:
-                universities = university_service.load_universities()
-        
-        # Sort results
-        if sort_by in ['ranking', 'tuition_fee', 'acceptance_rate', 'name']:
-            universities = university_service.sort_universities(universities, sort_by, ascending)
-        
-        # Paginate results
-        result = paginate_results(universities, page, per_page)
+        # Get one sorted page of the universities matching the search query and filters;
+        # backends that can run the query themselves (SQL) only return that page
+        page_results, total = get_university_service().query_page(
+            filters=filters,
+            search_query=search_query,
+            sort_by=sort_by if sort_by in ['ranking', 'tuition_fee', 'acceptance_rate', 'name'] else None,
+            ascending=ascending,
+            offset=(page - 1) * per_page,
+            limit=per_page
+        )
+        result = paginate_results(page_results, total, page, per_page)
+        
+        # Catalog records are encoded once per catalog version, not per request
+        result['universities'] = get_university_service().get_snapshot().encode_list(result['universities'])
+        
+        # Record search history off the request path
+        current_user_id = get_optional_user_id()
+        if current_user_id and (search_query or filters):
+            history_writer.record_search(
+                user_id=current_user_id,
+                search_query={'q': search_query, 'filters': filters},
+                search_type='university_search',
+                results_count=result['pagination']['total']
+            )
         
         return jsonify({
             'success': True,
@@ -259,10 +249,11 @@ def search_universities():
         }), 500
 
 @universities_bp.route('/<int:university_id>', methods=['GET'])
+@cached_by_version(get_catalog_version)
 def get_university_details(university_id: int):
     """Get detailed information about a specific university"""
     try:
-        university = university_service.get_university_by_id(university_id)
+        university = get_university_service().get_university_by_id(university_id)
         
         if not university:
             return jsonify({
@@ -283,14 +274,15 @@ def get_university_details(university_id: int):
         }), 500
 
 @universities_bp.route('/countries', methods=['GET'])
+@cached_by_version(get_catalog_version)
 def get_countries():
     """Get list of available countries"""
     try:
-        countries = university_service.load_countries()
+        countries = get_university_service().load_countries()
         
         # If countries.json doesn't exist, extract from universities
         if not countries:
-            universities = university_service.load_universities()
+            universities = get_university_service().load_universities()
             country_set = set()
             for university in universities:
                 if university.get('country'):
@@ -311,14 +303,15 @@ def get_countries():
         }), 500
 
 @universities_bp.route('/fields', methods=['GET'])
+@cached_by_version(get_catalog_version)
 def get_fields():
     """Get list of available fields of study"""
     try:
-        fields = university_service.load_fields()
+        fields = get_university_service().load_fields()
         
         # If fields.json doesn't exist, extract from universities
         if not fields:
-            universities = university_service.load_universities()
+            universities = get_university_service().load_universities()
             field_set = set()
             for university in universities:
                 if university.get('fields'):
@@ -340,10 +333,11 @@ def get_fields():
         }), 500
 
 @universities_bp.route('/statistics', methods=['GET'])
+@cached_by_version(get_catalog_version)
 def get_statistics():
     """Get statistics about the university database"""
     try:
-        stats = university_service.get_statistics()
+        stats = get_university_service().get_statistics()
         
         return jsonify({
             'success': True,
@@ -370,7 +364,7 @@ def get_search_suggestions():
                 'data': []
             }), 200
         
-        universities = university_service.load_universities()
+        universities = get_university_service().load_universities()
         suggestions = []
         
         for university in universities:
@@ -428,19 +422,24 @@ def compare_universities():
                 'code': 'TOO_MANY_UNIVERSITIES'
             }), 400
         
-        # Get universities
+        # Get universities in one batched lookup
         universities = []
         not_found = []
         
+        requested_ids = []
         for uni_id in university_ids:
             try:
-                uni_id = int(uni_id)
-                university = university_service.get_university_by_id(uni_id)
-                if university:
-                    universities.append(university)
-                else:
-                    not_found.append(uni_id)
+                requested_ids.append(int(uni_id))
             except (ValueError, TypeError):
+                requested_ids.append(uni_id)
+        
+        found = get_university_service().get_universities_by_ids(
+            [uni_id for uni_id in requested_ids if isinstance(uni_id, int)]
+        )
+        for uni_id in requested_ids:
+            if isinstance(uni_id, int) and uni_id in found:
+                universities.append(found[uni_id])
+            else:
                 not_found.append(uni_id)
         
         if not_found:
@@ -1,6 +1,8 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import get_db_session, User
+from models.profile_cache import profile_cache
+from utils.gdpr_compliance import EXPORT_FORMATS, stream_user_data_export
 import json
 
 # Create blueprint for user routes
@@ -265,6 +267,7 @@ def update_profile():
                 user.budget_max = float(data['budget_max']) if data['budget_max'] is not None else None
             
             session.commit()
+            profile_cache.invalidate(current_user_id)
             
             return jsonify({
                 'message': 'Profile updated successfully',
@@ -358,6 +361,7 @@ def update_academic_credentials():
                 user.toefl_score = int(data['toefl_score']) if data['toefl_score'] is not None else None
             
             session.commit()
+            profile_cache.invalidate(current_user_id)
             
             return jsonify({
                 'message': 'Academic credentials updated successfully',
@@ -461,6 +465,7 @@ def update_preferences():
                 user.budget_max = float(data['budget_max']) if data['budget_max'] is not None else None
             
             session.commit()
+            profile_cache.invalidate(current_user_id)
             
             return jsonify({
                 'message': 'Preferences updated successfully',
@@ -706,4 +711,38 @@ def download_resume(filename):
             'error': 'Internal server error',
             'code': 'INTERNAL_ERROR',
             'details': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+
+@users_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_data():
+    """Download all data held about the current user as a streamed response"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        export_format = request.args.get('format', 'ndjson')
+        
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({
+                'error': f"Format must be one of: {', '.join(EXPORT_FORMATS)}",
+                'code': 'INVALID_FORMAT'
+            }), 400
+        
+        stream = stream_user_data_export(current_user_id, export_format)
+        if stream is None:
+            return jsonify({
+                'error': 'User not found',
+                'code': 'USER_NOT_FOUND'
+            }), 404
+        
+        extension = 'ndjson' if export_format == 'ndjson' else 'json'
+        return Response(stream, mimetype=EXPORT_FORMATS[export_format], headers={
+            'Content-Disposition': f'attachment; filename="user_{current_user_id}_export.{extension}"'
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'error': 'Internal server error',
+            'code': 'INTERNAL_ERROR',
+            'details': str(e)
+        }), 500
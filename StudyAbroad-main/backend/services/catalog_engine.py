@@ -0,0 +1,419 @@
+"""
+Catalog engine
+
+One implementation of the university catalog API (lookups, filtering,
+search, sorting and statistics) on top of a pluggable storage backend.
+
+Backends only know how to produce a CatalogSnapshot of their data and,
+optionally, how to narrow a query on their side. What a filter means is
+decided once, here: plan_query() turns the filters of a request into
+predicates, and each predicate can test a single record or a whole snapshot
+at once through its numpy columns. Every backend therefore answers the same
+query with the same universities.
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from services.catalog_snapshot import CatalogSnapshot, searchable_text
+
+# Country code to name mapping, so filters accept either form
+COUNTRY_CODES = {
+    'US': 'United States', 'UK': 'United Kingdom', 'CA': 'Canada',
+    'AU': 'Australia', 'DE': 'Germany', 'FR': 'France', 'NL': 'Netherlands',
+    'SE': 'Sweden', 'NO': 'Norway', 'DK': 'Denmark', 'FI': 'Finland',
+    'CH': 'Switzerland', 'AT': 'Austria', 'BE': 'Belgium', 'IE': 'Ireland',
+    'ES': 'Spain', 'IT': 'Italy', 'PT': 'Portugal', 'PL': 'Poland',
+    'CZ': 'Czech Republic', 'HU': 'Hungary', 'GR': 'Greece', 'RO': 'Romania',
+    'BG': 'Bulgaria', 'CN': 'China', 'JP': 'Japan', 'KR': 'South Korea',
+    'IN': 'India', 'SG': 'Singapore', 'HK': 'Hong Kong', 'TW': 'Taiwan',
+    'MY': 'Malaysia', 'TH': 'Thailand', 'ID': 'Indonesia', 'PH': 'Philippines',
+    'VN': 'Vietnam', 'NZ': 'New Zealand', 'ZA': 'South Africa',
+    'BR': 'Brazil', 'AR': 'Argentina', 'CL': 'Chile', 'MX': 'Mexico',
+    'CO': 'Colombia', 'PE': 'Peru', 'CR': 'Costa Rica',
+    'AE': 'United Arab Emirates', 'SA': 'Saudi Arabia', 'IL': 'Israel',
+    'TR': 'Turkey', 'EG': 'Egypt', 'JO': 'Jordan', 'LB': 'Lebanon',
+    'QA': 'Qatar', 'RU': 'Russia', 'IS': 'Iceland', 'LU': 'Luxembourg',
+    'MT': 'Malta', 'CY': 'Cyprus'
+}
+COUNTRY_NAMES = {name: code for code, name in COUNTRY_CODES.items()}
+
+# Range filters: filter -> (university field, operator a university must satisfy,
+# value assumed when the university has no number for the field, filter value type).
+# Requirement filters (cgpa, gre, ielts, toefl) keep universities whose minimum
+# requirement is at most the given score, for both their min_ and max_ forms.
+RANGE_FILTERS = {
+    'min_tuition': ('tuition_fee', '>=', 0, float),
+    'max_tuition': ('tuition_fee', '<=', math.inf, float),
+    'min_cgpa': ('min_cgpa', '<=', 0, float),
+    'max_cgpa': ('min_cgpa', '<=', 0, float),
+    'min_gre': ('min_gre', '<=', 0, int),
+    'max_gre': ('min_gre', '<=', 0, int),
+    'min_ielts': ('min_ielts', '<=', 0, float),
+    'max_ielts': ('min_ielts', '<=', 0, float),
+    'min_toefl': ('min_toefl', '<=', 0, int),
+    'max_toefl': ('min_toefl', '<=', 0, int),
+    'min_ranking': ('ranking', '>=', math.inf, int),
+    'max_ranking': ('ranking', '<=', 0, int),
+    'min_acceptance_rate': ('acceptance_rate', '>=', 0, float),
+    'max_acceptance_rate': ('acceptance_rate', '<=', 1.0, float)
+}
+
+SORT_FIELDS = ('ranking', 'tuition_fee', 'acceptance_rate', 'name')
+
+
+def _as_list(value) -> List[Any]:
+    return [value] if isinstance(value, str) else list(value or [])
+
+
+# Predicates
+
+class Predicate:
+    """One condition of a query; mask() must agree with matches() on every record"""
+
+    __slots__ = ()
+
+    def matches(self, university: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+
+    def mask(self, snapshot: CatalogSnapshot) -> np.ndarray:
+        return np.fromiter((self.matches(u) for u in snapshot.universities), dtype=bool,
+                           count=len(snapshot.universities))
+
+
+class RangePredicate(Predicate):
+    """Numeric bound on a field, with a fixed value standing in for missing numbers"""
+
+    __slots__ = ('field', 'operator', 'value', 'missing')
+
+    def __init__(self, field: str, operator: str, value: float, missing: float):
+        self.field = field
+        self.operator = operator
+        self.value = value
+        self.missing = missing
+
+    def accepts_missing(self) -> bool:
+        """Whether a university without this field passes"""
+        return self._compare(self.missing)
+
+    def _compare(self, number) -> bool:
+        return number >= self.value if self.operator == '>=' else number <= self.value
+
+    def matches(self, university: Dict[str, Any]) -> bool:
+        number = university.get(self.field)
+        if not isinstance(number, (int, float)) or number != number:
+            number = self.missing
+        return self._compare(number)
+
+    def mask(self, snapshot: CatalogSnapshot) -> np.ndarray:
+        column = snapshot.columns.get(self.field)
+        if column is None:
+            return super().mask(snapshot)
+        numbers = np.where(np.isnan(column), self.missing, column)
+        return numbers >= self.value if self.operator == '>=' else numbers <= self.value
+
+
+class CountryPredicate(Predicate):
+    """Country in a list, matching codes and full names interchangeably"""
+
+    __slots__ = ('countries',)
+
+    def __init__(self, countries: Iterable[str]):
+        allowed = set()
+        for country in countries:
+            allowed.add(country)
+            if country in COUNTRY_CODES:
+                allowed.add(COUNTRY_CODES[country])
+            if country in COUNTRY_NAMES:
+                allowed.add(COUNTRY_NAMES[country])
+        self.countries = frozenset(allowed)
+
+    def matches(self, university: Dict[str, Any]) -> bool:
+        return university.get('country', '') in self.countries
+
+
+class FieldPredicate(Predicate):
+    """Offers at least one of the fields of study"""
+
+    __slots__ = ('fields',)
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields = tuple(fields)
+
+    def matches(self, university: Dict[str, Any]) -> bool:
+        university_fields = university.get('fields') or []
+        return any(field in university_fields for field in self.fields)
+
+
+class TypePredicate(Predicate):
+    """University type (Public/Private), case-insensitive"""
+
+    __slots__ = ('university_type',)
+
+    def __init__(self, university_type: str):
+        self.university_type = university_type.strip().lower()
+
+    def matches(self, university: Dict[str, Any]) -> bool:
+        return (university.get('type') or '').strip().lower() == self.university_type
+
+
+class SearchPredicate(Predicate):
+    """Name, city, country or fields contain the query"""
+
+    __slots__ = ('query',)
+
+    def __init__(self, query: str):
+        self.query = query
+
+    def matches(self, university: Dict[str, Any]) -> bool:
+        return self.query.lower() in searchable_text(university)
+
+    def mask(self, snapshot: CatalogSnapshot) -> np.ndarray:
+        mask = np.zeros(len(snapshot.universities), dtype=bool)
+        mask[snapshot.search_positions(self.query)] = True
+        return mask
+
+
+# Planning and evaluation
+
+class QueryPlan:
+    """Predicates of a query, cheapest first"""
+
+    __slots__ = ('predicates',)
+
+    def __init__(self, predicates: List[Predicate]):
+        self.predicates = predicates
+
+    def of_type(self, predicate_type) -> List[Predicate]:
+        return [p for p in self.predicates if isinstance(p, predicate_type)]
+
+    def matches(self, university: Dict[str, Any]) -> bool:
+        return all(predicate.matches(university) for predicate in self.predicates)
+
+
+def plan_query(filters: Optional[Dict[str, Any]] = None, search_query: Optional[str] = None) -> QueryPlan:
+    """
+    Turn request filters into predicates. Country and field filters apply
+    whenever present; range and type filters only when their value is set.
+    """
+    filters = filters or {}
+    predicates = []
+
+    for filter_name, (field, operator, missing, cast) in RANGE_FILTERS.items():
+        if filters.get(filter_name):
+            predicates.append(RangePredicate(field, operator, cast(filters[filter_name]), missing))
+
+    if 'country' in filters:
+        predicates.append(CountryPredicate(_as_list(filters['country'])))
+    if 'field' in filters:
+        predicates.append(FieldPredicate(_as_list(filters['field'])))
+    if filters.get('type'):
+        predicates.append(TypePredicate(filters['type']))
+    if search_query:
+        predicates.append(SearchPredicate(search_query))
+
+    return QueryPlan(predicates)
+
+
+def evaluate(plan: QueryPlan, snapshot: CatalogSnapshot) -> List[Dict[str, Any]]:
+    """Universities of a snapshot matching a plan, in catalog order"""
+    if not plan.predicates:
+        return list(snapshot.universities)
+
+    mask = np.ones(len(snapshot.universities), dtype=bool)
+    for predicate in plan.predicates:
+        mask &= predicate.mask(snapshot)
+        if not mask.any():
+            return []
+    return [snapshot.universities[p] for p in np.flatnonzero(mask)]
+
+
+# Storage
+
+class CatalogBackend:
+    """
+    Storage behind a CatalogEngine. A backend must provide snapshot(); the
+    other methods have defaults built on it.
+    """
+
+    # Whether the universities are rows in the application database, so they can be joined
+    in_database = False
+
+    def snapshot(self) -> CatalogSnapshot:
+        """Current universities as a snapshot"""
+        raise NotImplementedError
+
+    def version(self) -> Optional[str]:
+        """Changes whenever anything the catalog returns changes; None disables HTTP caching"""
+        return self.snapshot().version
+
+    def load_countries(self) -> List[Dict[str, Any]]:
+        return []
+
+    def load_fields(self) -> Optional[List[Dict[str, Any]]]:
+        """Fields of study, or None to derive them from the universities"""
+        return None
+
+    def get_many(self, university_ids: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        snapshot = self.snapshot()
+        universities = {}
+        for university_id in university_ids:
+            university = snapshot.get(university_id)
+            if university is not None:
+                universities[university_id] = university
+        return universities
+
+    def candidates(self, plan: QueryPlan) -> Optional[List[Dict[str, Any]]]:
+        """
+        Universities that may match the plan, narrowed on the backend's side,
+        or None to evaluate the plan against the whole snapshot
+        """
+        return None
+
+    def page(self, plan: QueryPlan, sort_by: Optional[str], ascending: bool,
+             offset: int, limit: int) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """
+        One sorted page of the universities matching the plan and their total
+        count, or None when the backend can't answer the plan on its own
+        """
+        return None
+
+
+class CatalogEngine:
+    """University catalog API shared by every storage backend"""
+
+    def __init__(self, backend: CatalogBackend):
+        self.backend = backend
+
+    def get_snapshot(self) -> CatalogSnapshot:
+        """Shared immutable snapshot; its dictionaries must not be modified"""
+        return self.backend.snapshot()
+
+    def catalog_version(self) -> Optional[str]:
+        return self.backend.version()
+
+    def load_universities(self) -> List[Dict[str, Any]]:
+        return list(self.get_snapshot().universities)
+
+    def load_countries(self) -> List[Dict[str, Any]]:
+        return self.backend.load_countries()
+
+    def load_fields(self) -> List[Dict[str, Any]]:
+        fields = self.backend.load_fields()
+        if fields is not None:
+            return fields
+
+        all_fields = set()
+        for university in self.get_snapshot().universities:
+            all_fields.update(university.get('fields') or [])
+        return [{'id': i, 'name': name} for i, name in enumerate(sorted(all_fields), 1)]
+
+    def get_university_by_id(self, university_id: Any) -> Optional[Dict[str, Any]]:
+        return self.backend.get_many([university_id]).get(university_id)
+
+    def get_universities_by_ids(self, university_ids: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        """Universities keyed by ID, unknown IDs left out"""
+        return self.backend.get_many(university_ids)
+
+    def query(self, filters: Optional[Dict[str, Any]] = None,
+              search_query: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Universities matching a search query and filters"""
+        plan = plan_query(filters, search_query)
+        candidates = self.backend.candidates(plan)
+        if candidates is not None:
+            return [university for university in candidates if plan.matches(university)]
+        return evaluate(plan, self.get_snapshot())
+
+    def query_page(self, filters: Optional[Dict[str, Any]] = None,
+                   search_query: Optional[str] = None,
+                   sort_by: Optional[str] = 'ranking', ascending: bool = True,
+                   offset: int = 0, limit: int = 20) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        One page of the universities matching a search query and filters,
+        sorted when sort_by is one of SORT_FIELDS, plus the total match count
+        """
+        plan = plan_query(filters, search_query)
+        result = self.backend.page(plan, sort_by, ascending, offset, limit)
+        if result is not None:
+            return result
+
+        candidates = self.backend.candidates(plan)
+        if candidates is not None:
+            universities = [university for university in candidates if plan.matches(university)]
+        else:
+            universities = evaluate(plan, self.get_snapshot())
+        if sort_by in SORT_FIELDS:
+            universities = self.sort_universities(universities, sort_by, ascending)
+        return universities[offset:offset + limit], len(universities)
+
+    def filter_universities(self, filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return self.query(filters=filters)
+
+    def search_universities(self, query: str) -> List[Dict[str, Any]]:
+        return self.query(search_query=query)
+
+    def sort_universities(self, universities: List[Dict[str, Any]],
+                          sort_by: str = 'ranking',
+                          ascending: bool = True) -> List[Dict[str, Any]]:
+        """Sort by a field; universities without it go last"""
+        def get_sort_key(university):
+            value = university.get(sort_by)
+            if value is None:
+                return float('inf') if ascending else float('-inf')
+            return value
+
+        return sorted(universities, key=get_sort_key, reverse=not ascending)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        snapshot = self.get_snapshot()
+        universities = snapshot.universities
+        countries = self.load_countries()
+        fields = self.load_fields()
+
+        if not universities:
+            return {
+                'total_universities': 0,
+                'countries_count': len(countries),
+                'fields_count': len(fields)
+            }
+
+        # Numeric statistics from the columns, skipping missing values
+        tuition_fees = snapshot.columns['tuition_fee']
+        tuition_fees = tuition_fees[~np.isnan(tuition_fees)]
+        acceptance_rates = snapshot.columns['acceptance_rate']
+        acceptance_rates = acceptance_rates[~np.isnan(acceptance_rates)]
+
+        country_counts = {}
+        type_counts = {'Public': 0, 'Private': 0}
+        field_counts = {}
+
+        for record in snapshot.records:
+            if record.country:
+                country_counts[record.country] = country_counts.get(record.country, 0) + 1
+
+            if record.type in type_counts:
+                type_counts[record.type] += 1
+
+            for field in record.fields:
+                field_counts[field] = field_counts.get(field, 0) + 1
+
+        return {
+            'total_universities': len(universities),
+            'countries_count': len(countries),
+            'fields_count': len(fields),
+            'universities_by_country': country_counts,
+            'universities_by_type': type_counts,
+            'universities_by_field': field_counts,
+            'tuition_stats': {
+                'min': float(tuition_fees.min()) if tuition_fees.size else 0,
+                'max': float(tuition_fees.max()) if tuition_fees.size else 0,
+                'avg': float(tuition_fees.mean()) if tuition_fees.size else 0
+            },
+            'acceptance_rate_stats': {
+                'min': float(acceptance_rates.min()) if acceptance_rates.size else 0,
+                'max': float(acceptance_rates.max()) if acceptance_rates.size else 0,
+                'avg': float(acceptance_rates.mean()) if acceptance_rates.size else 0
+            }
+        }
@@ -0,0 +1,282 @@
+"""
+Canonical schema of a university catalog record
+
+The catalog has grown several spellings of the same values: tuitionFee and
+tuition_fee, acceptanceRate as a percentage and acceptance_rate as a
+fraction, programs next to fields. normalize_university() converts one raw
+record into a UniversityRecord with canonical names and units, and reports
+what it had to fix or drop as CatalogAnomaly entries. CatalogSnapshot runs
+it for every record when a catalog is loaded, so the rest of the code reads
+one field set.
+
+Units:
+    tuition_fee, living_cost   per year, as stored in the catalog
+    acceptance_rate            fraction between 0 and 1
+    min_cgpa                   4.0 scale
+"""
+
+import json
+import sys
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class UniversityRecord(NamedTuple):
+    """Typed, normalized university record"""
+    id: Any
+    name: str
+    country: str
+    city: str = ''
+    type: Optional[str] = None
+    ranking: Optional[float] = None
+    tuition_fee: Optional[float] = None
+    living_cost: Optional[float] = None
+    acceptance_rate: Optional[float] = None
+    international_students: Optional[float] = None
+    min_cgpa: Optional[float] = None
+    min_gre: Optional[float] = None
+    min_ielts: Optional[float] = None
+    min_toefl: Optional[float] = None
+    fields: Tuple[str, ...] = ()
+    programs: Tuple[str, ...] = ()
+    website: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Canonical keys with a value, lists instead of tuples"""
+        canonical = {}
+        for key, value in zip(self._fields, self):
+            if isinstance(value, tuple):
+                if value:
+                    canonical[key] = list(value)
+            elif value is not None:
+                canonical[key] = value
+        return canonical
+
+
+class CatalogAnomaly(NamedTuple):
+    """Something normalization fixed or dropped; rejected means the whole record was dropped"""
+    university_id: Any
+    field: str
+    message: str
+    rejected: bool = False
+
+    def __str__(self) -> str:
+        action = 'rejected' if self.rejected else 'fixed'
+        return f"university {self.university_id!r} {self.field}: {self.message} ({action})"
+
+
+# Canonical numeric field -> older spellings still found in the catalog and in Firestore
+NUMERIC_ALIASES = {
+    'ranking': (),
+    'tuition_fee': ('tuitionFee',),
+    'living_cost': ('livingCost',),
+    'acceptance_rate': ('acceptanceRate',),
+    'international_students': ('internationalStudents',),
+    'min_cgpa': (),
+    'min_gre': (),
+    'min_ielts': (),
+    'min_toefl': (),
+}
+
+# Older spellings that hold a percentage where the canonical field is a fraction
+PERCENT_ALIASES = {'acceptanceRate'}
+
+# Plausible ranges; values outside them are dropped and reported
+VALID_RANGES = {
+    'ranking': (1, 10000),
+    'tuition_fee': (0, 500000),
+    'living_cost': (0, 200000),
+    'acceptance_rate': (0, 1),
+    'international_students': (0, 1000000),
+    'min_cgpa': (0, 4),
+    'min_gre': (260, 340),
+    'min_ielts': (0, 9),
+    'min_toefl': (0, 120),
+}
+
+
+def _to_number(value) -> Optional[float]:
+    """Number for an int, float or numeric string such as "45,000", else None"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value if value == value else None
+    if isinstance(value, str):
+        text = value.strip().replace(',', '').lstrip('$').rstrip('%')
+        try:
+            number = float(text)
+        except ValueError:
+            return None
+        return int(number) if number.is_integer() else number
+    return None
+
+
+def _number_field(university: Dict[str, Any], field: str,
+                  anomalies: List[CatalogAnomaly], university_id) -> Optional[float]:
+    """Canonical value of a numeric field, looking at its older spellings too"""
+    values = []
+    for key in (field,) + NUMERIC_ALIASES[field]:
+        raw = university.get(key)
+        if raw is None or raw == '':
+            continue
+        number = _to_number(raw)
+        if number is None:
+            anomalies.append(CatalogAnomaly(university_id, key, f"not a number: {raw!r}"))
+            continue
+        if not isinstance(raw, (int, float)):
+            anomalies.append(CatalogAnomaly(university_id, key, f"numeric string {raw!r} converted"))
+        if key in PERCENT_ALIASES:
+            number = number / 100
+        elif field == 'acceptance_rate' and 1 < number <= 100:
+            anomalies.append(CatalogAnomaly(university_id, key, f"percentage {number} converted to a fraction"))
+            number = number / 100
+        values.append((key, number))
+
+    if not values:
+        return None
+
+    key, number = values[0]
+    for other_key, other in values[1:]:
+        if other != number:
+            anomalies.append(CatalogAnomaly(
+                university_id, other_key, f"{other} disagrees with {key}={number}, using {key}"
+            ))
+
+    low, high = VALID_RANGES[field]
+    if not low <= number <= high:
+        anomalies.append(CatalogAnomaly(university_id, field, f"{number} outside {low}-{high}, dropped"))
+        return None
+    return number
+
+
+def _names(values, university_id, field: str, anomalies: List[CatalogAnomaly]) -> Tuple[str, ...]:
+    """Stripped, de-duplicated names from a list of strings or {'name': ...} objects"""
+    if values is None:
+        return ()
+    if not isinstance(values, (list, tuple)):
+        anomalies.append(CatalogAnomaly(university_id, field, f"expected a list, got {type(values).__name__}"))
+        return ()
+
+    names = []
+    for value in values:
+        name = value.get('name') if isinstance(value, dict) else value
+        if isinstance(name, str) and name.strip():
+            names.append(name.strip())
+        else:
+            anomalies.append(CatalogAnomaly(university_id, field, f"unusable entry {value!r} dropped"))
+    return tuple(dict.fromkeys(names))
+
+
+def _text(value) -> Optional[str]:
+    return value.strip() if isinstance(value, str) and value.strip() else None
+
+
+def normalize_university(university: Dict[str, Any]) -> Tuple[Optional[UniversityRecord], List[CatalogAnomaly]]:
+    """
+    Normalize one raw catalog record
+
+    Args:
+        university: Record as stored in universities.json, Firestore or the SQL catalog
+
+    Returns:
+        (record, anomalies); record is None when the university has no usable
+        ID or name and has to be left out of the catalog
+    """
+    anomalies = []
+    university_id = university.get('id')
+    if isinstance(university_id, str) and university_id.strip().isdigit():
+        university_id = int(university_id)
+    if isinstance(university_id, bool) or not isinstance(university_id, (int, str)) or university_id == '':
+        return None, [CatalogAnomaly(university.get('id'), 'id', "missing or not an integer/string", True)]
+
+    name = _text(university.get('name'))
+    if name is None:
+        return None, [CatalogAnomaly(university_id, 'name', "missing", True)]
+
+    programs = _names(university.get('programs'), university_id, 'programs', anomalies)
+    # Older records list fields of study under programs
+    fields = _names(university.get('fields'), university_id, 'fields', anomalies) or programs
+
+    record = UniversityRecord(
+        id=university_id,
+        name=name,
+        country=_text(university.get('country')) or '',
+        city=_text(university.get('city')) or '',
+        type=_text(university.get('type')),
+        fields=fields,
+        programs=programs,
+        website=_text(university.get('website')),
+        **{field: _number_field(university, field, anomalies, university_id) for field in NUMERIC_ALIASES}
+    )
+    return record, anomalies
+
+
+def canonical_university(university: Dict[str, Any],
+                         record: Optional[UniversityRecord] = None) -> Optional[Dict[str, Any]]:
+    """
+    Record dictionary with the canonical fields set, None when it is rejected.
+
+    Other keys are kept as they are, including the older spellings, so existing
+    API clients keep working while new code reads the canonical names.
+    """
+    if record is None:
+        record, _ = normalize_university(university)
+        if record is None:
+            return None
+    canonical = dict(university)
+    canonical.update(record.to_dict())
+    # Values normalization dropped must not reach clients under the canonical name
+    for key, value in zip(record._fields, record):
+        if value is None:
+            canonical.pop(key, None)
+        elif isinstance(value, tuple) and key in university:
+            canonical[key] = list(value)
+    return canonical
+
+
+def normalize_catalog(universities: Iterable[Dict[str, Any]]
+                      ) -> Tuple[List[UniversityRecord], List[Dict[str, Any]], List[CatalogAnomaly]]:
+    """
+    Normalize a whole catalog, dropping rejected records and repeated IDs
+
+    Returns:
+        (records, dictionaries, anomalies) with records and dictionaries aligned
+    """
+    records, dictionaries, anomalies = [], [], []
+    seen_ids = set()
+    for university in universities:
+        if not isinstance(university, dict):
+            anomalies.append(CatalogAnomaly(None, 'record', f"not an object: {university!r:.60}", True))
+            continue
+        record, record_anomalies = normalize_university(university)
+        anomalies.extend(record_anomalies)
+        if record is None:
+            continue
+        if record.id in seen_ids:
+            anomalies.append(CatalogAnomaly(record.id, 'id', "duplicate ID, keeping the first record", True))
+            continue
+        seen_ids.add(record.id)
+        records.append(record)
+        dictionaries.append(canonical_university(university, record))
+    return records, dictionaries, anomalies
+
+
+def report_anomalies(anomalies: List[CatalogAnomaly], source: str = 'catalog', limit: int = 5) -> None:
+    """Print a short summary of normalization anomalies"""
+    if not anomalies:
+        return
+    rejected = sum(1 for anomaly in anomalies if anomaly.rejected)
+    print(f"⚠️ {source}: {len(anomalies)} normalization anomalies, {rejected} records rejected")
+    for anomaly in anomalies[:limit]:
+        print(f"   - {anomaly}")
+    if len(anomalies) > limit:
+        print(f"   ... and {len(anomalies) - limit} more")
+
+
+if __name__ == '__main__':
+    from services.catalog_snapshot import DEFAULT_CATALOG_PATH
+
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CATALOG_PATH
+    with open(path, 'r', encoding='utf-8') as file:
+        records, _, anomalies = normalize_catalog(json.load(file))
+    print(f"{len(records)} universities normalized from {path}")
+    report_anomalies(anomalies, source=path, limit=len(anomalies))
@@ -0,0 +1,306 @@
+"""
+Immutable in-memory snapshot of the university catalog
+
+The catalog file is parsed once into tuples, read-only numpy columns and a
+token index, and shared by the university service and the ML service. Every
+record is normalized on load (see services/catalog_schema.py): `records`
+holds the typed UniversityRecord of each university and `universities` the
+matching dictionaries with the canonical fields set. When
+it is built before a pre-forking server forks (see utils/prefork.py), all
+workers share these pages copy-on-write instead of loading their own copy.
+"""
+
+import os
+import re
+import json
+import bisect
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from services.catalog_schema import (
+    UniversityRecord, canonical_university, normalize_catalog, normalize_university, report_anomalies
+)
+from utils.data_validator import report_validation, validate_catalog
+from utils.json_provider import EncodedList, encode_json
+
+DEFAULT_CATALOG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'universities.json'
+)
+
+# Numeric fields kept as float64 columns (NaN where missing), aligned with `universities`
+NUMERIC_COLUMNS = (
+    'id', 'ranking', 'tuition_fee', 'acceptance_rate',
+    'min_cgpa', 'min_gre', 'min_ielts', 'min_toefl'
+)
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def manifest_path(path: str) -> str:
+    """Version manifest written next to a catalog by services/catalog_writer.py"""
+    return os.path.splitext(path)[0] + '.version.json'
+
+
+def read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    """Version manifest of a catalog file, None when there is none"""
+    try:
+        with open(manifest_path(path), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def searchable_text(university: Dict[str, Any]) -> str:
+    """Same text the service has always matched search queries against"""
+    return ' '.join([
+        university.get('name', ''),
+        university.get('city', ''),
+        university.get('country', ''),
+        ' '.join(university.get('fields', []))
+    ]).lower()
+
+
+def _column(records: Iterable[UniversityRecord], key: str) -> np.ndarray:
+    values = []
+    for record in records:
+        value = getattr(record, key)
+        values.append(float(value) if isinstance(value, (int, float)) else np.nan)
+    column = np.array(values, dtype=np.float64)
+    column.flags.writeable = False
+    return column
+
+
+class CatalogSnapshot:
+    """
+    Read-only view of the catalog. The university dictionaries are shared
+    between callers and must not be modified.
+    """
+
+    __slots__ = ('path', 'mtime', 'version', 'universities', 'records', 'anomalies', 'by_id',
+                 'search_text', 'search_index', 'columns', '_encoded')
+
+    def __init__(self, universities: Iterable[Dict[str, Any]], path: Optional[str] = None,
+                 mtime: Optional[int] = None, version: Optional[str] = None):
+        self.path = path
+        self.mtime = mtime
+        # Catalog version for cache validation; None when unknown
+        self.version = version if version is not None else (f"{mtime:x}" if mtime is not None else None)
+        records, universities, anomalies = normalize_catalog(universities)
+        self.universities = tuple(universities)
+        self.records = tuple(records)
+        # What normalization fixed or rejected, reported once per snapshot
+        self.anomalies = tuple(anomalies)
+        report_anomalies(anomalies, source=f"Catalog {path or version or ''}".rstrip())
+        self.by_id = MappingProxyType({
+            record.id: position for position, record in enumerate(self.records)
+        })
+        self.search_text = tuple(searchable_text(university) for university in self.universities)
+
+        postings = {}
+        for position, text in enumerate(self.search_text):
+            for token in set(_TOKEN_RE.findall(text)):
+                postings.setdefault(token, []).append(position)
+        self.search_index = MappingProxyType({token: tuple(positions) for token, positions in postings.items()})
+
+        self.columns = MappingProxyType({key: _column(self.records, key) for key in NUMERIC_COLUMNS})
+        self._encoded = None
+
+    @classmethod
+    def from_file(cls, path: str, previous: Optional['CatalogSnapshot'] = None) -> 'CatalogSnapshot':
+        """
+        Parse a catalog JSON file. When the catalog writer's manifest says the
+        file is `previous` with some records updated in place, only those
+        records are rebuilt.
+
+        The file is validated first and problems are reported. Files written
+        through the catalog writer were validated already; for others the
+        snapshot is built anyway, without the records normalization rejects.
+        """
+        with open(path, 'r', encoding='utf-8') as file:
+            # mtime of the open file, so it always belongs to the content read
+            mtime = os.fstat(file.fileno()).st_mtime_ns
+            universities = json.load(file)
+        report_validation(validate_catalog(universities), source=f"Catalog {path}")
+
+        if previous is not None:
+            manifest = read_manifest(path)
+            if (manifest and manifest.get('mtime') == mtime and manifest.get('base_mtime') == previous.mtime
+                    and not manifest.get('added') and not manifest.get('removed')):
+                snapshot = cls.patched(previous, universities, manifest.get('updated') or [], path, mtime)
+                if snapshot is not None:
+                    return snapshot
+        return cls(universities, path, mtime)
+
+    @classmethod
+    def patched(cls, previous: 'CatalogSnapshot', universities: List[Dict[str, Any]],
+                updated_ids: Iterable[Any], path: Optional[str] = None,
+                mtime: Optional[int] = None) -> Optional['CatalogSnapshot']:
+        """
+        Snapshot of `universities`, which must be the records of `previous` in
+        the same order with only `updated_ids` changed. Unchanged records keep
+        their normalized form, search text and encoding; the columns, token
+        postings and encodings are updated at the changed positions only.
+
+        Returns None when the records don't line up with `previous` or an
+        update is rejected, and the caller builds a full snapshot instead.
+        """
+        if len(universities) != len(previous.universities):
+            return None
+        positions = sorted({previous.by_id[i] for i in updated_ids if i in previous.by_id})
+        changed = set(positions)
+        for position, university in enumerate(universities):
+            if position not in changed and (
+                    not isinstance(university, dict) or university.get('id') != previous.records[position].id):
+                return None
+
+        records = list(previous.records)
+        dictionaries = list(previous.universities)
+        search_text = list(previous.search_text)
+        anomalies = [a for a in previous.anomalies if a.university_id not in previous.by_id
+                     or previous.by_id[a.university_id] not in changed]
+        new_anomalies = []
+        for position in positions:
+            record, record_anomalies = normalize_university(universities[position])
+            if record is None or record.id != previous.records[position].id:
+                return None
+            new_anomalies.extend(record_anomalies)
+            records[position] = record
+            dictionaries[position] = canonical_university(universities[position], record)
+            search_text[position] = searchable_text(dictionaries[position])
+        report_anomalies(new_anomalies, source=f"Catalog {path or ''}".rstrip())
+
+        snapshot = cls.__new__(cls)
+        snapshot.path = path
+        snapshot.mtime = mtime
+        snapshot.version = f"{mtime:x}" if mtime is not None else None
+        snapshot.universities = tuple(dictionaries)
+        snapshot.records = tuple(records)
+        snapshot.anomalies = tuple(anomalies + new_anomalies)
+        snapshot.by_id = previous.by_id
+        snapshot.search_text = tuple(search_text)
+
+        # Move changed positions between token postings
+        postings = dict(previous.search_index)
+        for position in positions:
+            old_tokens = set(_TOKEN_RE.findall(previous.search_text[position]))
+            new_tokens = set(_TOKEN_RE.findall(search_text[position]))
+            for token in old_tokens - new_tokens:
+                remaining = tuple(p for p in postings[token] if p != position)
+                if remaining:
+                    postings[token] = remaining
+                else:
+                    del postings[token]
+            for token in new_tokens - old_tokens:
+                token_positions = list(postings.get(token, ()))
+                bisect.insort(token_positions, position)
+                postings[token] = tuple(token_positions)
+        snapshot.search_index = MappingProxyType(postings)
+
+        columns = {}
+        for key, previous_column in previous.columns.items():
+            column = previous_column.copy()
+            for position in positions:
+                value = getattr(records[position], key)
+                column[position] = float(value) if isinstance(value, (int, float)) else np.nan
+            column.flags.writeable = False
+            columns[key] = column
+        snapshot.columns = MappingProxyType(columns)
+
+        snapshot._encoded = None
+        if previous._encoded is not None:
+            encoded = list(previous._encoded)
+            for position in positions:
+                encoded[position] = encode_json(dictionaries[position])
+            snapshot._encoded = tuple(encoded)
+        return snapshot
+
+    def __len__(self) -> int:
+        return len(self.universities)
+
+    def get(self, university_id: Any) -> Optional[Dict[str, Any]]:
+        """University by ID, or None"""
+        position = self.by_id.get(university_id)
+        return self.universities[position] if position is not None else None
+
+    def record(self, university_id: Any) -> Optional[UniversityRecord]:
+        """Typed record of a university by ID, or None"""
+        position = self.by_id.get(university_id)
+        return self.records[position] if position is not None else None
+
+    def search(self, query: str) -> List[Dict[str, Any]]:
+        """Universities whose name, city, country or fields contain the query"""
+        return [self.universities[p] for p in self.search_positions(query)]
+
+    def search_positions(self, query: str) -> List[int]:
+        """
+        Positions of the universities matching a search query, in catalog order.
+
+        Every alphanumeric run of a matching query is a substring of some
+        indexed token, so the index only narrows the candidates and the
+        original substring test decides.
+        """
+        query_lower = query.lower()
+        tokens = set(_TOKEN_RE.findall(query_lower))
+
+        if tokens:
+            candidates = None
+            for token in tokens:
+                matched = set()
+                for indexed_token, positions in self.search_index.items():
+                    if token in indexed_token:
+                        matched.update(positions)
+                candidates = matched if candidates is None else candidates & matched
+                if not candidates:
+                    return []
+            positions = sorted(candidates)
+        else:
+            positions = range(len(self.universities))
+
+        return [p for p in positions if query_lower in self.search_text[p]]
+
+    def encoded_records(self) -> tuple:
+        """JSON bytes of every university, encoded on first use and kept for this snapshot"""
+        if self._encoded is None:
+            self._encoded = tuple(encode_json(university) for university in self.universities)
+        return self._encoded
+
+    def encode_list(self, records: Iterable[Dict[str, Any]]) -> EncodedList:
+        """
+        Wrap records for a JSON response, reusing the cached encoding of
+        records that belong to this snapshot and encoding any others
+        """
+        encoded = self.encoded_records()
+        items = []
+        for record in records:
+            position = self.by_id.get(record.get('id'))
+            if position is not None and self.universities[position] is record:
+                items.append(encoded[position])
+            else:
+                items.append(encode_json(record))
+        return EncodedList(items)
+
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_catalog_snapshot(path: Optional[str] = None) -> CatalogSnapshot:
+    """
+    Shared snapshot of a catalog file, rebuilt when the file changes on disk
+    (incrementally after a write through services/catalog_writer.py).
+
+    Raises FileNotFoundError when the file does not exist.
+    """
+    path = os.path.abspath(path or DEFAULT_CATALOG_PATH)
+    mtime = os.stat(path).st_mtime_ns
+
+    snapshot = _snapshots.get(path)
+    if snapshot is None or snapshot.mtime != mtime:
+        with _snapshots_lock:
+            snapshot = _snapshots.get(path)
+            if snapshot is None or snapshot.mtime != mtime:
+                snapshot = _snapshots[path] = CatalogSnapshot.from_file(path, previous=snapshot)
+    return snapshot
@@ -0,0 +1,207 @@
+"""
+Atomic, incremental writes to the university catalog file
+
+The maintenance scripts used to load universities.json, change it and dump it
+back in place, so a crash mid-write left a truncated file and a running
+server could read half of one. write_catalog() applies a batch of patches
+under an exclusive lock, writes the result to a temporary file, fsyncs it
+and renames it over the catalog, so readers see the old file or the new one.
+
+Each write also bumps the catalog version in a manifest next to the catalog
+(universities.version.json) that lists the IDs it changed. Servers rebuild
+their snapshot on the next read (get_catalog_snapshot) and, when the batch
+only updated records in place, redo the work for those records only.
+"""
+
+import os
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, one writer at a time
+    fcntl = None
+
+from services.catalog_snapshot import DEFAULT_CATALOG_PATH, manifest_path, read_manifest
+from utils.data_validator import report_validation, validate_catalog
+
+
+class CatalogPatch(NamedTuple):
+    """One change to the catalog: update, add or remove a university"""
+    op: str
+    university_id: Any = None
+    values: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def update(cls, university_id: Any, values: Dict[str, Any]) -> 'CatalogPatch':
+        """Set fields of an existing university"""
+        return cls('update', university_id, dict(values))
+
+    @classmethod
+    def add(cls, university: Dict[str, Any]) -> 'CatalogPatch':
+        """Append a university; it gets the next free ID when it has none"""
+        return cls('add', university.get('id'), dict(university))
+
+    @classmethod
+    def remove(cls, university_id: Any) -> 'CatalogPatch':
+        return cls('remove', university_id)
+
+
+class CatalogWriteResult(NamedTuple):
+    """Outcome of a write; version is unchanged when the batch changed nothing"""
+    version: int
+    updated: Tuple[Any, ...]
+    added: Tuple[Any, ...]
+    removed: Tuple[Any, ...]
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.updated or self.added or self.removed)
+
+
+def read_catalog(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Raw catalog records, for scripts that work out which patches to write"""
+    with open(path or DEFAULT_CATALOG_PATH, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def _write_temp_json(path: str, data: Any, mode: int, min_mtime: int = 0) -> Tuple[str, int]:
+    """
+    Write JSON to a fsynced temporary file next to path. Returns the temporary
+    path and its mtime, which the rename over path keeps.
+
+    File timestamps only advance once per clock tick, so the mtime is raised to
+    at least min_mtime; readers detect a new catalog by a changed mtime.
+    """
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, indent=2, ensure_ascii=False)
+        file.flush()
+        os.fsync(file.fileno())
+    os.chmod(temp_path, mode)
+    mtime = os.stat(temp_path).st_mtime_ns
+    if mtime < min_mtime:
+        os.utime(temp_path, ns=(min_mtime, min_mtime))
+        mtime = min_mtime
+    return temp_path, mtime
+
+
+def _fsync_directory(path: str) -> None:
+    """Make the renames in a directory durable (not supported on Windows)"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _apply_patches(universities: List[Dict[str, Any]], patches: Iterable[CatalogPatch]
+                   ) -> Tuple[List[Any], List[Any], List[Any]]:
+    """Apply patches in place; returns the updated, added and removed IDs"""
+    positions = {university.get('id'): i for i, university in enumerate(universities)}
+    updated, added, removed = {}, [], []
+    numeric_ids = [u.get('id') for u in universities if isinstance(u.get('id'), int)]
+    next_id = max(numeric_ids, default=0) + 1
+
+    for patch in patches:
+        if patch.op == 'update':
+            if patch.university_id not in positions:
+                raise KeyError(f"University {patch.university_id!r} not in the catalog")
+            if patch.values.get('id', patch.university_id) != patch.university_id:
+                raise ValueError(f"University {patch.university_id!r}: IDs can't be changed by an update")
+            university = universities[positions[patch.university_id]]
+            if any(university.get(key, object()) != value for key, value in patch.values.items()):
+                university.update(patch.values)
+                updated[patch.university_id] = True
+        elif patch.op == 'add':
+            university = dict(patch.values)
+            if university.get('id') is None:
+                university['id'] = next_id
+            if university['id'] in positions:
+                raise ValueError(f"University {university['id']!r} is already in the catalog")
+            if isinstance(university['id'], int):
+                next_id = max(next_id, university['id'] + 1)
+            positions[university['id']] = len(universities)
+            universities.append(university)
+            added.append(university['id'])
+        elif patch.op == 'remove':
+            if patch.university_id not in positions:
+                raise KeyError(f"University {patch.university_id!r} not in the catalog")
+            universities[positions.pop(patch.university_id)] = None
+            removed.append(patch.university_id)
+        else:
+            raise ValueError(f"Unknown catalog patch operation {patch.op!r}")
+
+    if removed:
+        universities[:] = [university for university in universities if university is not None]
+    # Records added in this batch are reported as added only
+    return [i for i in updated if i not in added and i not in removed], added, removed
+
+
+def write_catalog(patches: Iterable[CatalogPatch], path: Optional[str] = None) -> CatalogWriteResult:
+    """
+    Apply a batch of patches to the catalog file atomically
+
+    Args:
+        patches: CatalogPatch updates, additions and removals, applied in order
+        path: Catalog file, defaults to data/universities.json
+
+    Returns:
+        CatalogWriteResult with the new catalog version and the changed IDs
+
+    Raises:
+        KeyError: An update or removal names a university that doesn't exist
+        ValueError: Validation found errors in a changed record (no name,
+            repeated ID, value of the wrong type or out of range); nothing is
+            written. Errors in records the batch didn't touch are reported only
+    """
+    path = path or DEFAULT_CATALOG_PATH
+    patches = list(patches)
+
+    with open(path + '.lock', 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                base_stat = os.fstat(file.fileno())
+                universities = json.load(file)
+            manifest = read_manifest(path) or {}
+            version = manifest.get('version', 0)
+
+            updated, added, removed = _apply_patches(universities, patches)
+            if not (updated or added or removed):
+                return CatalogWriteResult(version, (), (), ())
+
+            validation = validate_catalog(universities)
+            changed_ids = set(updated) | set(added)
+            rejected = validation.errors_at(
+                [position for position, university in enumerate(universities) if university.get('id') in changed_ids]
+            )
+            if rejected:
+                raise ValueError(f"Catalog write rejected: {'; '.join(str(issue) for issue in rejected[:5])}")
+            report_validation(validation, source=path)
+
+            mode = base_stat.st_mode & 0o777
+            temp_path, mtime = _write_temp_json(path, universities, mode, min_mtime=base_stat.st_mtime_ns + 1)
+
+            # Manifest first: a reader that sees the new catalog always finds its manifest
+            manifest_temp_path, _ = _write_temp_json(manifest_path(path), {
+                'version': version + 1,
+                'mtime': mtime,
+                'base_mtime': base_stat.st_mtime_ns,
+                'updated': updated,
+                'added': added,
+                'removed': removed,
+                'written_at': datetime.now().isoformat()
+            }, mode)
+            os.replace(manifest_temp_path, manifest_path(path))
+            os.replace(temp_path, path)
+            _fsync_directory(path)
+
+            return CatalogWriteResult(version + 1, tuple(updated), tuple(added), tuple(removed))
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,186 @@
+"""
+In-process mirror of a Firestore collection
+
+The collection is read once and then kept current either by an on_snapshot
+listener (FIRESTORE_MIRROR_MODE=listen, the default) or by polling for
+documents whose updated_at field moved forward (FIRESTORE_MIRROR_MODE=poll).
+Polling cannot see deletions, so it also re-reads the whole collection every
+FIRESTORE_MIRROR_RESYNC_SECONDS.
+
+Only the collection reference API is used (on_snapshot, stream, where), so
+the mirror works the same against Firestore, the emulator
+(FIRESTORE_EMULATOR_HOST) or a fake client.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MIRROR_MODES = ('listen', 'poll', 'off')
+
+
+def _timestamp_key(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    if hasattr(value, 'timestamp'):
+        return value.timestamp()
+    return None
+
+
+class FirestoreMirror:
+    """Local copy of one collection; records are shared and must not be modified"""
+
+    def __init__(self, collection, to_record: Callable[[Any], Dict[str, Any]],
+                 sort_key: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                 mode: Optional[str] = None,
+                 poll_interval: Optional[float] = None,
+                 resync_interval: Optional[float] = None,
+                 updated_field: str = 'updated_at',
+                 ready_timeout: Optional[float] = None):
+        self.collection = collection
+        self.to_record = to_record
+        self.sort_key = sort_key
+        self.mode = (mode or os.getenv('FIRESTORE_MIRROR_MODE', 'listen')).lower()
+        if self.mode not in MIRROR_MODES:
+            raise ValueError(f"Unsupported Firestore mirror mode: {self.mode}")
+        self.poll_interval = poll_interval or float(os.getenv('FIRESTORE_MIRROR_POLL_SECONDS', '30'))
+        self.resync_interval = resync_interval or float(os.getenv('FIRESTORE_MIRROR_RESYNC_SECONDS', '3600'))
+        self.updated_field = updated_field
+        self.ready_timeout = ready_timeout or float(os.getenv('FIRESTORE_MIRROR_READY_TIMEOUT', '30'))
+
+        self._docs = {}
+        self._update_times = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+        self._started = False
+        self._records = None
+        self._version = None
+        self._last_updated = None
+        self._watch = None
+        self._poll_thread = None
+
+    # Lifecycle
+
+    def start(self):
+        """Load the collection and start following changes; blocks until the first load"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        if self.mode == 'listen':
+            self._watch = self.collection.on_snapshot(self._on_snapshot)
+            if not self._ready.wait(self.ready_timeout):
+                logger.warning("Firestore listener not ready, falling back to polling")
+                self._stop_watch()
+                self.mode = 'poll'
+
+        if self.mode == 'poll':
+            self.resync()
+            self._poll_thread = threading.Thread(target=self._poll_loop, name='firestore-mirror', daemon=True)
+            self._poll_thread.start()
+
+    def stop(self):
+        """Stop following changes; the last known records stay readable"""
+        self._stopped.set()
+        self._stop_watch()
+
+    def _stop_watch(self):
+        if self._watch is not None:
+            try:
+                self._watch.unsubscribe()
+            except Exception as e:
+                logger.warning(f"Could not unsubscribe Firestore listener: {str(e)}")
+            self._watch = None
+
+    # Reads
+
+    def records(self) -> Tuple[Dict[str, Any], ...]:
+        """Every document as a record, sorted by sort_key when given"""
+        records = self._records
+        if records is None:
+            with self._lock:
+                if self._records is None:
+                    records = list(self._docs.values())
+                    if self.sort_key is not None:
+                        records.sort(key=self.sort_key)
+                    self._records = tuple(records)
+                records = self._records
+        return records
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        return self._docs.get(str(doc_id))
+
+    @property
+    def version(self) -> str:
+        """
+        Changes whenever a document is added, changed or removed. Built from
+        document update times, so processes mirroring the same data agree.
+        """
+        version = self._version
+        if version is None:
+            with self._lock:
+                times = [t for t in self._update_times.values() if t is not None]
+                latest = max(times) if times else 0
+                self._version = version = f"{int(latest * 1000000):x}-{len(self._docs)}"
+        return version
+
+    # Updates
+
+    def _apply(self, upserts, removals=(), replace=False):
+        with self._lock:
+            if replace:
+                self._docs, self._update_times = {}, {}
+            for doc in upserts:
+                self._docs[doc.id] = self.to_record(doc)
+                self._update_times[doc.id] = _timestamp_key(getattr(doc, 'update_time', None))
+                updated = (doc.to_dict() or {}).get(self.updated_field)
+                if updated is not None and (self._last_updated is None or updated > self._last_updated):
+                    self._last_updated = updated
+            for doc_id in removals:
+                self._docs.pop(doc_id, None)
+                self._update_times.pop(doc_id, None)
+            self._records = None
+            self._version = None
+
+    def _on_snapshot(self, docs, changes, read_time):
+        upserts, removals = [], []
+        for change in changes:
+            if getattr(change.type, 'name', change.type) == 'REMOVED':
+                removals.append(change.document.id)
+            else:
+                upserts.append(change.document)
+        self._apply(upserts, removals)
+        self._ready.set()
+
+    def resync(self):
+        """Re-read the whole collection"""
+        self._apply(list(self.collection.stream()), replace=True)
+        self._ready.set()
+
+    def poll(self) -> int:
+        """Fetch documents updated since the last poll; returns how many changed"""
+        if self._last_updated is None:
+            # No document has the field yet, only the periodic resync can see changes
+            return 0
+        docs = list(self.collection.where(self.updated_field, '>', self._last_updated).stream())
+        if docs:
+            self._apply(docs)
+        return len(docs)
+
+    def _poll_loop(self):
+        last_resync = time.monotonic()
+        while not self._stopped.wait(self.poll_interval):
+            try:
+                if time.monotonic() - last_resync >= self.resync_interval:
+                    self.resync()
+                    last_resync = time.monotonic()
+                else:
+                    self.poll()
+            except Exception as e:
+                logger.warning(f"Firestore mirror poll failed: {str(e)}")
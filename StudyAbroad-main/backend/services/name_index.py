@@ -0,0 +1,289 @@
+"""
+Name-resolution index for merging external university lists into the catalog
+
+Import jobs (rankings, tuition fees, requirements) key their data by
+university name, and those names rarely match the catalog exactly: "UCL",
+"ETH Zürich", "Univ. of Toronto". NameIndex is built once over the catalog
+names and resolves each external name in roughly constant time:
+
+    1. exact match on the normalized name (case, accents, punctuation, "&")
+    2. an alias table ("mit", "ucl", "caltech", ...)
+    3. trigram similarity above a threshold, with candidates drawn from the
+       rarer trigrams only, so common words like "university" don't make
+       every name a candidate. Words are paired in order, so a whole extra
+       word ("City University of Hong Kong" for "University of Hong Kong")
+       keeps the score low while typos don't
+
+Reordered names are not matched: "Miami University" and "University of
+Miami", or "Newcastle University" and "University of Newcastle", are
+different institutions. Reorderings known to be the same university go in
+the alias table.
+
+A name that matches two catalog entries equally well is reported as
+ambiguous instead of taking whichever came first.
+"""
+
+import os
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+NAME_MATCH_THRESHOLD = float(os.getenv('NAME_MATCH_THRESHOLD', '0.85'))
+# Runner-up within this distance of the best score makes a match ambiguous
+NAME_MATCH_MARGIN = float(os.getenv('NAME_MATCH_MARGIN', '0.05'))
+
+_STOPWORDS = {'the', 'of', 'at', 'and', 'in', 'for'}
+
+# Abbreviated words in external lists
+_TOKEN_ALIASES = {
+    'univ': 'university',
+    'uni': 'university',
+    'inst': 'institute',
+    'tech': 'technology',
+    'st': 'saint',
+    'natl': 'national',
+}
+
+# Common short names -> catalog name
+DEFAULT_ALIASES = {
+    'MIT': 'Massachusetts Institute of Technology',
+    'Caltech': 'California Institute of Technology',
+    'UCL': 'University College London',
+    'LSE': 'London School of Economics',
+    'ETH': 'ETH Zurich',
+    'EPFL': 'Ecole Polytechnique Fédérale de Lausanne',
+    'UC Berkeley': 'University of California, Berkeley',
+    'UCLA': 'University of California, Los Angeles',
+    'UCSD': 'University of California, San Diego',
+    'UC Davis': 'University of California, Davis',
+    'NUS': 'National University of Singapore',
+    'NTU': 'Nanyang Technological University',
+    'CMU': 'Carnegie Mellon University',
+    'KAIST': 'Korea Advanced Institute of Science and Technology',
+    'TUM': 'Technical University of Munich',
+    'TU Delft': 'Delft University of Technology',
+    'UNSW': 'University of New South Wales',
+    'ANU': 'Australian National University',
+    'HKU': 'University of Hong Kong',
+    'CUHK': 'Chinese University of Hong Kong',
+    'UBC': 'University of British Columbia',
+    'KCL': "King's College London",
+    'University of Loughborough': 'Loughborough University',
+}
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase ASCII words without punctuation, stopwords or abbreviations"""
+    text = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode('ascii')
+    text = text.lower().replace('&', ' and ').replace("'", '')
+    tokens = [_TOKEN_ALIASES.get(token, token) for token in _NON_WORD_RE.split(text) if token]
+    return ' '.join(token for token in tokens if token not in _STOPWORDS)
+
+
+def _trigrams(normalized: str) -> frozenset:
+    padded = f"  {normalized} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def word_similarity(a: str, b: str) -> float:
+    """Dice coefficient of the trigrams of two words"""
+    if a == b:
+        return 1.0
+    trigrams_a, trigrams_b = _trigrams(a), _trigrams(b)
+    return 2 * len(trigrams_a & trigrams_b) / (len(trigrams_a) + len(trigrams_b))
+
+
+def name_similarity(a: Tuple[str, ...], b: Tuple[str, ...], similarity=word_similarity) -> float:
+    """
+    Similarity of two normalized names given as words: words are paired in
+    order, the best total of the pairs' word similarities is divided by the
+    word count of the longer name. Reordered names score low, since only
+    the words that keep their order can be paired
+    """
+    previous = [0.0] * (len(b) + 1)
+    for word in a:
+        current = [0.0]
+        for j, other in enumerate(b):
+            current.append(max(previous[j + 1], current[j], previous[j] + similarity(word, other)))
+        previous = current
+    return previous[-1] / max(len(a), len(b))
+
+
+class NameMatch(NamedTuple):
+    """Result of resolving one name; key is None when unmatched or ambiguous"""
+    query: str
+    key: Any = None
+    name: Optional[str] = None
+    score: float = 0.0
+    method: Optional[str] = None
+    # Entries that scored too close to tell apart, as (key, name, score)
+    candidates: Tuple[Tuple[Any, str, float], ...] = ()
+
+    @property
+    def matched(self) -> bool:
+        return self.key is not None
+
+    @property
+    def ambiguous(self) -> bool:
+        return self.key is None and len(self.candidates) > 1
+
+
+# Preference between matches of the same catalog entry, best first
+METHOD_RANK = {'exact': 0, 'alias': 1, 'fuzzy': 2}
+
+
+class NameIndex:
+    """Index of (key, name) entries, usually catalog IDs and university names"""
+
+    def __init__(self, entries: Iterable[Tuple[Any, str]], aliases: Optional[Dict[str, str]] = None,
+                 threshold: Optional[float] = None, margin: Optional[float] = None,
+                 max_trigram_share: float = 0.2):
+        """
+        Args:
+            entries: (key, name) pairs to resolve names against
+            aliases: Short or alternative name -> name in the entries,
+                defaults to DEFAULT_ALIASES
+            threshold: Minimum trigram similarity for a fuzzy match (0-1)
+            margin: Score distance below which two entries are ambiguous
+            max_trigram_share: Trigrams found in more than this share of the
+                entries are not used to find fuzzy candidates
+        """
+        self.threshold = NAME_MATCH_THRESHOLD if threshold is None else threshold
+        self.margin = NAME_MATCH_MARGIN if margin is None else margin
+        self.aliases = {
+            normalize_name(alias): normalize_name(name)
+            for alias, name in (DEFAULT_ALIASES if aliases is None else aliases).items()
+        }
+
+        self._entries = []
+        self._exact = {}
+        postings = {}
+        for key, name in entries:
+            normalized = normalize_name(name)
+            if not normalized:
+                continue
+            position = len(self._entries)
+            trigrams = _trigrams(normalized)
+            self._entries.append((key, name, tuple(normalized.split())))
+            self._exact.setdefault(normalized, []).append(position)
+            for trigram in trigrams:
+                postings.setdefault(trigram, []).append(position)
+
+        limit = max(int(max_trigram_share * len(self._entries)), 10)
+        self._postings = {trigram: positions for trigram, positions in postings.items() if len(positions) <= limit}
+        # The catalog vocabulary is small, so word pairs repeat across queries
+        self._word_scores = {}
+
+    def _word_similarity(self, a: str, b: str) -> float:
+        score = self._word_scores.get((a, b))
+        if score is None:
+            score = self._word_scores[(a, b)] = self._word_scores[(b, a)] = word_similarity(a, b)
+        return score
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _result(self, query: str, positions: List[int], score: float, method: str) -> NameMatch:
+        keys = {self._entries[p][0] for p in positions}
+        if len(keys) > 1:
+            candidates = tuple((self._entries[p][0], self._entries[p][1], score) for p in positions)
+            return NameMatch(query, score=score, method=method, candidates=candidates)
+        key, name, _ = self._entries[positions[0]]
+        return NameMatch(query, key, name, score, method)
+
+    def resolve(self, name: str) -> NameMatch:
+        """Catalog entry for a name, or an unmatched/ambiguous NameMatch"""
+        normalized = normalize_name(name)
+        if not normalized:
+            return NameMatch(name)
+
+        if normalized in self._exact:
+            return self._result(name, self._exact[normalized], 1.0, 'exact')
+        alias = self.aliases.get(normalized)
+        if alias in self._exact:
+            return self._result(name, self._exact[alias], 1.0, 'alias')
+
+        return self._resolve_fuzzy(name, normalized)
+
+    def _resolve_fuzzy(self, name: str, normalized: str) -> NameMatch:
+        hits = {}
+        for trigram in _trigrams(normalized):
+            for position in self._postings.get(trigram, ()):
+                hits[position] = hits.get(position, 0) + 1
+        if not hits:
+            return NameMatch(name)
+        # Entries sharing far fewer rare trigrams than the best one can't be close
+        min_hits = max(hits.values()) / 2
+
+        words = tuple(normalized.split())
+        scored = []
+        for position, count in hits.items():
+            if count < min_hits:
+                continue
+            score = name_similarity(words, self._entries[position][2], self._word_similarity)
+            if score >= self.threshold - self.margin:
+                scored.append((score, position))
+        if not scored:
+            return NameMatch(name)
+
+        # Highest score first, ties in index order, so results don't depend on set order
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        best_score, best_position = scored[0]
+        if best_score < self.threshold:
+            return NameMatch(name, score=round(best_score, 3))
+
+        close = [position for score, position in scored if best_score - score < self.margin]
+        if len({self._entries[p][0] for p in close}) > 1:
+            candidates = tuple(
+                (self._entries[p][0], self._entries[p][1], round(score, 3))
+                for score, p in scored if p in close
+            )
+            return NameMatch(name, score=round(best_score, 3), method='fuzzy', candidates=candidates)
+
+        key, entry_name, _ = self._entries[best_position]
+        return NameMatch(name, key, entry_name, round(best_score, 3), 'fuzzy')
+
+    def resolve_all(self, names: Iterable[str]) -> Tuple[Dict[Any, NameMatch], List[NameMatch]]:
+        """
+        Resolve many names, one match per entry
+
+        Returns:
+            (matches by entry key, unresolved) where unresolved holds the
+            unmatched and ambiguous names and the names that lost to a better
+            match of the same entry (exact before alias before fuzzy,
+            then higher score, then earlier name)
+        """
+        matches, unresolved = {}, []
+        for name in names:
+            match = self.resolve(name)
+            if not match.matched:
+                unresolved.append(match)
+                continue
+            current = matches.get(match.key)
+            if current is None:
+                matches[match.key] = match
+            elif (METHOD_RANK[match.method], -match.score) < (METHOD_RANK[current.method], -current.score):
+                unresolved.append(current)
+                matches[match.key] = match
+            else:
+                unresolved.append(match)
+        return matches, unresolved
+
+
+def report_unresolved(unresolved: List[NameMatch], limit: int = 10) -> None:
+    """Print the names an import could not attach to a university"""
+    if not unresolved:
+        return
+    print(f"\n⚠️  {len(unresolved)} names not applied:")
+    for match in unresolved[:limit]:
+        if match.ambiguous:
+            options = ', '.join(f"{name} ({score})" for _, name, score in match.candidates)
+            print(f"   • {match.query}: ambiguous between {options}")
+        elif match.matched:
+            print(f"   • {match.query}: {match.name} already matched by a closer name")
+        else:
+            print(f"   • {match.query}: no match" + (f" (best similarity {match.score})" if match.score else ''))
+    if len(unresolved) > limit:
+        print(f"   ... and {len(unresolved) - limit} more")
@@ -0,0 +1,258 @@
+"""
+University catalog stored in SQL tables
+
+import_catalog() copies universities.json into the universities, programs,
+fields and university_fields tables (models/university.py). SQLCatalogBackend
+serves the catalog engine from those tables: range, country and field
+filters, sorting and pagination run as one indexed SQL query, and only the
+IDs of the requested page come back. Records themselves come from a
+snapshot rebuilt whenever a new import changes the catalog version.
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, or_
+
+from models.database import db_manager
+from models.university import University, Program, Field, university_fields
+from services.catalog_schema import normalize_catalog, report_anomalies
+from services.catalog_engine import (
+    CatalogBackend, QueryPlan, RangePredicate, CountryPredicate, FieldPredicate, SORT_FIELDS
+)
+from services.catalog_snapshot import CatalogSnapshot, DEFAULT_CATALOG_PATH, NUMERIC_COLUMNS
+from utils.data_validator import report_validation, validate_catalog
+
+# Predicates the SQL query reproduces exactly; plans with any other kind are evaluated in memory
+PUSHABLE_PREDICATES = (RangePredicate, CountryPredicate, FieldPredicate)
+
+
+def _number(value) -> Optional[float]:
+    """Column value for a record value, NULL where the snapshot columns have NaN"""
+    if isinstance(value, (int, float)) and value == value:
+        return float(value)
+    return None
+
+
+def import_catalog(path: Optional[str] = None, session=None) -> int:
+    """
+    Replace the catalog tables with the normalized contents of a universities
+    JSON file in one transaction. Returns the number of universities imported.
+
+    Raises ValueError, leaving the tables as they are, when validation finds
+    errors in the file.
+    """
+    path = path or DEFAULT_CATALOG_PATH
+    with open(path, 'r', encoding='utf-8') as file:
+        universities = json.load(file)
+
+    validation = validate_catalog(universities)
+    report_validation(validation, source=path)
+    if not validation.is_valid:
+        raise ValueError(f"Catalog import rejected: {validation.errors} validation errors in {path}, "
+                         f"first: {validation.issues[0]}")
+
+    # Same normalization as a catalog snapshot, so SQL columns match the in-memory columns
+    records, universities, anomalies = normalize_catalog(universities)
+    report_anomalies(anomalies, source=path)
+
+    own_session = session is None
+    session = session or db_manager.get_session()
+    try:
+        now = datetime.utcnow()
+        university_rows, program_rows, links = [], [], []
+        field_names = set()
+
+        for position, (record, university) in enumerate(zip(records, universities)):
+            if not isinstance(record.id, int):
+                raise ValueError(f"University {record.id!r} at position {position} has no integer id")
+
+            row = {
+                'id': record.id,
+                'position': position,
+                'name': record.name,
+                'country': record.country,
+                'city': record.city,
+                'type': record.type,
+                'data': json.dumps(university),
+                'imported_at': now
+            }
+            for column in NUMERIC_COLUMNS:
+                if column != 'id':
+                    row[column] = _number(getattr(record, column))
+            university_rows.append(row)
+
+            for field in record.fields:
+                field_names.add(field)
+                links.append((record.id, field))
+
+            for program in university.get('programs') or []:
+                if isinstance(program, dict):
+                    name, degree = program.get('name'), program.get('degree')
+                else:
+                    name, degree = program, None
+                if isinstance(name, str) and name.strip():
+                    program_rows.append({'university_id': record.id, 'name': name.strip(), 'degree': degree})
+
+        # Field IDs in name order, the same numbering the engine derives without a table
+        field_ids = {name: i for i, name in enumerate(sorted(field_names), 1)}
+
+        session.execute(delete(university_fields))
+        session.execute(delete(Program))
+        session.execute(delete(Field))
+        session.execute(delete(University))
+        if university_rows:
+            session.execute(insert(University), university_rows)
+        if field_ids:
+            session.execute(insert(Field), [{'id': i, 'name': name} for name, i in field_ids.items()])
+        if links:
+            session.execute(insert(university_fields), [
+                {'university_id': university_id, 'field_id': field_ids[field]}
+                for university_id, field in dict.fromkeys(links)
+            ])
+        if program_rows:
+            session.execute(insert(Program), program_rows)
+        session.commit()
+        return len(university_rows)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        if own_session:
+            session.close()
+
+
+class SQLCatalogBackend(CatalogBackend):
+    """Catalog served from the SQL catalog tables"""
+
+    in_database = True
+
+    def __init__(self, data_path: str = "data", session_factory=None):
+        self.session_factory = session_factory or db_manager.get_session
+        self.countries_file = os.path.join(data_path, "countries.json")
+        self._snapshot = None
+        self._snapshot_lock = threading.Lock()
+
+    def _table_version(self, session) -> str:
+        count, latest = session.query(func.count(University.id), func.max(University.imported_at)).one()
+        stamp = int(latest.timestamp() * 1000000) if latest else 0
+        return f"{stamp:x}-{count}"
+
+    def version(self) -> Optional[str]:
+        session = self.session_factory()
+        try:
+            version = self._table_version(session)
+        finally:
+            session.close()
+        try:
+            countries = f"{os.stat(self.countries_file).st_mtime_ns:x}"
+        except FileNotFoundError:
+            countries = '0'
+        return f"{version}-{countries}"
+
+    def snapshot(self) -> CatalogSnapshot:
+        session = self.session_factory()
+        try:
+            version = self._table_version(session)
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == version:
+                return snapshot
+
+            with self._snapshot_lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.version != version:
+                    rows = session.query(University.data).order_by(University.position).all()
+                    snapshot = self._snapshot = CatalogSnapshot(
+                        (json.loads(data) for (data,) in rows), version=version
+                    )
+                return snapshot
+        finally:
+            session.close()
+
+    def load_countries(self) -> List[Dict[str, str]]:
+        try:
+            with open(self.countries_file, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return []
+
+    def load_fields(self) -> Optional[List[Dict[str, Any]]]:
+        session = self.session_factory()
+        try:
+            fields = [field.to_dict() for field in session.query(Field).order_by(Field.name)]
+        finally:
+            session.close()
+        return fields or None
+
+    def is_empty(self) -> bool:
+        session = self.session_factory()
+        try:
+            return session.query(University.id).first() is None
+        finally:
+            session.close()
+
+    # Query pushdown
+
+    def _conditions(self, plan: QueryPlan) -> Optional[list]:
+        """SQL conditions equivalent to the plan, or None when it has predicates SQL can't reproduce"""
+        conditions = []
+        for predicate in plan.predicates:
+            if isinstance(predicate, RangePredicate):
+                column = getattr(University, predicate.field)
+                condition = column >= predicate.value if predicate.operator == '>=' else column <= predicate.value
+                # NULL stands for a missing number, which passes or fails like the stand-in value
+                conditions.append(or_(column.is_(None), condition) if predicate.accepts_missing() else condition)
+            elif isinstance(predicate, CountryPredicate):
+                conditions.append(University.country.in_(sorted(predicate.countries)))
+            elif isinstance(predicate, FieldPredicate):
+                conditions.append(University.fields.any(Field.name.in_(predicate.fields)))
+            else:
+                return None
+        return conditions
+
+    def candidates(self, plan: QueryPlan) -> Optional[List[Dict[str, Any]]]:
+        conditions = self._conditions(plan)
+        if conditions is None or not conditions:
+            return None
+
+        snapshot = self.snapshot()
+        session = self.session_factory()
+        try:
+            ids = session.query(University.id).filter(*conditions).order_by(University.position).all()
+        finally:
+            session.close()
+        return [snapshot.get(university_id) for (university_id,) in ids if snapshot.get(university_id) is not None]
+
+    def page(self, plan: QueryPlan, sort_by: Optional[str], ascending: bool,
+             offset: int, limit: int) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        conditions = self._conditions(plan)
+        if conditions is None:
+            return None
+
+        # Universities without the sort value go last either way, ties keep catalog order
+        if sort_by in SORT_FIELDS:
+            column = getattr(University, sort_by)
+            order = [column.is_(None), column.asc() if ascending else column.desc(), University.position]
+        else:
+            order = [University.position]
+
+        snapshot = self.snapshot()
+        session = self.session_factory()
+        try:
+            query = session.query(University.id).filter(*conditions)
+            total = query.count()
+            ids = query.order_by(*order).offset(offset).limit(limit).all()
+        finally:
+            session.close()
+        return [snapshot.get(university_id) for (university_id,) in ids if snapshot.get(university_id) is not None], total
+
+
+if __name__ == '__main__':
+    import sys
+
+    source = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CATALOG_PATH
+    print(f"Importing {source} into {db_manager.database_url}...")
+    print(f"✅ Imported {import_catalog(source)} universities")
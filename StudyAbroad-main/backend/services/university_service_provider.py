@@ -0,0 +1,74 @@
+"""
+Shared university service
+
+Routes used to build their own university service at import time, each one
+initializing Firebase separately. get_university_service() builds a single
+instance on first use, preferring Firebase and falling back to the JSON files,
+unless CATALOG_BACKEND selects a backend (json, sql or firebase).
+"""
+
+import os
+import threading
+
+_university_service_instance = None
+_university_service_lock = threading.Lock()
+
+
+def _create_sql_university_service():
+    from services.catalog_engine import CatalogEngine
+    from services.sql_catalog import SQLCatalogBackend, import_catalog
+
+    backend = SQLCatalogBackend()
+    if backend.is_empty():
+        print("SQL catalog is empty, importing data/universities.json")
+        import_catalog()
+    print("✅ Using SQL University Service")
+    return CatalogEngine(backend)
+
+
+def _create_university_service():
+    # CATALOG_BACKEND=json|sql|firebase picks a storage backend; auto prefers Firebase
+    backend = os.getenv('CATALOG_BACKEND', 'auto').lower()
+    if backend == 'sql':
+        return _create_sql_university_service()
+    if backend == 'json':
+        from services.university_service_simple import UniversityService
+        service = UniversityService()
+        print("✅ Using JSON University Service")
+        return service
+
+    # firebase_admin pulls in gRPC, so it is only imported when a service is needed
+    try:
+        from services.firebase_university_service import FirebaseUniversityService
+    except ImportError as e:
+        print(f"Firebase service not available: {e}")
+        FirebaseUniversityService = None
+
+    from services.university_service_simple import UniversityService
+
+    if FirebaseUniversityService is not None:
+        try:
+            service = FirebaseUniversityService()
+            print("✅ Using Firebase University Service")
+            return service
+        except Exception as e:
+            print(f"⚠️ Firebase failed, using JSON fallback: {e}")
+            service = UniversityService()
+            print("✅ Using JSON University Service")
+            return service
+
+    service = UniversityService()
+    print("✅ Using JSON University Service (Firebase not available)")
+    return service
+
+
+def get_university_service():
+    """
+    Get or create the global university service instance
+    """
+    global _university_service_instance
+    if _university_service_instance is None:
+        with _university_service_lock:
+            if _university_service_instance is None:
+                _university_service_instance = _create_university_service()
+    return _university_service_instance
@@ -0,0 +1,32 @@
+"""
+Tests for InputSanitizer
+"""
+
+import pytest
+
+from utils.security import InputSanitizer
+
+
+# Payloads that only become dangerous once a nested pattern is removed. XSS
+# patterns are removed until none is left; a single removal pass would return
+# 'javascript:alert(1)' for the first one.
+NESTED_XSS_CASES = [
+    ('javasjavascript:cript:alert(1)', 'alert(1)'),
+    ('vbonload =script:', ''),
+    ('onclonclick=ick=go()', 'go()'),
+    # Nested three deep, so a fixed number of extra passes isn't enough either
+    ('jajajavascript:vascript:vascript:alert(1)', 'alert(1)'),
+]
+
+
+@pytest.mark.parametrize('payload, expected', NESTED_XSS_CASES)
+def test_sanitize_string_strips_nested_xss(payload, expected):
+    assert InputSanitizer.sanitize_string(payload) == expected
+
+
+def test_sanitize_string_escapes_markup():
+    assert InputSanitizer.sanitize_string('<b>javascript:x</b>') == '&lt;b&gt;x&lt;/b&gt;'
+
+
+def test_sanitize_string_leaves_plain_text():
+    assert InputSanitizer.sanitize_string('  University of Oxford  ') == 'University of Oxford'
@@ -6,6 +6,11 @@ QS World University Rankings 2025 & Times Higher Education 2024
 import json
 from datetime import datetime
 
+from services.catalog_writer import CatalogPatch, read_catalog, write_catalog
+from services.name_index import NameIndex, report_unresolved
+
+CATALOG_FILE = 'data/universities.json'
+
 def get_latest_official_rankings():
     """
     Get the latest official university rankings from QS 2025 and THE 2024
@@ -76,8 +81,7 @@ def update_university_rankings():
     
     try:
         # Load current universities data
-        with open('data/universities.json', 'r', encoding='utf-8') as f:
-            universities = json.load(f)
+        universities = read_catalog(CATALOG_FILE)
         
         print(f"📊 Loaded {len(universities)} universities")
         
@@ -85,43 +89,39 @@ def update_university_rankings():
         latest_rankings = get_latest_official_rankings()
         print(f"📈 Got {len(latest_rankings)} official rankings")
         
+        # Match official names to catalog universities
+        index = NameIndex((university['id'], university.get('name', '')) for university in universities)
+        matches, unresolved = index.resolve_all(latest_rankings)
+        by_id = {university['id']: university for university in universities}
+        
         # Update rankings
         updated_count = 0
-        for university in universities:
-            uni_name = university.get('name', '')
-            
-            # Check for exact match first
-            if uni_name in latest_rankings:
-                old_ranking = university.get('ranking', 'N/A')
-                new_ranking = latest_rankings[uni_name]
-                university['ranking'] = new_ranking
-                university['ranking_source'] = 'QS World University Rankings 2025'
-                university['ranking_updated'] = datetime.now().isoformat()
-                updated_count += 1
-                print(f"   ✅ {uni_name}: {old_ranking} → {new_ranking}")
-            
-            # Check for partial matches (common variations)
+        patches = []
+        for university_id, match in matches.items():
+            old_ranking = by_id[university_id].get('ranking', 'N/A')
+            new_ranking = latest_rankings[match.query]
+            patches.append(CatalogPatch.update(university_id, {
+                'ranking': new_ranking,
+                'ranking_source': 'QS World University Rankings 2025',
+                'ranking_updated': datetime.now().isoformat()
+            }))
+            updated_count += 1
+            if match.method == 'exact':
+                print(f"   ✅ {match.name}: {old_ranking} → {new_ranking}")
             else:
-                for official_name, ranking in latest_rankings.items():
-                    if (uni_name.lower() in official_name.lower() or 
-                        official_name.lower() in uni_name.lower()):
-                        old_ranking = university.get('ranking', 'N/A')
-                        university['ranking'] = ranking
-                        university['ranking_source'] = 'QS World University Rankings 2025'
-                        university['ranking_updated'] = datetime.now().isoformat()
-                        updated_count += 1
-                        print(f"   ✅ {uni_name} → {official_name}: {old_ranking} → {ranking}")
-                        break
+                print(f"   ✅ {match.name} ← {match.query} ({match.method}): {old_ranking} → {new_ranking}")
+        
+        report_unresolved(unresolved)
         
-        # Save updated data
-        with open('data/universities.json', 'w', encoding='utf-8') as f:
-            json.dump(universities, f, indent=2, ensure_ascii=False)
+        # Save updated data atomically in one batch
+        result = write_catalog(patches, CATALOG_FILE)
         
         print(f"\n📊 RANKING UPDATE SUMMARY:")
         print(f"   Total Universities: {len(universities)}")
         print(f"   Rankings Updated: {updated_count}")
         print(f"   Success Rate: {(updated_count/len(universities)*100):.1f}%")
         print(f"   Data Source: QS World University Rankings 2025")
+        print(f"   Catalog Version: {result.version}")
         print(f"   Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
         return True
@@ -8,6 +8,12 @@ from datetime import datetime
 import requests
 from typing import Dict, List, Any
 
+from services.catalog_writer import CatalogPatch, read_catalog, write_catalog
+from services.name_index import NameIndex, report_unresolved
+from utils.data_validator import report_validation, validate_catalog
+
+CATALOG_FILE = 'data/universities.json'
+
 def update_tuition_fees():
     """Update tuition fees with latest data"""
     print("💰 UPDATING TUITION FEES")
@@ -15,8 +21,7 @@ def update_tuition_fees():
     
     try:
         # Load current data
-        with open('data/universities.json', 'r', encoding='utf-8') as f:
-            universities = json.load(f)
+        universities = read_catalog(CATALOG_FILE)
         
         # Sample tuition fee updates (you can expand this with real data sources)
         tuition_updates = {
@@ -105,27 +110,40 @@ def update_tuition_fees():
             "University of Loughborough": "https://www.lboro.ac.uk"
         }
         
+        # Match both lists to catalog universities
+        index = NameIndex((university['id'], university.get('name', '')) for university in universities)
+        fee_matches, unresolved_fees = index.resolve_all(tuition_updates)
+        website_matches, unresolved_websites = index.resolve_all(website_updates)
+        
         updated_count = 0
+        patches = []
         for university in universities:
             uni_name = university.get('name', '')
-            if uni_name in tuition_updates:
+            updates = {}
+            fee_match = fee_matches.get(university['id'])
+            if fee_match:
                 old_fee = university.get('tuitionFee', 'N/A')
-                new_fee = tuition_updates[uni_name]
-                university['tuitionFee'] = new_fee
-                university['tuition_updated'] = datetime.now().isoformat()
+                new_fee = tuition_updates[fee_match.query]
+                updates['tuitionFee'] = new_fee
+                updates['tuition_updated'] = datetime.now().isoformat()
                 updated_count += 1
                 print(f"   ✅ {uni_name}: ${old_fee:,} → ${new_fee:,}")
             
             # Update website if available
-            if uni_name in website_updates:
-                university['website'] = website_updates[uni_name]
-                print(f"   ✅ {uni_name}: Website added → {website_updates[uni_name]}")
+            website_match = website_matches.get(university['id'])
+            if website_match:
+                updates['website'] = website_updates[website_match.query]
+                print(f"   ✅ {uni_name}: Website added → {updates['website']}")
+            
+            if updates:
+                patches.append(CatalogPatch.update(university['id'], updates))
         
-        # Save updated data
-        with open('data/universities.json', 'w', encoding='utf-8') as f:
-            json.dump(universities, f, indent=2, ensure_ascii=False)
+        report_unresolved(unresolved_fees + unresolved_websites)
         
-        print(f"\n📊 Updated {updated_count} tuition fees")
+        # Save updated data atomically in one batch
+        result = write_catalog(patches, CATALOG_FILE)
+        
+        print(f"\n📊 Updated {updated_count} tuition fees (catalog version {result.version})")
         return True
         
     except Exception as e:
@@ -138,8 +156,7 @@ def update_admission_requirements():
     print("=" * 45)
     
     try:
-        with open('data/universities.json', 'r', encoding='utf-8') as f:
-            universities = json.load(f)
+        universities = read_catalog(CATALOG_FILE)
         
         # Sample requirement updates
         requirement_updates = {
@@ -236,22 +253,24 @@ def update_admission_requirements():
             }
         }
         
+        index = NameIndex((university['id'], university.get('name', '')) for university in universities)
+        matches, unresolved = index.resolve_all(requirement_updates)
+        
         updated_count = 0
-        for university in universities:
-            uni_name = university.get('name', '')
-            if uni_name in requirement_updates:
-                updates = requirement_updates[uni_name]
-                for key, value in updates.items():
-                    university[key] = value
-                university['requirements_updated'] = datetime.now().isoformat()
-                updated_count += 1
-                print(f"   ✅ {uni_name}: Requirements updated")
+        patches = []
+        for university_id, match in matches.items():
+            updates = dict(requirement_updates[match.query])
+            updates['requirements_updated'] = datetime.now().isoformat()
+            patches.append(CatalogPatch.update(university_id, updates))
+            updated_count += 1
+            print(f"   ✅ {match.name}: Requirements updated")
+        
+        report_unresolved(unresolved)
         
-        # Save updated data
-        with open('data/universities.json', 'w', encoding='utf-8') as f:
-            json.dump(universities, f, indent=2, ensure_ascii=False)
+        # Save updated data atomically in one batch
+        result = write_catalog(patches, CATALOG_FILE)
         
-        print(f"\n📊 Updated {updated_count} admission requirements")
+        print(f"\n📊 Updated {updated_count} admission requirements (catalog version {result.version})")
         return True
         
     except Exception as e:
@@ -264,25 +283,21 @@ def add_new_universities(new_unis: List[Dict[str, Any]]):
     print("=" * 50)
     
     try:
-        with open('data/universities.json', 'r', encoding='utf-8') as f:
-            universities = json.load(f)
-        
-        # Get next ID
-        next_id = max(uni['id'] for uni in universities) + 1
-        
-        # Add new universities
-        for i, new_uni in enumerate(new_unis):
-            new_uni['id'] = next_id + i
+        # New universities get the next free IDs when the batch is written
+        patches = []
+        for new_uni in new_unis:
             new_uni['created_at'] = datetime.now().isoformat()
             new_uni['data_source'] = 'Manual Addition'
-            universities.append(new_uni)
-            print(f"   ✅ Added: {new_uni['name']} ({new_uni['country']})")
+            patches.append(CatalogPatch.add(new_uni))
+        
+        # Save updated data atomically in one batch
+        result = write_catalog(patches, CATALOG_FILE)
         
-        # Save updated data
-        with open('data/universities.json', 'w', encoding='utf-8') as f:
-            json.dump(universities, f, indent=2, ensure_ascii=False)
+        for new_uni, university_id in zip(new_unis, result.added):
+            new_uni['id'] = university_id
+            print(f"   ✅ Added: {new_uni['name']} ({new_uni['country']}), ID {university_id}")
         
-        print(f"\n📊 Total universities: {len(universities)}")
+        print(f"\n📊 Total universities: {len(read_catalog(CATALOG_FILE))}")
         return True
         
     except Exception as e:
@@ -295,28 +310,28 @@ def update_university_info(university_name: str, updates: Dict[str, Any]):
     print("=" * 50)
     
     try:
-        with open('data/universities.json', 'r', encoding='utf-8') as f:
-            universities = json.load(f)
+        universities = read_catalog(CATALOG_FILE)
         
         # Find and update university
-        updated = False
-        for university in universities:
-            if university.get('name', '').lower() == university_name.lower():
-                for key, value in updates.items():
-                    old_value = university.get(key, 'N/A')
-                    university[key] = value
-                    print(f"   ✅ {key}: {old_value} → {value}")
-                
-                university['updated_at'] = datetime.now().isoformat()
-                updated = True
-                break
+        index = NameIndex((university['id'], university.get('name', '')) for university in universities)
+        match = index.resolve(university_name)
+        # A one-off update names its target exactly; a similar name may be another university
+        updated = match.matched and match.method in ('exact', 'alias')
         
         if updated:
-            # Save updated data
-            with open('data/universities.json', 'w', encoding='utf-8') as f:
-                json.dump(universities, f, indent=2, ensure_ascii=False)
-            print(f"\n✅ {university_name} updated successfully")
+            university = next(u for u in universities if u['id'] == match.key)
+            for key, value in updates.items():
+                old_value = university.get(key, 'N/A')
+                print(f"   ✅ {key}: {old_value} → {value}")
+            
+            # Save updated data atomically
+            patch = CatalogPatch.update(match.key, dict(updates, updated_at=datetime.now().isoformat()))
+            write_catalog([patch], CATALOG_FILE)
+            print(f"\n✅ {match.name} updated successfully")
+        elif match.matched:
+            print(f"\n❌ University '{university_name}' not found (did you mean '{match.name}'?)")
         else:
+            report_unresolved([match])
             print(f"\n❌ University '{university_name}' not found")
         
         return updated
@@ -334,41 +349,15 @@ def validate_data():
         with open('data/universities.json', 'r', encoding='utf-8') as f:
             universities = json.load(f)
         
-        issues = []
-        
-        for uni in universities:
-            uni_name = uni.get('name', 'Unknown')
-            
-            # Check required fields
-            required_fields = ['name', 'country', 'city', 'ranking', 'fields']
-            for field in required_fields:
-                if not uni.get(field):
-                    issues.append(f"{uni_name}: Missing {field}")
-            
-            # Check data types
-            if uni.get('tuition_fee') and not isinstance(uni['tuition_fee'], (int, float)):
-                issues.append(f"{uni_name}: Invalid tuition_fee type")
-            
-            if uni.get('ranking') and not isinstance(uni['ranking'], int):
-                issues.append(f"{uni_name}: Invalid ranking type")
-            
-            # Check ranges
-            if uni.get('min_cgpa') and (uni['min_cgpa'] < 0 or uni['min_cgpa'] > 4):
-                issues.append(f"{uni_name}: Invalid CGPA range")
-            
-            if uni.get('min_ielts') and (uni['min_ielts'] < 0 or uni['min_ielts'] > 9):
-                issues.append(f"{uni_name}: Invalid IELTS range")
+        validation = validate_catalog(universities)
         
-        if issues:
+        if validation.errors or validation.warnings:
             print("⚠️  Data Issues Found:")
-            for issue in issues[:10]:  # Show first 10 issues
-                print(f"   • {issue}")
-            if len(issues) > 10:
-                print(f"   ... and {len(issues) - 10} more issues")
+            report_validation(validation, source=CATALOG_FILE, limit=10)
         else:
             print("✅ All data validation checks passed")
         
-        return len(issues) == 0
+        return validation.is_valid
         
     except Exception as e:
         print(f"❌ Error validating data: {e}")
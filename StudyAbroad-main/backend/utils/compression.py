@@ -0,0 +1,78 @@
+"""
+Response compression
+
+Large text responses are compressed with brotli (when the brotli package is
+installed) or gzip, whichever the client prefers in Accept-Encoding.
+Streamed responses, small bodies and already-encoded responses are left as
+they are.
+"""
+
+import os
+import gzip
+from typing import Optional
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '5'))
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+
+# Content codings in order of preference when the client rates them equally
+CONTENT_CODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding() -> Optional[str]:
+    """Best content coding the client accepts, or None"""
+    best, best_quality = None, 0
+    for coding in CONTENT_CODINGS:
+        quality = request.accept_encodings[coding]
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress_body(data: bytes, coding: str) -> bytes:
+    if coding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response):
+    """after_request hook compressing large text bodies"""
+    if response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers:
+        return response
+
+    if response.status_code == 304:
+        # Revalidations stand in for a body that may have been compressed
+        response.vary.add('Accept-Encoding')
+        return response
+
+    if (response.status_code < 200 or response.status_code == 204
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_SIZE:
+        return response
+
+    coding = choose_encoding()
+    if coding is None:
+        return response
+
+    response.set_data(compress_body(data, coding))
+    response.headers['Content-Encoding'] = coding
+
+    # Strong ETags must differ between encodings of the same resource
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{coding}")
+    return response
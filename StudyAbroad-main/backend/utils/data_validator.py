@@ -3,10 +3,279 @@ Data Validator Module
 
 This module provides functions to validate the structure and integrity
 of university data in JSON files.
+
+Catalogs are validated column by column (validate_catalog): each field is
+read out of the records once and checked as an array, so a whole import is
+validated in a fraction of a second. Issues are counted in full but only the
+first ones are kept.
 """
 
+import os
 import json
-from typing import List, Dict, Any, Set
+from collections import Counter
+from itertools import chain, islice
+from operator import methodcaller
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from services.catalog_schema import NUMERIC_ALIASES, PERCENT_ALIASES, VALID_RANGES, _to_number
+
+# Issues kept in a CatalogValidation; all issues are still counted
+CATALOG_MAX_ISSUES = int(os.getenv('CATALOG_MAX_ISSUES', '50'))
+
+ERROR = 'error'
+WARNING = 'warning'
+
+# Fields holding lists of names; normalization drops any other value
+LIST_FIELDS = ('fields', 'programs')
+
+
+class CatalogIssue(NamedTuple):
+    """One problem found in a catalog record"""
+    severity: str
+    check: str
+    field: str
+    position: int
+    university_id: Any
+    message: str
+
+    def __str__(self) -> str:
+        return f"University {self.position} (id {self.university_id!r}) {self.field}: {self.message}"
+
+
+class _Finding(NamedTuple):
+    """Positions failing one check, described lazily"""
+    severity: str
+    check: str
+    field: str
+    positions: np.ndarray
+    describe: Callable[[int], str]
+
+
+def _type_column(values: List[Any]) -> np.ndarray:
+    return np.fromiter(map(type, values), dtype=object, count=len(values))
+
+
+def _field_column(records: List[Dict[str, Any]], key: str) -> List[Any]:
+    return list(map(methodcaller('get', key), records))
+
+
+def _text_keys(values: List[Any]) -> List[Optional[str]]:
+    """Case-insensitive keys of text values, None for missing or blank text"""
+    return [(value.strip().casefold() or None) if value.__class__ is str else None for value in values]
+
+
+def _numeric_findings(records: List[Dict[str, Any]], field: str) -> Iterator[_Finding]:
+    """Type and range checks of one numeric field and its older spellings"""
+    low, high = VALID_RANGES[field]
+    for key in (field,) + NUMERIC_ALIASES[field]:
+        raw = _field_column(records, key)
+        types = _type_column(raw)
+        numbers = (types == int) | (types == float)
+        missing = types == type(None)
+        if not numbers.any() and missing.all():
+            continue
+
+        if (numbers | missing).all():
+            # Usual case: numbers and None only, converted in one call with None as NaN
+            column = np.array(raw, dtype=np.float64)
+        else:
+            column = np.full(len(raw), np.nan)
+            column[numbers] = np.fromiter(raw, dtype=object, count=len(raw))[numbers].astype(np.float64)
+
+            # Strings are rare; the ones normalization can convert are only worth a warning
+            converted, unusable = [], []
+            for position in np.flatnonzero(types == str):
+                if raw[position].strip() == '':
+                    continue
+                number = _to_number(raw[position])
+                if number is None:
+                    unusable.append(position)
+                else:
+                    converted.append(position)
+                    column[position] = number
+            unusable.extend(np.flatnonzero(~numbers & ~missing & (types != str)))
+
+            if unusable:
+                yield _Finding(ERROR, 'type', key, np.array(sorted(unusable)),
+                               lambda p, raw=raw: f"not a number: {raw[p]!r:.40}")
+            if converted:
+                yield _Finding(WARNING, 'numeric_string', key, np.array(converted),
+                               lambda p, raw=raw: f"numeric string {raw[p]!r:.40}")
+
+        if key in PERCENT_ALIASES:
+            column = column / 100
+        elif field == 'acceptance_rate':
+            percent = (column > 1) & (column <= 100)
+            if percent.any():
+                yield _Finding(WARNING, 'percentage', key, np.flatnonzero(percent),
+                               lambda p, raw=raw: f"percentage {raw[p]!r} where a fraction is expected")
+                column = np.where(percent, column / 100, column)
+
+        with np.errstate(invalid='ignore'):
+            outside = (column < low) | (column > high)
+        if outside.any():
+            scale = 100 if key in PERCENT_ALIASES else 1
+            yield _Finding(ERROR, 'range', key, np.flatnonzero(outside),
+                           lambda p, raw=raw, scale=scale: f"{raw[p]!r} outside {low * scale:g}-{high * scale:g}")
+
+
+def _duplicates(keys: Sequence[Any], ignore: Callable[[Any], bool] = lambda key: key is None) -> np.ndarray:
+    """Positions whose key occurs more than once, ignored keys excluded"""
+    repeated = {key for key, count in Counter(keys).items() if count > 1 and not ignore(key)}
+    if not repeated:
+        return np.array([], dtype=np.int64)
+    return np.array([position for position, key in enumerate(keys) if key in repeated], dtype=np.int64)
+
+
+def _catalog_findings(universities: List[Any]) -> Iterator[_Finding]:
+    not_objects = np.flatnonzero(_type_column(universities) != dict)
+    records = universities
+    if not_objects.size:
+        yield _Finding(ERROR, 'type', 'record', not_objects, lambda p: "not an object")
+        records = [university if isinstance(university, dict) else {} for university in universities]
+
+    # IDs: an int or a string, unique after digit strings become ints like in normalization
+    ids = _field_column(records, 'id')
+    types = _type_column(ids)
+    valid_ids = (types == int) | (types == str)
+    invalid = np.flatnonzero(~valid_ids)
+    invalid = invalid[~np.isin(invalid, not_objects)]
+    if invalid.size:
+        yield _Finding(ERROR, 'missing', 'id', invalid, lambda p: f"missing or invalid ID {ids[p]!r:.40}")
+    if (types == int).all():
+        id_keys = ids
+    else:
+        id_keys = [
+            (int(i) if t is str and i.strip().isdigit() else i) if ok else None
+            for i, t, ok in zip(ids, types, valid_ids)
+        ]
+    duplicate_ids = _duplicates(id_keys)
+    if duplicate_ids.size:
+        yield _Finding(ERROR, 'duplicate', 'id', duplicate_ids, lambda p: f"ID {ids[p]!r} is used more than once")
+
+    names = _field_column(records, 'name')
+    name_keys = _text_keys(names)
+    missing_names = np.setdiff1d(np.flatnonzero(np.equal(name_keys, None)), not_objects)
+    if missing_names.size:
+        yield _Finding(ERROR, 'missing', 'name', missing_names, lambda p: "missing name")
+
+    # Different universities share names across countries ("University of Newcastle")
+    countries = _field_column(records, 'country')
+    try:
+        # Few distinct countries: normalize each once
+        distinct = set(countries)
+        keys = dict(zip(distinct, _text_keys(list(distinct))))
+        country_keys = list(map(keys.__getitem__, countries))
+    except TypeError:  # unhashable values
+        country_keys = _text_keys(countries)
+    duplicate_names = _duplicates(list(zip(name_keys, country_keys)), ignore=lambda key: key[0] is None)
+    if duplicate_names.size:
+        yield _Finding(WARNING, 'duplicate', 'name', duplicate_names,
+                       lambda p: f"name {names[p]!r} appears more than once in {countries[p]!r}")
+
+    missing_countries = np.setdiff1d(np.flatnonzero(np.equal(country_keys, None)), not_objects)
+    if missing_countries.size:
+        yield _Finding(WARNING, 'missing', 'country', missing_countries, lambda p: "missing country")
+
+    for field in LIST_FIELDS:
+        values = _field_column(records, field)
+        types = _type_column(values)
+        not_lists = np.flatnonzero((types != list) & (types != tuple) & (types != type(None)))
+        if not_lists.size:
+            yield _Finding(ERROR, 'type', field, not_lists,
+                           lambda p, values=values: f"should be a list, got {values[p]!r:.40}")
+
+    for field in NUMERIC_ALIASES:
+        yield from _numeric_findings(records, field)
+
+
+class CatalogValidation:
+    """
+    Outcome of validate_catalog(): exact counts per check and field, and the
+    first issues (errors before warnings) up to a cap
+    """
+
+    def __init__(self, universities: List[Any], max_issues: Optional[int] = None):
+        self.total = len(universities)
+        self.max_issues = CATALOG_MAX_ISSUES if max_issues is None else max_issues
+        self._universities = universities
+        self._findings = sorted(_catalog_findings(universities), key=lambda finding: finding.severity != ERROR)
+
+        self.counts = Counter()
+        for finding in self._findings:
+            self.counts[(finding.severity, finding.check, finding.field)] += len(finding.positions)
+        self.errors = sum(count for (severity, _, _), count in self.counts.items() if severity == ERROR)
+        self.warnings = sum(count for (severity, _, _), count in self.counts.items() if severity == WARNING)
+        self.issues = list(islice(self.iter_issues(), self.max_issues))
+
+    @property
+    def is_valid(self) -> bool:
+        return self.errors == 0
+
+    def _issue(self, finding: _Finding, position: int) -> CatalogIssue:
+        university = self._universities[position]
+        university_id = university.get('id') if isinstance(university, dict) else None
+        return CatalogIssue(finding.severity, finding.check, finding.field, int(position),
+                            university_id, finding.describe(position))
+
+    def iter_issues(self, severity: Optional[str] = None) -> Iterator[CatalogIssue]:
+        """Every issue, built as it is consumed; errors come first"""
+        return chain.from_iterable(
+            (self._issue(finding, position) for position in finding.positions)
+            for finding in self._findings if severity is None or finding.severity == severity
+        )
+
+    def errors_at(self, positions: Sequence[int]) -> List[CatalogIssue]:
+        """Errors of the records at the given positions"""
+        positions = np.asarray(sorted(positions), dtype=np.int64)
+        return [
+            self._issue(finding, position)
+            for finding in self._findings if finding.severity == ERROR
+            for position in finding.positions[np.isin(finding.positions, positions)]
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'total_universities': self.total,
+            'errors': self.errors,
+            'warnings': self.warnings,
+            'is_valid': self.is_valid,
+            'counts': {f"{severity}:{check}:{field}": count for (severity, check, field), count in self.counts.items()}
+        }
+
+
+def validate_catalog(universities: List[Any], max_issues: Optional[int] = None) -> CatalogValidation:
+    """
+    Validate a whole catalog column by column.
+
+    Each field is pulled out of the records once and checked as an array:
+    types, the plausible ranges of services/catalog_schema.py (older
+    spellings and percentages included), and duplicate IDs and names by
+    hashing. Runs before every catalog write and snapshot swap.
+
+    Args:
+        universities (List[Any]): Raw catalog records as stored in universities.json
+        max_issues (Optional[int]): Issues kept in the result (CATALOG_MAX_ISSUES);
+            every issue is counted either way
+
+    Returns:
+        CatalogValidation: Counts, summary and the first issues
+    """
+    return CatalogValidation(universities, max_issues)
+
+
+def report_validation(validation: CatalogValidation, source: str = 'catalog', limit: int = 5) -> None:
+    """Print a short summary of a catalog validation, nothing when it is clean"""
+    if not validation.errors and not validation.warnings:
+        return
+    print(f"⚠️ {source}: {validation.errors} validation errors, {validation.warnings} warnings "
+          f"in {validation.total} universities")
+    for (severity, check, field), count in sorted(validation.counts.items()):
+        print(f"   {severity} {check} {field}: {count}")
+    for issue in validation.issues[:limit]:
+        print(f"   - {issue}")
 
 
 def validate_university_data(universities: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -17,68 +286,16 @@ def validate_university_data(universities: List[Dict[str, Any]]) -> Dict[str, An
         universities (List[Dict[str, Any]]): List of university dictionaries
         
     Returns:
-        Dict[str, Any]: Validation results with errors and warnings
+        Dict[str, Any]: Validation results with the first errors and warnings
+            (CATALOG_MAX_ISSUES each) and the full counts in 'summary'
     """
-    errors = []
-    warnings = []
-    
-    required_fields = [
-        'id', 'name', 'country', 'city', 'ranking', 'fields',
-        'tuition_fee', 'living_cost', 'application_fee', 'min_cgpa',
-        'min_gre', 'min_ielts', 'min_toefl', 'acceptance_rate',
-        'website', 'established', 'type', 'student_population',
-        'international_students'
-    ]
-    
-    seen_ids = set()
-    seen_names = set()
-    
-    for i, university in enumerate(universities):
-        # Check required fields
-        for field in required_fields:
-            if field not in university:
-                errors.append(f"University {i}: Missing required field '{field}'")
-            elif university[field] is None:
-                warnings.append(f"University {i} ({university.get('name', 'Unknown')}): Field '{field}' is None")
-        
-        # Check for duplicate IDs
-        uni_id = university.get('id')
-        if uni_id in seen_ids:
-            errors.append(f"University {i}: Duplicate ID {uni_id}")
-        else:
-            seen_ids.add(uni_id)
-        
-        # Check for duplicate names
-        uni_name = university.get('name')
-        if uni_name in seen_names:
-            warnings.append(f"University {i}: Duplicate name '{uni_name}'")
-        else:
-            seen_names.add(uni_name)
-        
-        # Validate data types and ranges
-        if 'tuition_fee' in university:
-            if not isinstance(university['tuition_fee'], (int, float)) or university['tuition_fee'] < 0:
-                errors.append(f"University {i} ({uni_name}): Invalid tuition_fee")
-        
-        if 'acceptance_rate' in university:
-            rate = university['acceptance_rate']
-            if not isinstance(rate, (int, float)) or rate < 0 or rate > 1:
-                errors.append(f"University {i} ({uni_name}): Invalid acceptance_rate (should be 0-1)")
-        
-        if 'min_cgpa' in university:
-            cgpa = university['min_cgpa']
-            if not isinstance(cgpa, (int, float)) or cgpa < 0 or cgpa > 4.0:
-                warnings.append(f"University {i} ({uni_name}): Unusual min_cgpa value: {cgpa}")
-        
-        if 'fields' in university:
-            if not isinstance(university['fields'], list):
-                errors.append(f"University {i} ({uni_name}): 'fields' should be a list")
-    
+    validation = validate_catalog(universities, max_issues=0)
     return {
-        'total_universities': len(universities),
-        'errors': errors,
-        'warnings': warnings,
-        'is_valid': len(errors) == 0
+        'total_universities': validation.total,
+        'errors': [str(issue) for issue in islice(validation.iter_issues(ERROR), CATALOG_MAX_ISSUES)],
+        'warnings': [str(issue) for issue in islice(validation.iter_issues(WARNING), CATALOG_MAX_ISSUES)],
+        'summary': validation.summary(),
+        'is_valid': validation.is_valid
     }
 
 
@@ -211,11 +428,12 @@ def validate_user_profile_data(profile: Dict[str, Any]) -> Dict[str, Any]:
 
 
 if __name__ == "__main__":
-    # Validate the universities.json file
-    import os
+    # Validate the universities.json file: python -m utils.data_validator [path]
+    import sys
     
-    data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'universities.json')
+    data_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), '..', 'data', 'universities.json')
     results = validate_university_json_file(data_path)
+    counts = results.get('summary', {})
     
     print("University Data Validation Results")
     print("=" * 40)
@@ -223,16 +441,19 @@ if __name__ == "__main__":
     print(f"Valid: {results['is_valid']}")
     
     if results['errors']:
-        print(f"\nErrors ({len(results['errors'])}):")
+        print(f"\nErrors ({counts.get('errors', len(results['errors']))}):")
         for error in results['errors']:
             print(f"  - {error}")
     
     if results['warnings']:
-        print(f"\nWarnings ({len(results['warnings'])}):")
+        print(f"\nWarnings ({counts.get('warnings', len(results['warnings']))}):")
         for warning in results['warnings']:
             print(f"  - {warning}")
     
+    for check, count in counts.get('counts', {}).items():
+        print(f"  {check}: {count}")
+    
     if results['is_valid']:
         print("\n✓ University data is valid!")
     else:
-        print("\n✗ University data has errors that need to be fixed.")
\ No newline at end of file
+        print("\n✗ University data has errors that need to be fixed.")
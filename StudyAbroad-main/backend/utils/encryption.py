@@ -4,13 +4,16 @@ Data encryption utilities for protecting sensitive user information
 
 import os
 import base64
+import struct
 import hashlib
 import secrets
-from typing import Optional, Union, Dict, Any
+import threading
+from typing import BinaryIO, Optional, Union, Dict, Any
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.backends import default_backend
 import json
 import logging
@@ -21,6 +24,18 @@ class EncryptionError(Exception):
     """Custom exception for encryption-related errors"""
     pass
 
+# Fernet tokens start with version byte 0x80, which base64-encodes to "gAAAAA".
+# Strings written before the single-encoding format are base64 of such a token.
+FERNET_TOKEN_PREFIX = 'gAAAAA'
+
+# Chunked file format: magic, version, chunk size, per-file salt, then frames of
+# (ciphertext length, final flag, AES-GCM ciphertext). Older files are one Fernet token.
+FILE_MAGIC = b'SAEF'
+FILE_FORMAT_VERSION = 2
+FILE_HEADER = struct.Struct('>4sBI16s')
+FRAME_HEADER = struct.Struct('>IB')
+GCM_TAG_SIZE = 16
+
 class DataEncryption:
     """Comprehensive data encryption utilities"""
     
@@ -38,24 +53,27 @@ class DataEncryption:
         
         self.key = key
         self.fernet = Fernet(key)
+        self.chunk_size = int(os.getenv('ENCRYPTION_CHUNK_SIZE', str(64 * 1024)))
     
     def encrypt_string(self, plaintext: str) -> str:
-        """Encrypt a string and return base64 encoded result"""
+        """Encrypt a string and return the Fernet token (already URL-safe base64)"""
         try:
             if not isinstance(plaintext, str):
                 plaintext = str(plaintext)
             
-            encrypted_data = self.fernet.encrypt(plaintext.encode())
-            return base64.b64encode(encrypted_data).decode()
+            return self.fernet.encrypt(plaintext.encode()).decode()
         except Exception as e:
             logger.error(f"Encryption failed: {str(e)}")
             raise EncryptionError(f"Failed to encrypt data: {str(e)}")
     
     def decrypt_string(self, encrypted_data: str) -> str:
-        """Decrypt base64 encoded encrypted data"""
+        """Decrypt a Fernet token, or the base64-wrapped token of older data"""
         try:
-            encrypted_bytes = base64.b64decode(encrypted_data.encode())
-            decrypted_data = self.fernet.decrypt(encrypted_bytes)
+            if encrypted_data.startswith(FERNET_TOKEN_PREFIX):
+                token = encrypted_data.encode()
+            else:
+                token = base64.b64decode(encrypted_data.encode())
+            decrypted_data = self.fernet.decrypt(token)
             return decrypted_data.decode()
         except Exception as e:
             logger.error(f"Decryption failed: {str(e)}")
@@ -80,18 +98,13 @@ class DataEncryption:
             raise EncryptionError(f"Failed to decrypt dictionary: {str(e)}")
     
     def encrypt_file(self, file_path: str, output_path: Optional[str] = None) -> str:
-        """Encrypt a file"""
+        """Encrypt a file chunk by chunk"""
         try:
             if output_path is None:
                 output_path = file_path + '.encrypted'
             
-            with open(file_path, 'rb') as file:
-                file_data = file.read()
-            
-            encrypted_data = self.fernet.encrypt(file_data)
-            
-            with open(output_path, 'wb') as encrypted_file:
-                encrypted_file.write(encrypted_data)
+            with open(file_path, 'rb') as source:
+                self._write_atomic(output_path, lambda target: self.encrypt_stream(source, target))
             
             return output_path
         except Exception as e:
@@ -99,23 +112,99 @@ class DataEncryption:
             raise EncryptionError(f"Failed to encrypt file: {str(e)}")
     
     def decrypt_file(self, encrypted_file_path: str, output_path: Optional[str] = None) -> str:
-        """Decrypt a file"""
+        """Decrypt a chunked file, or a single-token file written by older versions"""
         try:
             if output_path is None:
                 output_path = encrypted_file_path.replace('.encrypted', '')
             
-            with open(encrypted_file_path, 'rb') as encrypted_file:
-                encrypted_data = encrypted_file.read()
-            
-            decrypted_data = self.fernet.decrypt(encrypted_data)
-            
-            with open(output_path, 'wb') as file:
-                file.write(decrypted_data)
+            with open(encrypted_file_path, 'rb') as source:
+                self._write_atomic(output_path, lambda target: self.decrypt_stream(source, target))
             
             return output_path
         except Exception as e:
             logger.error(f"File decryption failed: {str(e)}")
             raise EncryptionError(f"Failed to decrypt file: {str(e)}")
+    
+    def encrypt_stream(self, source: BinaryIO, target: BinaryIO) -> int:
+        """Encrypt a binary stream into the chunked format, holding one chunk in memory"""
+        salt = secrets.token_bytes(16)
+        header = FILE_HEADER.pack(FILE_MAGIC, FILE_FORMAT_VERSION, self.chunk_size, salt)
+        aead = self._file_cipher(salt)
+        target.write(header)
+        
+        index = 0
+        chunk = source.read(self.chunk_size)
+        while True:
+            # Read one chunk ahead so the last one can be flagged as final
+            next_chunk = source.read(self.chunk_size) if len(chunk) == self.chunk_size else b''
+            final = not next_chunk
+            ciphertext = aead.encrypt(self._chunk_nonce(index), chunk, self._chunk_aad(header, index, final))
+            target.write(FRAME_HEADER.pack(len(ciphertext), final))
+            target.write(ciphertext)
+            if final:
+                return index + 1
+            chunk = next_chunk
+            index += 1
+    
+    def decrypt_stream(self, source: BinaryIO, target: BinaryIO) -> int:
+        """Decrypt a chunked or legacy single-token stream, returning bytes written"""
+        header = source.read(FILE_HEADER.size)
+        
+        if not header.startswith(FILE_MAGIC):
+            # Legacy format: the whole file is one Fernet token
+            plaintext = self.fernet.decrypt(header + source.read())
+            target.write(plaintext)
+            return len(plaintext)
+        
+        magic, version, chunk_size, salt = FILE_HEADER.unpack(header)
+        if version != FILE_FORMAT_VERSION:
+            raise EncryptionError(f"Unsupported encrypted file version: {version}")
+        
+        aead = self._file_cipher(salt)
+        written = 0
+        index = 0
+        while True:
+            frame = source.read(FRAME_HEADER.size)
+            if len(frame) < FRAME_HEADER.size:
+                raise EncryptionError("Encrypted file is truncated")
+            length, final = FRAME_HEADER.unpack(frame)
+            if length > chunk_size + GCM_TAG_SIZE:
+                raise EncryptionError("Encrypted file chunk is corrupt")
+            
+            # The final flag is authenticated, so dropped or reordered chunks fail here
+            chunk = aead.decrypt(self._chunk_nonce(index), source.read(length),
+                                 self._chunk_aad(header, index, bool(final)))
+            target.write(chunk)
+            written += len(chunk)
+            if final:
+                return written
+            index += 1
+    
+    def _file_cipher(self, salt: bytes) -> AESGCM:
+        """Per-file AES-256-GCM key derived from the Fernet key"""
+        hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=b'file-encryption-v2')
+        return AESGCM(hkdf.derive(base64.urlsafe_b64decode(self.key)))
+    
+    @staticmethod
+    def _chunk_nonce(index: int) -> bytes:
+        return b'\x00' * 4 + struct.pack('>Q', index)
+    
+    @staticmethod
+    def _chunk_aad(header: bytes, index: int, final: bool) -> bytes:
+        return header + struct.pack('>QB', index, final)
+    
+    @staticmethod
+    def _write_atomic(output_path: str, write):
+        """Run write(file) against a temp file and move it into place on success"""
+        temp_path = output_path + '.tmp'
+        try:
+            with open(temp_path, 'wb') as target:
+                write(target)
+            os.replace(temp_path, output_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
 
 class FieldEncryption:
     """Field-level encryption for database columns"""
@@ -147,44 +236,10 @@ class FieldEncryption:
             return None
 
 class PasswordSecurity:
-    """Enhanced password security utilities"""
-    
-    @staticmethod
-    def generate_salt(length: int = 32) -> str:
-        """Generate a random salt"""
-        return secrets.token_hex(length)
-    
-    @staticmethod
-    def hash_password_pbkdf2(password: str, salt: Optional[str] = None, iterations: int = 100000) -> tuple:
-        """Hash password using PBKDF2"""
-        if salt is None:
-            salt = PasswordSecurity.generate_salt()
-        
-        if isinstance(salt, str):
-            salt_bytes = salt.encode()
-        else:
-            salt_bytes = salt
-        
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt_bytes,
-            iterations=iterations,
-            backend=default_backend()
-        )
-        
-        password_hash = base64.b64encode(kdf.derive(password.encode())).decode()
-        return password_hash, salt
-    
-    @staticmethod
-    def verify_password_pbkdf2(password: str, password_hash: str, salt: str, iterations: int = 100000) -> bool:
-        """Verify password against PBKDF2 hash"""
-        try:
-            computed_hash, _ = PasswordSecurity.hash_password_pbkdf2(password, salt, iterations)
-            return secrets.compare_digest(computed_hash, password_hash)
-        except Exception as e:
-            logger.error(f"Password verification failed: {str(e)}")
-            return False
+    """Password utilities that are not tied to hash storage.
+
+    Hashing and verification go through utils.password_policy.password_policy.
+    """
     
     @staticmethod
     def generate_secure_password(length: int = 16) -> str:
@@ -258,16 +313,15 @@ class DataAnonymization:
 class SecureStorage:
     """Secure storage utilities"""
     
-    def __init__(self, storage_path: str = "secure_storage"):
+    def __init__(self, storage_path: str = "secure_storage", encryptor: Optional[DataEncryption] = None):
         self.storage_path = storage_path
-        self.encryptor = DataEncryption()
-        
-        # Create storage directory if it doesn't exist
-        os.makedirs(storage_path, exist_ok=True)
+        self.encryptor = encryptor or DataEncryption()
     
     def store_encrypted(self, key: str, data: Any) -> bool:
         """Store data encrypted"""
         try:
+            # Create storage directory on first write
+            os.makedirs(self.storage_path, exist_ok=True)
             file_path = os.path.join(self.storage_path, f"{key}.enc")
             
             if isinstance(data, dict):
@@ -313,19 +367,66 @@ class SecureStorage:
             logger.error(f"Secure deletion failed: {str(e)}")
             return False
 
-# Global instances
-default_encryptor = DataEncryption()
-field_encryptor = FieldEncryption()
-secure_storage = SecureStorage()
+# Global instances, built on first use so importing this module has no side effects
+_instances = {}
+_instances_lock = threading.RLock()  # factories call other accessors
+
+def _get_instance(name: str, factory):
+    instance = _instances.get(name)
+    if instance is None:
+        with _instances_lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = _instances[name] = factory()
+    return instance
+
+def _load_encryption_key() -> bytes:
+    from config import Config
+    if Config.ENCRYPTION_KEY:
+        return Config.ENCRYPTION_KEY.encode()
+    # One key per process, so every global instance can read what the others wrote
+    logger.warning("No encryption key provided, generated new key")
+    return Fernet.generate_key()
+
+def get_encryption_key() -> bytes:
+    """Encryption key from config, loaded once per process"""
+    return _get_instance('encryption_key', _load_encryption_key)
+
+def get_default_encryptor() -> DataEncryption:
+    """Shared DataEncryption instance"""
+    return _get_instance('default_encryptor', lambda: DataEncryption(get_encryption_key()))
+
+def get_field_encryptor() -> FieldEncryption:
+    """Shared FieldEncryption instance"""
+    return _get_instance('field_encryptor', lambda: FieldEncryption(get_encryption_key()))
+
+def get_secure_storage() -> SecureStorage:
+    """Shared SecureStorage instance"""
+    def build():
+        from config import Config
+        return SecureStorage(Config.SECURE_STORAGE_PATH, get_default_encryptor())
+    return _get_instance('secure_storage', build)
+
+_LAZY_GLOBALS = {
+    'default_encryptor': get_default_encryptor,
+    'field_encryptor': get_field_encryptor,
+    'secure_storage': get_secure_storage
+}
+
+def __getattr__(name: str):
+    """Keep `from utils.encryption import secure_storage` working, built on first access"""
+    if name in _LAZY_GLOBALS:
+        return _LAZY_GLOBALS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Utility functions
 def encrypt_sensitive_data(data: str) -> str:
     """Encrypt sensitive data using default encryptor"""
-    return default_encryptor.encrypt_string(data)
+    return get_default_encryptor().encrypt_string(data)
 
 def decrypt_sensitive_data(encrypted_data: str) -> str:
     """Decrypt sensitive data using default encryptor"""
-    return default_encryptor.decrypt_string(encrypted_data)
+    return get_default_encryptor().decrypt_string(encrypted_data)
 
 def generate_encryption_key() -> bytes:
     """Generate a new encryption key"""
@@ -334,6 +435,8 @@ def generate_encryption_key() -> bytes:
 def is_encrypted(data: str) -> bool:
     """Check if data appears to be encrypted"""
     try:
+        if data.startswith(FERNET_TOKEN_PREFIX):
+            return len(data) > 50
         # Try to decode as base64
         base64.b64decode(data)
         # If it's valid base64 and has the right length, it might be encrypted
@@ -0,0 +1,423 @@
+"""
+Concurrent, rate-limited HTTP fetching for catalog enrichment jobs
+
+Enrichment scripts (websites, logos, fee lists) used to fetch one URL after
+another. FetchPipeline runs the fetches on a thread pool over one pooled
+requests session:
+
+    - requests to the same host are spaced by SCRAPING_DELAY seconds, while
+      different hosts are fetched in parallel. Tasks wait in per-host queues
+      and only reach a worker once their host's slot is free, so a host with
+      many URLs never holds workers that other hosts could use
+    - connection errors, 429 and 5xx responses are retried MAX_RETRIES times
+      with exponential backoff, honouring Retry-After; a task waiting for its
+      retry doesn't hold a worker either
+    - responses are cached on disk, so a rerun only fetches what expired
+    - every finished task is appended to a checkpoint file, so an interrupted
+      run resumes with the tasks it had not finished
+
+Nothing here knows about universities; a job turns catalog records into
+FetchTasks and each response into a JSON-serializable value.
+"""
+
+import os
+import json
+import time
+import random
+import heapq
+import hashlib
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from itertools import count
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+FETCH_WORKERS = int(os.getenv('FETCH_WORKERS', '16'))
+FETCH_TIMEOUT = float(os.getenv('FETCH_TIMEOUT', '10'))
+FETCH_CACHE_DIR = os.getenv('FETCH_CACHE_DIR', os.path.join('data', 'fetch_cache'))
+FETCH_CACHE_TTL = int(os.getenv('FETCH_CACHE_TTL', str(7 * 24 * 3600)))
+# First retry waits this long, doubling on every further attempt
+FETCH_BACKOFF = float(os.getenv('FETCH_BACKOFF', '0.5'))
+MAX_BACKOFF = 60.0
+
+USER_AGENT = 'StudyAbroad-catalog-enrichment/1.0'
+
+# Statuses worth another attempt
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchTask(NamedTuple):
+    """One URL to fetch; key identifies the task in the checkpoint and results"""
+    key: str
+    url: str
+    method: str = 'GET'
+
+
+class FetchResult(NamedTuple):
+    """Response of a fetch; status is None when no response was received, header names are lowercase"""
+    url: str
+    status: Optional[int] = None
+    headers: Dict[str, str] = {}
+    body: bytes = b''
+    final_url: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    from_cache: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status is not None and self.status < 400
+
+    @property
+    def retryable(self) -> bool:
+        """No response or a temporary failure, worth trying again later"""
+        return self.status is None or self.status in RETRY_STATUSES
+
+    def text(self, limit: Optional[int] = None) -> str:
+        body = self.body if limit is None else self.body[:limit]
+        return body.decode('utf-8', 'replace')
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+class HostRateLimiter:
+    """Minimum interval between the starts of requests to the same host"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str) -> float:
+        """Take the host's slot if it is free, else return the seconds until it is"""
+        if self.delay <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            slot = self._next_slot.get(host, now)
+            if slot > now:
+                return slot - now
+            self._next_slot[host] = now + self.delay
+            return 0.0
+
+    def wait(self, url: str) -> None:
+        """Sleep until the host's slot is free and take it"""
+        host = _host(url)
+        while True:
+            remaining = self.acquire(host)
+            if not remaining:
+                return
+            time.sleep(remaining)
+
+
+class ResponseCache:
+    """On-disk response cache, one metadata and one body file per URL"""
+
+    def __init__(self, cache_dir: str, ttl: int):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+
+    def _paths(self, method: str, url: str):
+        digest = hashlib.sha1(f"{method} {url}".encode()).hexdigest()
+        base = os.path.join(self.cache_dir, digest[:2], digest)
+        return base + '.json', base + '.body'
+
+    def get(self, method: str, url: str) -> Optional[FetchResult]:
+        meta_path, body_path = self._paths(method, url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as file:
+                meta = json.load(file)
+            if time.time() - meta['fetched_at'] > self.ttl:
+                return None
+            with open(body_path, 'rb') as file:
+                body = file.read()
+        except (OSError, ValueError, KeyError):
+            return None
+        return FetchResult(url, meta['status'], meta['headers'], body, meta['final_url'], from_cache=True)
+
+    def put(self, method: str, result: FetchResult) -> None:
+        meta_path, body_path = self._paths(method, result.url)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        # Body before metadata: a metadata file always has its body
+        for path, data, mode in (
+            (body_path, result.body, 'wb'),
+            (meta_path, json.dumps({
+                'status': result.status,
+                'headers': result.headers,
+                'final_url': result.final_url,
+                'fetched_at': time.time()
+            }), 'w')
+        ):
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, mode) as file:
+                file.write(data)
+            os.replace(temp_path, path)
+
+
+class Checkpoint:
+    """
+    Append-only log of finished task keys and their values
+
+    Each finished task is one JSON line, flushed as it is written. A partial
+    last line from a crash is ignored when the file is loaded.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, Any]:
+        done = {}
+        if not self.path or not os.path.exists(self.path):
+            return done
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                done[entry['key']] = entry['value']
+        return done
+
+    def append(self, key: str, value: Any) -> None:
+        if not self.path:
+            return
+        line = json.dumps({'key': key, 'value': value}, ensure_ascii=False) + '\n'
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(line)
+                file.flush()
+
+    def clear(self) -> None:
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds from a Retry-After header, given as seconds or an HTTP date"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class FetchPipeline:
+    """Thread pool of rate-limited, retried and cached HTTP fetches"""
+
+    def __init__(self, workers: Optional[int] = None, delay: Optional[float] = None,
+                 max_retries: Optional[int] = None, backoff: Optional[float] = None,
+                 timeout: Optional[float] = None, cache_dir: Optional[str] = FETCH_CACHE_DIR,
+                 cache_ttl: Optional[int] = None, checkpoint_path: Optional[str] = None):
+        """
+        Args:
+            workers: Concurrent fetches (FETCH_WORKERS)
+            delay: Seconds between requests to the same host (Config.SCRAPING_DELAY)
+            max_retries: Retries after the first attempt (Config.MAX_RETRIES)
+            backoff: First retry delay in seconds, doubled per retry (FETCH_BACKOFF)
+            timeout: Connect and read timeout per request (FETCH_TIMEOUT)
+            cache_dir: Response cache directory, None to disable the cache
+            cache_ttl: Seconds a cached response stays valid (FETCH_CACHE_TTL)
+            checkpoint_path: Checkpoint file that makes run() resumable, None to disable
+        """
+        self.workers = workers or FETCH_WORKERS
+        self.max_retries = Config.MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = FETCH_BACKOFF if backoff is None else backoff
+        self.timeout = timeout or FETCH_TIMEOUT
+        self.rate_limiter = HostRateLimiter(Config.SCRAPING_DELAY if delay is None else delay)
+        self.cache = ResponseCache(cache_dir, FETCH_CACHE_TTL if cache_ttl is None else cache_ttl) if cache_dir else None
+        self.checkpoint = Checkpoint(checkpoint_path)
+
+        # One pool of keep-alive connections per host, shared by the workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = USER_AGENT
+
+        self.stats = {'fetched': 0, 'cached': 0, 'retried': 0, 'failed': 0, 'resumed': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, stat: str) -> None:
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def fetch(self, url: str, method: str = 'GET') -> FetchResult:
+        """Fetch a URL through the cache, rate limiter and retries"""
+        if self.cache:
+            cached = self.cache.get(method, url)
+            if cached is not None:
+                self._count('cached')
+                return cached
+
+        attempt = 0
+        while True:
+            attempt += 1
+            self.rate_limiter.wait(url)
+            result, retry_wait = self._attempt(url, method, attempt)
+            if retry_wait is None:
+                return self._finish(method, result)
+            self._count('retried')
+            time.sleep(retry_wait)
+
+    def _attempt(self, url: str, method: str, attempt: int) -> Tuple[FetchResult, Optional[float]]:
+        """One request; returns the result and the wait before a retry, None when the result is final"""
+        retry_wait = None
+        try:
+            response = self.session.request(method, url, timeout=self.timeout, allow_redirects=True)
+        except requests.RequestException as e:
+            result = FetchResult(url, error=str(e), attempts=attempt)
+        else:
+            headers = {name.lower(): value for name, value in response.headers.items()}
+            result = FetchResult(url, response.status_code, headers, response.content, response.url, attempts=attempt)
+            if response.status_code in RETRY_STATUSES:
+                retry_wait = _retry_after(response)
+
+        if not result.retryable or attempt > self.max_retries:
+            return result, None
+        if retry_wait is None:
+            # Exponential backoff with jitter so workers don't retry in lockstep
+            retry_wait = self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+        return result, min(retry_wait, MAX_BACKOFF)
+
+    def _finish(self, method: str, result: FetchResult) -> FetchResult:
+        if result.retryable:
+            self._count('failed')
+            logger.warning(f"Giving up on {result.url} after {result.attempts} attempts: {result.error or result.status}")
+        else:
+            self._count('fetched')
+            if self.cache:
+                self.cache.put(method, result)
+        return result
+
+    def run(self, tasks: Iterable[FetchTask], handle: Callable[[FetchTask, FetchResult], Any],
+            progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Fetch every task concurrently and turn each response into a value
+
+        The calling thread schedules: a task goes to a worker once its host's
+        slot is free, and a task due for a retry waits in a timer queue. A
+        worker runs one request at a time and never sleeps.
+
+        Args:
+            tasks: Tasks with unique keys
+            handle: Called with each task and its FetchResult, returns a
+                JSON-serializable value for the task; it runs on the worker
+                threads. Tasks whose fetch failed after all retries or whose
+                handler raised are not checkpointed, so the next run tries
+                them again
+            progress_callback: Called with (finished, total) after each task
+
+        Returns:
+            Values by task key, including those of a previous interrupted run
+        """
+        tasks = list(tasks)
+        results = self.checkpoint.load()
+        pending = [task for task in tasks if task.key not in results]
+        with self._stats_lock:
+            self.stats['resumed'] += len(tasks) - len(pending)
+        if len(pending) < len(tasks):
+            logger.info(f"Resuming: {len(tasks) - len(pending)} of {len(tasks)} tasks already done")
+
+        def work(task: FetchTask, attempt: int, cached: Optional[FetchResult]):
+            if cached is not None:
+                return cached, None, handle(task, cached)
+            result, retry_wait = self._attempt(task.url, task.method, attempt)
+            if retry_wait is not None:
+                return result, retry_wait, None
+            return self._finish(task.method, result), None, handle(task, result)
+
+        queues = {}      # host -> deque of (task, attempt), non-empty while the host is in ready
+        ready = []       # heap of (time the host's slot may be free, host)
+        retries = []     # heap of (time the retry is due, sequence, task, attempt)
+        sequence = count()
+        in_flight = {}   # future -> task
+
+        finished = len(tasks) - len(pending)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='fetch') as executor:
+            for task in pending:
+                cached = self.cache.get(task.method, task.url) if self.cache else None
+                if cached is not None:
+                    # Cache hits don't need a host slot
+                    self._count('cached')
+                    in_flight[executor.submit(work, task, 1, cached)] = task
+                    continue
+                host = _host(task.url)
+                if host not in queues:
+                    queues[host] = deque()
+                    ready.append((0.0, host))
+                queues[host].append((task, 1))
+
+            while ready or retries or in_flight:
+                now = time.monotonic()
+
+                while retries and retries[0][0] <= now:
+                    _, _, task, attempt = heapq.heappop(retries)
+                    host = _host(task.url)
+                    queue = queues.setdefault(host, deque())
+                    if not queue:
+                        heapq.heappush(ready, (now, host))
+                    # Retries go first, their task has waited longest
+                    queue.appendleft((task, attempt))
+
+                while ready and ready[0][0] <= now and len(in_flight) < self.workers:
+                    _, host = heapq.heappop(ready)
+                    slot_wait = self.rate_limiter.acquire(host)
+                    if slot_wait:
+                        heapq.heappush(ready, (now + slot_wait, host))
+                        continue
+                    task, attempt = queues[host].popleft()
+                    in_flight[executor.submit(work, task, attempt, None)] = task
+                    if queues[host]:
+                        heapq.heappush(ready, (now + self.rate_limiter.delay, host))
+
+                # Sleep until a request finishes, a host's slot frees up or a retry is due
+                due = [retries[0][0]] if retries else []
+                if ready and len(in_flight) < self.workers:
+                    due.append(ready[0][0])
+                timeout = max(min(due) - now, 0.0) if due else None
+                if not in_flight:
+                    time.sleep(timeout)
+                    continue
+
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = in_flight.pop(future)
+                    try:
+                        result, retry_wait, value = future.result()
+                    except Exception as e:
+                        logger.error(f"Fetch task {task.key} failed: {str(e)}")
+                    else:
+                        if retry_wait is not None:
+                            self._count('retried')
+                            heapq.heappush(retries, (time.monotonic() + retry_wait, next(sequence), task, result.attempts + 1))
+                            continue
+                        results[task.key] = value
+                        if not result.retryable:
+                            self.checkpoint.append(task.key, value)
+                    finished += 1
+                    if progress_callback:
+                        progress_callback(finished, len(tasks))
+
+        return {task.key: results[task.key] for task in tasks if task.key in results}
+
+    def close(self) -> None:
+        self.session.close()
@@ -5,16 +5,56 @@ GDPR Compliance utilities for data protection and privacy
 import os
 import json
 import logging
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
-from sqlalchemy import text
-from models import get_db_session, User
-from utils.encryption import DataAnonymization, secure_storage
+from sqlalchemy import String, cast, literal, update
+from models import (
+    get_db_session, User, Bookmark, UserPreference, SearchHistory,
+    RecommendationSession, RecommendationResult, AdmissionPrediction
+)
+from utils.encryption import DataAnonymization, get_secure_storage
+from utils.record_log import EncryptedRecordLog
 
 logger = logging.getLogger(__name__)
 
+# Email domain given to anonymized users, by erasure requests and the retention job alike
+ANONYMIZED_EMAIL_SUFFIX = '@anonymized.invalid'
+
+# Streaming export formats and their content types
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json'
+}
+
+# Per-user tables included in a data export, in output order
+EXPORT_TABLES = (
+    ('bookmarks', Bookmark),
+    ('preferences', UserPreference),
+    ('search_history', SearchHistory),
+    ('recommendation_sessions', RecommendationSession),
+    ('recommendation_results', RecommendationResult),
+    ('admission_predictions', AdmissionPrediction)
+)
+
+
+def anonymized_email(user_id: int) -> str:
+    """Address that replaces an anonymized user's email"""
+    return f"anon_{user_id}{ANONYMIZED_EMAIL_SUFFIX}"
+
+
+def anonymized_email_sql():
+    """anonymized_email() as a SQL expression over User.id, for bulk updates"""
+    return literal('anon_') + cast(User.id, String) + literal(ANONYMIZED_EMAIL_SUFFIX)
+
+
+def is_anonymized_sql():
+    """SQL filter matching users that have been anonymized"""
+    return User.email.endswith(ANONYMIZED_EMAIL_SUFFIX)
+
+
 class DataProcessingPurpose(Enum):
     """GDPR data processing purposes"""
     ACCOUNT_MANAGEMENT = "account_management"
@@ -77,6 +117,47 @@ class GDPRCompliance:
     def __init__(self):
         self.data_retention_days = int(os.getenv('DATA_RETENTION_DAYS', '365'))
         self.anonymization_enabled = os.getenv('DATA_ANONYMIZATION_ENABLED', 'true').lower() == 'true'
+        
+        # Processing and consent logs are opened on first use
+        self._processing_log = None
+        self._consent_log = None
+        self._logs_lock = threading.Lock()
+        
+        # Retention job settings
+        self.cleanup_chunk_size = int(os.getenv('GDPR_CLEANUP_CHUNK_SIZE', '500'))
+        self._cleanup_checkpoint_path = os.getenv('GDPR_CLEANUP_CHECKPOINT')
+        
+        # Streaming export settings
+        self.export_batch_size = int(os.getenv('GDPR_EXPORT_BATCH_SIZE', '500'))
+        self.export_chunk_bytes = int(os.getenv('GDPR_EXPORT_CHUNK_BYTES', '65536'))
+    
+    @property
+    def processing_log(self) -> EncryptedRecordLog:
+        """Segmented append-only log of processing records"""
+        if self._processing_log is None:
+            with self._logs_lock:
+                if self._processing_log is None:
+                    self._processing_log = self._open_record_log('processing')
+        return self._processing_log
+    
+    @property
+    def consent_log(self) -> EncryptedRecordLog:
+        """Segmented append-only log of consent records"""
+        if self._consent_log is None:
+            with self._logs_lock:
+                if self._consent_log is None:
+                    self._consent_log = self._open_record_log('consent')
+        return self._consent_log
+    
+    @property
+    def cleanup_checkpoint_path(self) -> str:
+        return self._cleanup_checkpoint_path or os.path.join(
+            get_secure_storage().storage_path, 'retention_checkpoint.json'
+        )
+    
+    def _open_record_log(self, name: str) -> EncryptedRecordLog:
+        storage = get_secure_storage()
+        return EncryptedRecordLog(name, os.path.join(storage.storage_path, 'gdpr_log'), storage.encryptor)
     
     def record_data_processing(self, user_id: int, purpose: DataProcessingPurpose, 
                              data_categories: List[str], legal_basis: str,
@@ -96,9 +177,8 @@ class GDPRCompliance:
                 third_parties=third_parties or []
             )
             
-            # Store processing record
-            key = f"processing_record_{user_id}_{datetime.utcnow().timestamp()}"
-            return secure_storage.store_encrypted(key, record.to_dict())
+            self.processing_log.append(user_id, record.to_dict(), record.processing_date)
+            return True
             
         except Exception as e:
             logger.error(f"Failed to record data processing: {str(e)}")
@@ -108,18 +188,13 @@ class GDPRCompliance:
         """Get all processing records for a user"""
         try:
             records = []
-            storage_path = secure_storage.storage_path
             
-            for filename in os.listdir(storage_path):
-                if filename.startswith(f"processing_record_{user_id}_") and filename.endswith('.enc'):
-                    key = filename.replace('.enc', '')
-                    record_data = secure_storage.retrieve_encrypted(key, as_dict=True)
-                    if record_data:
-                        # Convert back to DataProcessingRecord
-                        record_data['purpose'] = DataProcessingPurpose(record_data['purpose'])
-                        record_data['consent_status'] = ConsentStatus(record_data['consent_status'])
-                        record_data['processing_date'] = datetime.fromisoformat(record_data['processing_date'])
-                        records.append(DataProcessingRecord(**record_data))
+            for record_data in self.processing_log.read_user(user_id):
+                # Convert back to DataProcessingRecord
+                record_data['purpose'] = DataProcessingPurpose(record_data['purpose'])
+                record_data['consent_status'] = ConsentStatus(record_data['consent_status'])
+                record_data['processing_date'] = datetime.fromisoformat(record_data['processing_date'])
+                records.append(DataProcessingRecord(**record_data))
             
             return sorted(records, key=lambda x: x.processing_date, reverse=True)
             
@@ -141,8 +216,8 @@ class GDPRCompliance:
                 'user_agent': 'recorded'   # In real implementation, get from request
             }
             
-            key = f"consent_{user_id}_{purpose.value}_{datetime.utcnow().timestamp()}"
-            return secure_storage.store_encrypted(key, consent_record)
+            self.consent_log.append(user_id, consent_record)
+            return True
             
         except Exception as e:
             logger.error(f"Failed to record consent: {str(e)}")
@@ -151,15 +226,7 @@ class GDPRCompliance:
     def get_user_consent_history(self, user_id: int) -> List[Dict[str, Any]]:
         """Get consent history for a user"""
         try:
-            consent_history = []
-            storage_path = secure_storage.storage_path
-            
-            for filename in os.listdir(storage_path):
-                if filename.startswith(f"consent_{user_id}_") and filename.endswith('.enc'):
-                    key = filename.replace('.enc', '')
-                    consent_data = secure_storage.retrieve_encrypted(key, as_dict=True)
-                    if consent_data:
-                        consent_history.append(consent_data)
+            consent_history = self.consent_log.read_user(user_id)
             
             return sorted(consent_history, key=lambda x: x['timestamp'], reverse=True)
             
@@ -218,6 +285,121 @@ class GDPRCompliance:
             logger.error(f"Failed to export user data: {str(e)}")
             return None
     
+    def stream_user_data(self, user_id: int, export_format: str = 'ndjson') -> Optional[Iterator[str]]:
+        """Stream a user's data export section by section (Right to Data Portability)
+        
+        Rows come from database cursors and the record logs one at a time, so
+        memory stays bounded however much history the user has. 'ndjson'
+        yields one {"section": ..., "data": ...} line per row, 'json' yields a
+        single JSON document in pieces. Returns None when the user does not exist.
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        
+        session = next(get_db_session())
+        try:
+            user = session.query(User).filter_by(id=user_id).first()
+        except Exception:
+            session.close()
+            raise
+        
+        if not user:
+            session.close()
+            return None
+        
+        # Log the export request
+        self.record_data_processing(
+            user_id=user_id,
+            purpose=DataProcessingPurpose.LEGAL_COMPLIANCE,
+            data_categories=['personal_data'] + [name for name, _ in EXPORT_TABLES] +
+                            ['processing_records', 'consent_history'],
+            legal_basis='GDPR Article 20 - Right to Data Portability'
+        )
+        
+        return self._buffer_chunks(self._generate_export(session, user, export_format))
+    
+    def write_user_data_export(self, user_id: int, output_path: str, export_format: str = 'ndjson') -> bool:
+        """Stream a user's data export into a file"""
+        stream = self.stream_user_data(user_id, export_format)
+        if stream is None:
+            return False
+        
+        temp_path = output_path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for chunk in stream:
+                    f.write(chunk)
+            os.replace(temp_path, output_path)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to write user data export: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+    
+    def _export_sections(self, session, user) -> Iterator[Tuple[str, Iterable[Dict[str, Any]]]]:
+        """(section name, row iterator) pairs after personal_data"""
+        for name, model in EXPORT_TABLES:
+            rows = (
+                session.query(model)
+                .filter(model.user_id == user.id)
+                .order_by(model.id)
+                .yield_per(self.export_batch_size)
+            )
+            yield name, (row.to_dict() for row in rows)
+        
+        yield 'processing_records', self.processing_log.iter_user(user.id)
+        yield 'consent_history', self.consent_log.iter_user(user.id)
+    
+    def _generate_export(self, session, user, export_format: str) -> Iterator[str]:
+        try:
+            header = {
+                'user_id': user.id,
+                'export_date': datetime.utcnow().isoformat(),
+                'format': export_format
+            }
+            personal_data = user.to_dict()
+            
+            if export_format == 'ndjson':
+                yield json.dumps({'section': 'export', 'data': header}) + '\n'
+                yield json.dumps({'section': 'personal_data', 'data': personal_data}, default=str) + '\n'
+                for name, rows in self._export_sections(session, user):
+                    for row in rows:
+                        yield json.dumps({'section': name, 'data': row}, default=str) + '\n'
+                return
+            
+            yield '{' + json.dumps(header)[1:-1]
+            yield ', "personal_data": ' + json.dumps(personal_data, default=str)
+            for name, rows in self._export_sections(session, user):
+                yield f', {json.dumps(name)}: ['
+                separator = ''
+                for row in rows:
+                    yield separator + json.dumps(row, default=str)
+                    separator = ', '
+                yield ']'
+            yield '}\n'
+            
+        finally:
+            session.close()
+    
+    def _buffer_chunks(self, pieces: Iterator[str]) -> Iterator[str]:
+        """Join small pieces into chunks of about export_chunk_bytes"""
+        buffer = []
+        size = 0
+        try:
+            for piece in pieces:
+                buffer.append(piece)
+                size += len(piece)
+                if size >= self.export_chunk_bytes:
+                    yield ''.join(buffer)
+                    buffer = []
+                    size = 0
+            if buffer:
+                yield ''.join(buffer)
+        finally:
+            # Closes the database session when a client disconnects mid-stream
+            pieces.close()
+    
     def anonymize_user_data(self, user_id: int) -> bool:
         """Anonymize user data (Right to be Forgotten)"""
         if not self.anonymization_enabled:
@@ -234,7 +416,7 @@ class GDPRCompliance:
                 
                 # Anonymize user data
                 original_email = user.email
-                user.email = DataAnonymization.anonymize_email(user.email)
+                user.email = anonymized_email(user.id)
                 
                 # Add anonymization fields if they exist
                 if hasattr(user, 'first_name') and user.first_name:
@@ -311,50 +493,187 @@ class GDPRCompliance:
     def _delete_user_records(self, user_id: int):
         """Delete user processing records and consent history"""
         try:
-            storage_path = secure_storage.storage_path
-            
-            for filename in os.listdir(storage_path):
-                if (filename.startswith(f"processing_record_{user_id}_") or 
-                    filename.startswith(f"consent_{user_id}_")) and filename.endswith('.enc'):
-                    key = filename.replace('.enc', '')
-                    secure_storage.delete_encrypted(key)
-                    
+            self.processing_log.delete_user(user_id)
+            self.consent_log.delete_user(user_id)
         except Exception as e:
             logger.error(f"Failed to delete user records: {str(e)}")
     
     def cleanup_expired_data(self) -> int:
         """Clean up expired data based on retention policy"""
-        try:
-            cleanup_count = 0
+        return self.run_retention_job()['users_anonymized']
+    
+    def run_retention_job(self, dry_run: bool = False, chunk_size: Optional[int] = None,
+                          progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """Anonymize expired users in chunks and drop expired record segments
+        
+        Each chunk is one set-based UPDATE committed on its own, followed by a
+        checkpoint, so a crashed run resumes after the last committed chunk
+        with the same cutoff. A dry run only returns the counts. With
+        DATA_ANONYMIZATION_ENABLED=false nothing is changed.
+        """
+        chunk_size = chunk_size or self.cleanup_chunk_size
+        checkpoint = self._load_retention_checkpoint()
+        
+        if checkpoint and not dry_run:
+            cutoff_date = datetime.fromisoformat(checkpoint['cutoff_date'])
+            last_id = checkpoint['last_id']
+            anonymized = checkpoint['users_anonymized']
+            logger.info(f"Resuming retention job after user {last_id} ({anonymized} already anonymized)")
+        else:
             cutoff_date = datetime.utcnow() - timedelta(days=self.data_retention_days)
-            
+            last_id = 0
+            anonymized = 0
+        
+        summary = {
+            'dry_run': dry_run,
+            'cutoff_date': cutoff_date.isoformat(),
+            'users_expired': 0,
+            'users_anonymized': anonymized,
+            'processing_segments_expired': len(self.processing_log.expired_segments(cutoff_date)),
+            'consent_segments_expired': len(self.consent_log.expired_segments(cutoff_date))
+        }
+        
+        try:
             session = next(get_db_session())
             
             try:
-                # Find users with expired data
-                expired_users_query = text("""
-                    SELECT id FROM users 
-                    WHERE created_at < :cutoff_date 
-                    AND (is_anonymized IS NULL OR is_anonymized = FALSE)
-                """)
-                
-                result = session.execute(expired_users_query, {'cutoff_date': cutoff_date})
-                expired_user_ids = [row[0] for row in result.fetchall()]
-                
-                # Anonymize expired user data
-                for user_id in expired_user_ids:
-                    if self.anonymize_user_data(user_id):
-                        cleanup_count += 1
-                
-                logger.info(f"Cleaned up {cleanup_count} expired user records")
-                return cleanup_count
+                summary['users_expired'] = self._expired_users_query(session, cutoff_date, last_id).count()
+                if dry_run:
+                    return summary
+                
+                # Anonymization can't be undone, so the operator setting wins over retention
+                if not self.anonymization_enabled:
+                    logger.warning("Data anonymization is disabled")
+                    summary['users_anonymized'] = 0
+                    return summary
+                
+                total = anonymized + summary['users_expired']
+                
+                while True:
+                    user_ids = [
+                        row[0] for row in
+                        self._expired_users_query(session, cutoff_date, last_id)
+                        .with_entities(User.id).order_by(User.id).limit(chunk_size)
+                    ]
+                    if not user_ids:
+                        break
+                    
+                    try:
+                        session.execute(
+                            update(User)
+                            .where(User.id.in_(user_ids))
+                            .values(email=anonymized_email_sql(),
+                                    updated_at=datetime.utcnow())
+                            .execution_options(synchronize_session=False)
+                        )
+                        session.commit()
+                    except Exception:
+                        session.rollback()
+                        raise
+                    
+                    last_id = user_ids[-1]
+                    anonymized += len(user_ids)
+                    self._save_retention_checkpoint(cutoff_date, last_id, anonymized)
+                    
+                    for user_id in user_ids:
+                        self.record_data_processing(
+                            user_id=user_id,
+                            purpose=DataProcessingPurpose.LEGAL_COMPLIANCE,
+                            data_categories=['personal_data'],
+                            legal_basis='GDPR Article 5(1)(e) - Storage Limitation'
+                        )
+                    
+                    logger.info(f"Retention job: anonymized {anonymized}/{total} expired users")
+                    if progress_callback:
+                        progress_callback(anonymized, total)
                 
             finally:
                 session.close()
-                
+            
+            # Processing and consent logs expire a whole segment at a time
+            self.processing_log.drop_segments_before(cutoff_date)
+            self.consent_log.drop_segments_before(cutoff_date)
+            self._clear_retention_checkpoint()
+            
+            summary['users_anonymized'] = anonymized
+            logger.info(f"Cleaned up {anonymized} expired user records")
+            return summary
+            
         except Exception as e:
             logger.error(f"Failed to cleanup expired data: {str(e)}")
+            summary['users_anonymized'] = anonymized
+            summary['error'] = str(e)
+            return summary
+    
+    def _expired_users_query(self, session, cutoff_date: datetime, after_id: int):
+        """Users past retention that have not been anonymized yet, keyed after a user ID"""
+        return session.query(User).filter(
+            User.created_at < cutoff_date,
+            User.id > after_id,
+            ~is_anonymized_sql()
+        )
+    
+    def _load_retention_checkpoint(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.cleanup_checkpoint_path):
+            return None
+        try:
+            with open(self.cleanup_checkpoint_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable retention checkpoint: {str(e)}")
+            return None
+    
+    def _save_retention_checkpoint(self, cutoff_date: datetime, last_id: int, anonymized: int):
+        temp_path = self.cleanup_checkpoint_path + '.tmp'
+        os.makedirs(os.path.dirname(temp_path) or '.', exist_ok=True)
+        with open(temp_path, 'w') as f:
+            json.dump({
+                'cutoff_date': cutoff_date.isoformat(),
+                'last_id': last_id,
+                'users_anonymized': anonymized
+            }, f)
+        os.replace(temp_path, self.cleanup_checkpoint_path)
+    
+    def _clear_retention_checkpoint(self):
+        if os.path.exists(self.cleanup_checkpoint_path):
+            os.remove(self.cleanup_checkpoint_path)
+    
+    def migrate_legacy_records(self) -> int:
+        """Move per-record .enc files written by older versions into the logs"""
+        migrated_keys = []
+        secure_storage = get_secure_storage()
+        if not os.path.isdir(secure_storage.storage_path):
             return 0
+        
+        for filename in sorted(os.listdir(secure_storage.storage_path)):
+            if not filename.endswith('.enc'):
+                continue
+            
+            key = filename[:-len('.enc')]
+            if key.startswith('processing_record_'):
+                log, timestamp_field = self.processing_log, 'processing_date'
+            elif key.startswith('consent_'):
+                log, timestamp_field = self.consent_log, 'timestamp'
+            else:
+                continue
+            
+            data = secure_storage.retrieve_encrypted(key, as_dict=True)
+            if not data:
+                continue
+            
+            # Keep the original date so retention drops it with its own segment
+            log.append(data['user_id'], data, datetime.fromisoformat(data[timestamp_field]))
+            migrated_keys.append(key)
+        
+        self.processing_log.flush()
+        self.consent_log.flush()
+        
+        # Only remove the old files once everything is safely in the logs
+        for key in migrated_keys:
+            secure_storage.delete_encrypted(key)
+        
+        logger.info(f"Migrated {len(migrated_keys)} legacy GDPR records")
+        return len(migrated_keys)
     
     def generate_privacy_report(self) -> Dict[str, Any]:
         """Generate privacy compliance report"""
@@ -366,21 +685,11 @@ class GDPRCompliance:
                 total_users = session.query(User).count()
                 
                 # Count anonymized users
-                anonymized_query = text("SELECT COUNT(*) FROM users WHERE is_anonymized = TRUE")
-                anonymized_count = session.execute(anonymized_query).scalar() or 0
+                anonymized_count = session.query(User).filter(is_anonymized_sql()).count()
                 
-                # Count processing records
-                storage_path = secure_storage.storage_path
-                processing_records_count = len([
-                    f for f in os.listdir(storage_path) 
-                    if f.startswith('processing_record_') and f.endswith('.enc')
-                ])
-                
-                # Count consent records
-                consent_records_count = len([
-                    f for f in os.listdir(storage_path) 
-                    if f.startswith('consent_') and f.endswith('.enc')
-                ])
+                # Count processing and consent records from the log indexes
+                processing_records_count = self.processing_log.count()
+                consent_records_count = self.consent_log.count()
                 
                 report = {
                     'report_date': datetime.utcnow().isoformat(),
@@ -417,11 +726,15 @@ def record_user_consent(user_id: int, purpose: str, consent_given: bool) -> bool
         return False
 
 def export_user_data_json(user_id: int) -> Optional[str]:
-    """Export user data as JSON string"""
-    export = gdpr_compliance.export_user_data(user_id)
-    if export:
-        return json.dumps(export.to_dict(), indent=2, default=str)
-    return None
+    """Export user data as JSON string; use stream_user_data_export for large exports"""
+    stream = gdpr_compliance.stream_user_data(user_id, 'json')
+    if stream is None:
+        return None
+    return ''.join(stream)
+
+def stream_user_data_export(user_id: int, export_format: str = 'ndjson') -> Optional[Iterator[str]]:
+    """Stream user data as NDJSON lines or a chunked JSON document"""
+    return gdpr_compliance.stream_user_data(user_id, export_format)
 
 def request_data_deletion(user_id: int, hard_delete: bool = False) -> bool:
     """Request deletion of user data"""
@@ -0,0 +1,65 @@
+"""
+HTTP caching for read-only endpoints
+
+Responses of endpoints whose data only changes with a known version (the
+university catalog) get a strong ETag derived from that version and the
+request URL, plus a Cache-Control header. A request whose If-None-Match
+matches is answered with 304 without running the view.
+"""
+
+import os
+import hashlib
+from functools import wraps
+from typing import Callable, Optional
+
+from flask import request, make_response
+
+from utils.compression import CONTENT_CODINGS
+
+CATALOG_CACHE_MAX_AGE = int(os.getenv('CATALOG_CACHE_MAX_AGE', '300'))
+
+
+def version_etag(version: str) -> str:
+    """Strong ETag for the current request URL at a data version"""
+    return hashlib.sha1(f"{version}:{request.full_path}".encode()).hexdigest()
+
+
+def cached_by_version(get_version: Callable[[], Optional[str]], max_age: Optional[int] = None):
+    """
+    Conditional GET decorator. get_version() returns the version of the data
+    behind the view, or None when it is unknown and the response must not be
+    cached.
+    """
+    max_age = CATALOG_CACHE_MAX_AGE if max_age is None else max_age
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            try:
+                version = get_version()
+            except Exception:
+                version = None
+            if version is None:
+                return f(*args, **kwargs)
+
+            etag = version_etag(version)
+            # Compressed responses carry the coding in their ETag (see utils/compression.py)
+            matched = next((
+                candidate for candidate in [etag] + [f"{etag}-{coding}" for coding in CONTENT_CODINGS]
+                if request.if_none_match.contains_weak(candidate)
+            ), None)
+            if matched is not None:
+                response = make_response('', 304)
+                response.set_etag(matched)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    # Errors may be transient, never let them be cached
+                    return response
+                response.set_etag(etag)
+
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,98 @@
+"""
+Fast JSON serialization for API responses
+
+FastJSONProvider encodes with orjson when it is installed and falls back to
+the standard library otherwise. Values wrapped in EncodedList are spliced
+into the output as already-encoded bytes, which lets listing endpoints reuse
+university records that were serialized once per catalog version.
+"""
+
+import json
+import secrets
+from typing import Any, Iterable
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Placeholder for spliced fragments; random per process so record data cannot collide with it
+_FRAGMENT_MARKER = f"__encoded_fragment_{secrets.token_hex(8)}_"
+
+
+class EncodedList:
+    """JSON array whose items are already encoded"""
+
+    __slots__ = ('items',)
+
+    def __init__(self, items: Iterable[bytes]):
+        self.items = list(items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def to_json(self) -> bytes:
+        return b'[' + b','.join(self.items) + b']'
+
+
+def encode_json(obj: Any, sort_keys: bool = True) -> bytes:
+    """Compact JSON bytes in the same form FastJSONProvider produces"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=DefaultJSONProvider.default, option=option)
+    return json.dumps(obj, default=DefaultJSONProvider.default, sort_keys=sort_keys,
+                      separators=(',', ':')).encode()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, with the standard library as fallback"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self.dumps_bytes(obj, **kwargs).decode()
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def dumps_bytes(self, obj: Any, **kwargs: Any) -> bytes:
+        """Encode to bytes, splicing in any EncodedList values"""
+        fragments = []
+
+        def default(value):
+            if isinstance(value, EncodedList):
+                fragments.append(value.to_json())
+                return f"{_FRAGMENT_MARKER}{len(fragments) - 1}"
+            return self.default(value)
+
+        sort_keys = kwargs.pop('sort_keys', self.sort_keys)
+        if orjson is not None:
+            # Dates go through Flask's default so they keep the HTTP date format
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+            if sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if kwargs.get('indent'):
+                option |= orjson.OPT_INDENT_2
+            data = orjson.dumps(obj, default=default, option=option)
+        else:
+            kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+            data = json.dumps(obj, default=default, sort_keys=sort_keys, **kwargs).encode()
+
+        for index, fragment in enumerate(fragments):
+            data = data.replace(f'"{_FRAGMENT_MARKER}{index}"'.encode(), fragment, 1)
+        return data
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        dump_args = {}
+
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            dump_args['indent'] = 2
+        else:
+            dump_args['separators'] = (',', ':')
+
+        return self._app.response_class(self.dumps_bytes(obj, **dump_args) + b'\n', mimetype=self.mimetype)
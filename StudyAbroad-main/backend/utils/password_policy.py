@@ -0,0 +1,130 @@
+"""
+Password hashing policy
+
+Single place that decides how passwords are hashed. Hashing runs in a small
+bounded thread pool (hashlib releases the GIL while deriving keys), so a
+burst of logins cannot use more than PASSWORD_HASH_WORKERS cores, and
+hashes stored with an outdated algorithm or cost are upgraded after a
+successful login.
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from sqlalchemy import update
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from models import get_db_session, User
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool is saturated"""
+    pass
+
+
+class PasswordHashPolicy:
+    """Configurable password hashing with bounded concurrency"""
+
+    SUPPORTED_ALGORITHMS = ('pbkdf2', 'scrypt')
+
+    # pbkdf2: iterations, scrypt: CPU/memory cost N
+    DEFAULT_COST = {
+        'pbkdf2': 600000,
+        'scrypt': 32768
+    }
+
+    def __init__(self, algorithm: Optional[str] = None, cost: Optional[int] = None,
+                 max_workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self.algorithm = (algorithm or os.getenv('PASSWORD_HASH_ALGORITHM', 'pbkdf2')).lower()
+        if self.algorithm not in self.SUPPORTED_ALGORITHMS:
+            raise ValueError(f"Unsupported password hash algorithm: {self.algorithm}")
+
+        self.cost = cost or int(os.getenv('PASSWORD_HASH_COST', str(self.DEFAULT_COST[self.algorithm])))
+        self.max_workers = max_workers or int(os.getenv('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+        self.max_pending = max_pending or int(os.getenv('PASSWORD_HASH_MAX_PENDING', str(self.max_workers * 8)))
+        self.timeout = timeout or float(os.getenv('PASSWORD_HASH_TIMEOUT', '5'))
+
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def method(self) -> str:
+        """Werkzeug method string for the current policy"""
+        if self.algorithm == 'scrypt':
+            return f"scrypt:{self.cost}:8:1"
+        return f"pbkdf2:sha256:{self.cost}"
+
+    def hash(self, password: str) -> str:
+        """Hash a password with the current policy"""
+        return self._run(generate_password_hash, password, method=self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        """Check a password against any werkzeug hash, old or current"""
+        if not password_hash or not password:
+            return False
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """True when the stored hash was made with a different algorithm or cost"""
+        return password_hash.split('$', 1)[0] != self.method
+
+    def schedule_rehash(self, user_id: int, password: str, old_hash: str) -> Optional[Future]:
+        """Upgrade a stored hash in the background after a successful login"""
+        if not self.needs_rehash(old_hash):
+            return None
+        try:
+            return self._submit(self._rehash, user_id, password, old_hash)
+        except PasswordHashingBusy:
+            # Not urgent, the next login will try again
+            return None
+
+    def _rehash(self, user_id: int, password: str, old_hash: str):
+        new_hash = generate_password_hash(password, method=self.method)
+        session = next(get_db_session())
+        try:
+            # Only replace the hash we verified, never a concurrent password change
+            session.execute(
+                update(User)
+                .where(User.id == user_id, User.password_hash == old_hash)
+                .values(password_hash=new_hash)
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Password rehash failed for user {user_id}: {str(e)}")
+        finally:
+            session.close()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='password-hash')
+        return self._executor
+
+    def _submit(self, fn, *args, **kwargs) -> Future:
+        """Queue work on the pool, refusing it once max_pending jobs are waiting"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordHashingBusy("Password hashing capacity exceeded")
+        try:
+            future = self._get_executor().submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _run(self, fn, *args, **kwargs):
+        return self._submit(fn, *args, **kwargs).result()
+
+
+# Global password policy instance
+password_policy = PasswordHashPolicy()
@@ -0,0 +1,95 @@
+"""
+Pre-fork warmup helpers
+
+A pre-forking server (gunicorn --preload) imports the app once in the master
+and forks the workers from it. Loading the catalog and models in the master
+and then freezing them out of the garbage collector's reach lets the workers
+share those pages copy-on-write instead of each building its own copy.
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+from typing import Callable, Dict, List
+
+
+def memory_usage() -> Dict[str, int]:
+    """Resident memory of this process in KiB, split into private and shared pages where /proc allows"""
+    usage = {'rss_kb': 0, 'private_kb': 0, 'shared_kb': 0}
+
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if not rest.strip().endswith('kB'):
+                    continue
+                value = int(rest.split()[0])
+                if key == 'Rss':
+                    usage['rss_kb'] = value
+                elif key in ('Private_Clean', 'Private_Dirty'):
+                    usage['private_kb'] += value
+                elif key in ('Shared_Clean', 'Shared_Dirty'):
+                    usage['shared_kb'] += value
+        return usage
+    except OSError:
+        pass
+
+    # No smaps (macOS, Windows): peak RSS only
+    import resource
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    usage['rss_kb'] = max_rss // 1024 if sys.platform == 'darwin' else max_rss
+    return usage
+
+
+def freeze_shared_state():
+    """
+    Collect garbage once, then move every surviving object to the permanent
+    generation so later collections in the workers never write to its pages
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def fork_report(workload: Callable[[], None], workers: int = 2) -> List[Dict[str, float]]:
+    """
+    Fork workers from the current process, run workload() once in each and
+    return their memory before and after, plus how long the workload took
+    """
+    if not hasattr(os, 'fork'):
+        raise RuntimeError("fork() is not available on this platform")
+
+    children = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            before = memory_usage()
+            started = time.perf_counter()
+            try:
+                workload()
+                error = None
+            except Exception as e:
+                error = str(e)
+            result = {
+                'pid': os.getpid(),
+                'workload_ms': (time.perf_counter() - started) * 1000,
+                'before': before,
+                'after': memory_usage(),
+                'error': error
+            }
+            os.write(write_fd, json.dumps(result).encode())
+            os._exit(0)
+
+        os.close(write_fd)
+        children.append((pid, read_fd))
+        # One worker at a time so measurements do not overlap
+        os.waitpid(pid, 0)
+
+    results = []
+    for pid, read_fd in children:
+        with os.fdopen(read_fd, 'rb') as f:
+            results.append(json.loads(f.read().decode()))
+    return results
@@ -0,0 +1,366 @@
+"""
+Segmented append-only log for encrypted per-user records
+
+Records are appended as encrypted lines to one segment file per time window.
+Each line starts with the user ID in clear, so a per-user offset index can be
+built without decrypting anything and a user query only decrypts that user's
+lines. Appends are buffered and written in batches, indexes of closed
+segments are kept next to them on disk, and retention drops whole segments.
+"""
+
+import os
+import json
+import atexit
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, single worker only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = '.log'
+INDEX_SUFFIX = '.idx'
+EPOCH = datetime(1970, 1, 1)
+
+
+class _SegmentIndex:
+    """Line offsets per user for one segment file, valid for the file's inode only"""
+
+    __slots__ = ('offsets', 'scanned_to', 'inode')
+
+    def __init__(self, offsets: Optional[Dict[int, List[Tuple[int, int]]]] = None, scanned_to: int = 0,
+                 inode: Optional[int] = None):
+        self.offsets = offsets or {}
+        self.scanned_to = scanned_to
+        self.inode = inode
+
+
+class EncryptedRecordLog:
+    """Append-only encrypted log split into time-window segments"""
+
+    def __init__(self, name: str, storage_path: str, encryptor,
+                 segment_days: Optional[int] = None,
+                 batch_size: Optional[int] = None,
+                 flush_interval_ms: Optional[int] = None):
+        self.name = name
+        self.storage_path = storage_path
+        self.encryptor = encryptor
+        self.segment_days = segment_days or int(os.getenv('GDPR_LOG_SEGMENT_DAYS', '7'))
+        self.batch_size = batch_size or int(os.getenv('GDPR_LOG_BATCH_SIZE', '100'))
+        self.flush_interval = (flush_interval_ms or int(os.getenv('GDPR_LOG_FLUSH_INTERVAL_MS', '1000'))) / 1000.0
+
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._indexes = {}
+        self._timer = None
+        self._atexit_registered = False
+
+    # Writing
+
+    def append(self, user_id: int, record: Dict[str, Any], timestamp: Optional[datetime] = None):
+        """Encrypt a record and queue it for the segment covering timestamp"""
+        segment = self._segment_for(timestamp or datetime.utcnow())
+        line = f"{int(user_id)}\t{self.encryptor.encrypt_dict(record)}\n".encode()
+
+        with self._pending_lock:
+            self._pending.append((segment, line))
+            should_flush = len(self._pending) >= self.batch_size
+            if not should_flush and self._timer is None:
+                # Bound how long a record can sit in memory
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+            if not self._atexit_registered:
+                atexit.register(self.flush)
+                self._atexit_registered = True
+
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write all buffered records, one write per segment"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        if not pending:
+            return 0
+
+        grouped = {}
+        for segment, line in pending:
+            grouped.setdefault(segment, []).append(line)
+
+        with self._write_lock:
+            os.makedirs(self.storage_path, exist_ok=True)
+            for segment, lines in grouped.items():
+                self._append_lines(segment, b''.join(lines))
+
+        return len(pending)
+
+    def _append_lines(self, segment: str, data: bytes):
+        path = self._segment_path(segment)
+        while True:
+            with open(path, 'a+b') as f:
+                self._lock_file(f)
+                try:
+                    # A compaction may have replaced the file while we waited for the lock
+                    if os.path.exists(path) and os.fstat(f.fileno()).st_ino != os.stat(path).st_ino:
+                        continue
+
+                    f.seek(0, os.SEEK_END)
+                    if f.tell() > 0:
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b'\n':
+                            # Terminate a line torn by an earlier crash
+                            data = b'\n' + data
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    return
+                finally:
+                    self._unlock_file(f)
+
+    # Reading
+
+    def read_user(self, user_id: int) -> List[Dict[str, Any]]:
+        """Decrypt every record of one user, oldest segment first"""
+        return list(self.iter_user(user_id))
+
+    def iter_user(self, user_id: int) -> Iterator[Dict[str, Any]]:
+        """Yield one user's records lazily, oldest segment first"""
+        self.flush()
+        user_id = int(user_id)
+
+        for segment in self._list_segments():
+            for line in self._read_user_lines(segment, user_id):
+                try:
+                    record = self.encryptor.decrypt_dict(line.split(b'\t', 1)[1].decode())
+                except Exception as e:
+                    logger.warning(f"Skipping unreadable {self.name} record in {segment}: {str(e)}")
+                    continue
+                yield record
+
+    def _read_user_lines(self, segment: str, user_id: int) -> List[bytes]:
+        """Raw lines of one user in a segment, re-indexing when the cached offsets are stale"""
+        prefix = f"{user_id}\t".encode()
+
+        for rebuild in (False, True):
+            entries = self._load_index(segment, rebuild).offsets.get(user_id)
+            if not entries:
+                return []
+            lines, stale = [], False
+            try:
+                with open(self._segment_path(segment), 'rb') as f:
+                    for offset, length in entries:
+                        f.seek(offset)
+                        line = f.read(length)
+                        # Never hand out another user's line, whatever the index says
+                        if line.startswith(prefix):
+                            lines.append(line)
+                        else:
+                            stale = True
+            except FileNotFoundError:
+                # Dropped by retention meanwhile
+                return []
+            if not stale or rebuild:
+                return lines
+            logger.warning(f"Stale {self.name} index for {segment}, rebuilding it")
+        return lines
+
+    def count(self) -> int:
+        """Total number of records across all segments"""
+        self.flush()
+        return sum(
+            len(entries)
+            for segment in self._list_segments()
+            for entries in self._load_index(segment).offsets.values()
+        )
+
+    # Retention
+
+    def delete_user(self, user_id: int) -> int:
+        """Rewrite the segments that hold a user's records without them"""
+        self.flush()
+        user_id = int(user_id)
+        removed = 0
+
+        with self._write_lock:
+            for segment in self._list_segments():
+                if user_id not in self._load_index(segment).offsets:
+                    continue
+                removed += self._compact_segment(segment, user_id)
+
+        return removed
+
+    def expired_segments(self, cutoff: datetime) -> List[str]:
+        """Segments whose time window ended before cutoff"""
+        return [segment for segment in self._list_segments() if self._segment_end(segment) <= cutoff]
+
+    def drop_segments_before(self, cutoff: datetime) -> int:
+        """Delete whole segments whose time window ended before cutoff"""
+        self.flush()
+        dropped = 0
+
+        with self._write_lock:
+            for segment in self.expired_segments(cutoff):
+                for path in (self._segment_path(segment), self._index_path(segment)):
+                    if os.path.exists(path):
+                        os.remove(path)
+                with self._index_lock:
+                    self._indexes.pop(segment, None)
+                dropped += 1
+
+        if dropped:
+            logger.info(f"Dropped {dropped} expired {self.name} segments")
+        return dropped
+
+    def _compact_segment(self, segment: str, user_id: int) -> int:
+        path = self._segment_path(segment)
+        temp_path = path + '.tmp'
+        prefix = f"{user_id}\t".encode()
+        removed = 0
+
+        with open(path, 'rb') as f:
+            self._lock_file(f)
+            try:
+                with open(temp_path, 'wb') as out:
+                    for line in f:
+                        if line.startswith(prefix):
+                            removed += 1
+                        else:
+                            out.write(line)
+                    out.flush()
+                    os.fsync(out.fileno())
+                os.replace(temp_path, path)
+            finally:
+                self._unlock_file(f)
+
+        index_path = self._index_path(segment)
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        with self._index_lock:
+            self._indexes.pop(segment, None)
+
+        return removed
+
+    # Indexes
+
+    def _load_index(self, segment: str, rebuild: bool = False) -> _SegmentIndex:
+        """Return the segment index, scanning only bytes appended since the last call"""
+        path = self._segment_path(segment)
+        try:
+            stat = os.stat(path)
+            size, inode = stat.st_size, stat.st_ino
+        except FileNotFoundError:
+            size, inode = 0, None
+
+        with self._index_lock:
+            index = self._indexes.get(segment)
+            if rebuild or index is None or index.inode != inode or index.scanned_to > size:
+                # Unknown, or compacted by another process: compaction replaces the file
+                index = (None if rebuild else self._read_index_file(segment, size, inode)) or _SegmentIndex(inode=inode)
+                self._indexes[segment] = index
+
+            if index.scanned_to < size:
+                self._scan(path, index)
+                if self._segment_end(segment) <= datetime.utcnow():
+                    # Closed segments only change on compaction, keep their index on disk
+                    self._write_index_file(segment, index)
+
+            return index
+
+    def _scan(self, path: str, index: _SegmentIndex):
+        with open(path, 'rb') as f:
+            inode = os.fstat(f.fileno()).st_ino
+            if index.scanned_to:
+                f.seek(index.scanned_to - 1)
+                if inode != index.inode or f.read(1) != b'\n':
+                    # Replaced since the index was built, or it would resume mid-line
+                    index.offsets, index.scanned_to = {}, 0
+            index.inode = inode
+            f.seek(index.scanned_to)
+            position = index.scanned_to
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Partial line still being written
+                    break
+                user_part, sep, _ = line.partition(b'\t')
+                if sep and user_part.isdigit():
+                    index.offsets.setdefault(int(user_part), []).append((position, len(line) - 1))
+                position += len(line)
+            index.scanned_to = position
+
+    def _read_index_file(self, segment: str, size: int, inode: Optional[int]) -> Optional[_SegmentIndex]:
+        index_path = self._index_path(segment)
+        if not os.path.exists(index_path):
+            return None
+        try:
+            with open(index_path, 'r') as f:
+                data = json.load(f)
+            if data.get('inode') != inode or data.get('size', 0) > size:
+                # Written for a segment file that has since been compacted
+                return None
+            offsets = {
+                int(user_id): [tuple(entry) for entry in entries]
+                for user_id, entries in data['offsets'].items()
+            }
+            return _SegmentIndex(offsets, data['size'], inode)
+        except Exception as e:
+            logger.warning(f"Rebuilding {self.name} index for {segment}: {str(e)}")
+            return None
+
+    def _write_index_file(self, segment: str, index: _SegmentIndex):
+        index_path = self._index_path(segment)
+        temp_path = index_path + '.tmp'
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump({'size': index.scanned_to, 'inode': index.inode, 'offsets': index.offsets}, f)
+            os.replace(temp_path, index_path)
+        except Exception as e:
+            logger.warning(f"Could not save {self.name} index for {segment}: {str(e)}")
+
+    # Segment naming
+
+    def _segment_for(self, timestamp: datetime) -> str:
+        days = (timestamp - EPOCH).days
+        start = EPOCH + timedelta(days=days - days % self.segment_days)
+        return f"{self.name}-{start:%Y%m%d}"
+
+    def _segment_end(self, segment: str) -> datetime:
+        start = datetime.strptime(segment[len(self.name) + 1:], '%Y%m%d')
+        return start + timedelta(days=self.segment_days)
+
+    def _list_segments(self) -> List[str]:
+        if not os.path.isdir(self.storage_path):
+            return []
+        prefix = f"{self.name}-"
+        return sorted(
+            filename[:-len(SEGMENT_SUFFIX)]
+            for filename in os.listdir(self.storage_path)
+            if filename.startswith(prefix) and filename.endswith(SEGMENT_SUFFIX)
+        )
+
+    def _segment_path(self, segment: str) -> str:
+        return os.path.join(self.storage_path, segment + SEGMENT_SUFFIX)
+
+    def _index_path(self, segment: str) -> str:
+        return os.path.join(self.storage_path, segment + INDEX_SUFFIX)
+
+    @staticmethod
+    def _lock_file(f):
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    @staticmethod
+    def _unlock_file(f):
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -3,14 +3,13 @@ Comprehensive security utilities for input sanitization and validation
 """
 
 import re
-import html
 import bleach
 from typing import Any, Dict, List, Optional, Union
 from flask import request, jsonify
-from functools import wraps
+from functools import wraps, lru_cache
+import os
 import time
-from collections import defaultdict, deque
-import hashlib
+import threading
 import secrets
 import logging
 
@@ -53,6 +52,42 @@ class InputSanitizer:
         r'(\bINTO\s+OUTFILE\b)',
     ]
     
+    # First character of every SQL pattern match, checked before trying the alternation
+    SQL_LEADING_CHARS = 'SIUDCAEO-#/*'
+    
+    # HTML special characters and their escaped forms (same as html.escape)
+    HTML_ESCAPES = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'}
+    
+    @classmethod
+    def compile_patterns(cls):
+        """Compile the pattern lists into single-pass regexes.
+        
+        Markup patterns (the ones starting with '<') are left out of the
+        sanitize regex: sanitizing escapes '<' first, so they never matched.
+        Subclasses that change the pattern lists must call this again.
+        """
+        def char_class(chars):
+            return '[' + ''.join(re.escape(c) for c in chars) + ']'
+        
+        inline_xss = [p for p in cls.XSS_PATTERNS if not p.startswith('<')]
+        xss = '|'.join(f'(?:{p})' for p in inline_xss)
+        # A leading lookahead lets the engine skip positions that cannot start a match
+        leading = char_class(set(''.join(cls.HTML_ESCAPES) + ''.join(p[0] for p in inline_xss)))
+        
+        cls._xss_re = re.compile(xss, re.IGNORECASE)
+        cls._sanitize_re = re.compile(
+            f'(?={leading})(?:(?P<char>{char_class(cls.HTML_ESCAPES)})|{xss})', re.IGNORECASE
+        )
+        cls._sql_re = re.compile(
+            f'(?={char_class(cls.SQL_LEADING_CHARS)})(?:' + '|'.join(f'(?:{p})' for p in cls.SQL_PATTERNS) + ')',
+            re.IGNORECASE
+        )
+    
+    @classmethod
+    def _replace_match(cls, match) -> str:
+        char = match.group('char')
+        return cls.HTML_ESCAPES[char] if char else ''
+    
     @classmethod
     def sanitize_string(cls, value: str, max_length: Optional[int] = None) -> str:
         """Sanitize string input to prevent XSS and other attacks"""
@@ -60,14 +95,15 @@ class InputSanitizer:
             return str(value)
         
         # Remove null bytes
-        value = value.replace('\x00', '')
+        if '\x00' in value:
+            value = value.replace('\x00', '')
         
-        # HTML escape
-        value = html.escape(value)
-        
-        # Remove potential XSS patterns
-        for pattern in cls.XSS_PATTERNS:
-            value = re.sub(pattern, '', value, flags=re.IGNORECASE)
+        # HTML escape and remove XSS patterns in one pass
+        if cls._sanitize_re.search(value):
+            value = cls._sanitize_re.sub(cls._replace_match, value)
+            # Removing one pattern can join the text around it into another
+            while cls._xss_re.search(value):
+                value = cls._xss_re.sub('', value)
         
         # Trim whitespace
         value = value.strip()
@@ -137,12 +173,7 @@ class InputSanitizer:
         if not isinstance(value, str):
             return False
         
-        value_upper = value.upper()
-        for pattern in cls.SQL_PATTERNS:
-            if re.search(pattern, value_upper, re.IGNORECASE):
-                return True
-        
-        return False
+        return cls._sql_re.search(value) is not None
     
     @classmethod
     def sanitize_dict(cls, data: Dict[str, Any], 
@@ -158,8 +189,8 @@ class InputSanitizer:
         sanitized = {}
         
         for key, value in data.items():
-            # Sanitize key
-            clean_key = cls.sanitize_string(key, max_length=100)
+            # Sanitize key (request bodies reuse the same few keys)
+            clean_key = _sanitize_key(key) if isinstance(key, str) else cls.sanitize_string(key, max_length=100)
             
             # Check if key is allowed
             if allowed_keys and clean_key not in allowed_keys:
@@ -187,56 +218,211 @@ class InputSanitizer:
         
         return sanitized
 
-class RateLimiter:
-    """Rate limiting implementation"""
+InputSanitizer.compile_patterns()
+
+@lru_cache(maxsize=4096)
+def _sanitize_key(key: str) -> str:
+    """Cached sanitization of dictionary keys"""
+    return InputSanitizer.sanitize_string(key, max_length=100)
+
+class _WindowCounter:
+    """Two fixed buckets (previous and current window) for one key"""
+    __slots__ = ('window_seconds', 'window_start', 'previous', 'current', 'last_seen', 'blocked_until')
+    
+    def __init__(self, window_seconds: int, window_start: float):
+        self.window_seconds = window_seconds
+        self.window_start = window_start
+        self.previous = 0
+        self.current = 0
+        self.last_seen = window_start
+        self.blocked_until = 0.0
+    
+    def advance(self, now: float):
+        """Roll the buckets forward to the window containing now"""
+        window_start = now - (now % self.window_seconds)
+        if window_start != self.window_start:
+            # The old current bucket only counts if it is the window right before this one
+            self.previous = self.current if window_start - self.window_start == self.window_seconds else 0
+            self.current = 0
+            self.window_start = window_start
+    
+    def estimate(self, now: float) -> float:
+        """Sliding-window estimate weighted by how much of the previous window still overlaps"""
+        overlap = (self.window_seconds - (now - self.window_start)) / self.window_seconds
+        return self.previous * overlap + self.current
+
+class _RateLimitShard:
+    """Independently locked slice of the key space"""
+    __slots__ = ('lock', 'counters', 'next_sweep')
     
     def __init__(self):
-        self.requests = defaultdict(deque)
-        self.blocked_ips = defaultdict(float)
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.next_sweep = 0.0
+
+class RateLimiter:
+    """In-memory sliding-window rate limiter with bounded memory.
+    
+    Each key holds two counters instead of a timestamp per request. Keys are
+    spread over lock-striped shards, and idle keys are swept out periodically.
+    """
+    
+    def __init__(self, num_shards: int = 16, sweep_interval: int = 60):
+        self.num_shards = num_shards
+        self.sweep_interval = sweep_interval
+        self._shards = [_RateLimitShard() for _ in range(num_shards)]
+    
+    def _shard_for(self, key: str) -> _RateLimitShard:
+        return self._shards[hash(key) % self.num_shards]
+    
+    def _sweep(self, shard: _RateLimitShard, now: float):
+        """Evict keys idle for two windows that are not blocked; caller holds the lock"""
+        stale = [key for key, counter in shard.counters.items()
+                 if counter.last_seen < now - 2 * counter.window_seconds and counter.blocked_until <= now]
+        for key in stale:
+            del shard.counters[key]
+        shard.next_sweep = now + self.sweep_interval
     
     def is_allowed(self, identifier: str, max_requests: int = 100, 
                    window_seconds: int = 3600, block_duration: int = 3600) -> bool:
         """Check if request is allowed based on rate limiting"""
         current_time = time.time()
+        key = f"{window_seconds}:{identifier}"
+        shard = self._shard_for(key)
         
-        # Check if IP is currently blocked
-        if identifier in self.blocked_ips:
-            if current_time < self.blocked_ips[identifier]:
+        with shard.lock:
+            if current_time >= shard.next_sweep:
+                self._sweep(shard, current_time)
+            
+            counter = shard.counters.get(key)
+            if counter is None:
+                counter = _WindowCounter(window_seconds, current_time - (current_time % window_seconds))
+                shard.counters[key] = counter
+            counter.last_seen = current_time
+            
+            # Check if identifier is currently blocked
+            if current_time < counter.blocked_until:
                 return False
-            else:
-                # Unblock IP
-                del self.blocked_ips[identifier]
-        
-        # Clean old requests
-        request_times = self.requests[identifier]
-        while request_times and request_times[0] < current_time - window_seconds:
-            request_times.popleft()
-        
-        # Check rate limit
-        if len(request_times) >= max_requests:
-            # Block IP
-            self.blocked_ips[identifier] = current_time + block_duration
-            logger.warning(f"Rate limit exceeded for {identifier}. Blocking for {block_duration} seconds.")
-            return False
-        
-        # Add current request
-        request_times.append(current_time)
-        return True
+            
+            counter.advance(current_time)
+            
+            # Check rate limit
+            if counter.estimate(current_time) >= max_requests:
+                counter.blocked_until = current_time + block_duration
+                logger.warning(f"Rate limit exceeded for {identifier}. Blocking for {block_duration} seconds.")
+                return False
+            
+            counter.current += 1
+            return True
     
     def get_remaining_requests(self, identifier: str, max_requests: int = 100, 
                               window_seconds: int = 3600) -> int:
         """Get remaining requests for identifier"""
         current_time = time.time()
-        request_times = self.requests[identifier]
-        
-        # Clean old requests
-        while request_times and request_times[0] < current_time - window_seconds:
-            request_times.popleft()
+        key = f"{window_seconds}:{identifier}"
+        shard = self._shard_for(key)
+        
+        with shard.lock:
+            counter = shard.counters.get(key)
+            if counter is None:
+                return max_requests
+            counter.advance(current_time)
+            return max(0, int(max_requests - counter.estimate(current_time)))
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Number of tracked keys, for monitoring memory use"""
+        return {'tracked_keys': sum(len(shard.counters) for shard in self._shards)}
+
+class RedisRateLimiter:
+    """Sliding-window rate limiter shared by all workers through Redis"""
+    
+    KEY_PREFIX = 'ratelimit'
+    
+    # Check and count in one atomic step, so concurrent workers can't all pass
+    # the check before any of them counts.
+    # KEYS: block, previous bucket, current bucket
+    # ARGV: max_requests, previous bucket weight, window_seconds, block_duration
+    # Returns 1 if allowed, 0 if already blocked, -1 if this request set the block
+    IS_ALLOWED_SCRIPT = """
+    if redis.call('EXISTS', KEYS[1]) == 1 then
+        return 0
+    end
+    local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+    local current = tonumber(redis.call('GET', KEYS[3]) or '0')
+    if previous * tonumber(ARGV[2]) + current >= tonumber(ARGV[1]) then
+        redis.call('SET', KEYS[1], 1, 'EX', ARGV[4])
+        return -1
+    end
+    redis.call('INCR', KEYS[3])
+    redis.call('EXPIRE', KEYS[3], 2 * tonumber(ARGV[3]))
+    return 1
+    """
+    
+    def __init__(self, redis_url: str):
+        import redis
+        self.redis = redis.Redis.from_url(redis_url, socket_timeout=0.5)
+        self._is_allowed = self.redis.register_script(self.IS_ALLOWED_SCRIPT)
+    
+    def _bucket_keys(self, identifier: str, window_seconds: int, current_time: float):
+        bucket = int(current_time // window_seconds)
+        base = f"{self.KEY_PREFIX}:{window_seconds}:{identifier}"
+        return f"{base}:{bucket}", f"{base}:{bucket - 1}", bucket * window_seconds
+    
+    @staticmethod
+    def _overlap(window_start: float, current_time: float, window_seconds: int) -> float:
+        """Share of the previous bucket still inside the sliding window"""
+        return (window_seconds - (current_time - window_start)) / window_seconds
+    
+    def _estimate(self, previous: Optional[bytes], current: Optional[bytes],
+                  window_start: float, current_time: float, window_seconds: int) -> float:
+        overlap = self._overlap(window_start, current_time, window_seconds)
+        return int(previous or 0) * overlap + int(current or 0)
+    
+    def is_allowed(self, identifier: str, max_requests: int = 100, 
+                   window_seconds: int = 3600, block_duration: int = 3600) -> bool:
+        """Check if request is allowed based on rate limiting"""
+        current_time = time.time()
+        block_key = f"{self.KEY_PREFIX}:block:{window_seconds}:{identifier}"
+        current_key, previous_key, window_start = self._bucket_keys(identifier, window_seconds, current_time)
         
-        return max(0, max_requests - len(request_times))
+        try:
+            allowed = self._is_allowed(
+                keys=[block_key, previous_key, current_key],
+                args=[max_requests, repr(self._overlap(window_start, current_time, window_seconds)),
+                      window_seconds, block_duration]
+            )
+            if allowed == -1:
+                logger.warning(f"Rate limit exceeded for {identifier}. Blocking for {block_duration} seconds.")
+            return allowed == 1
+        except Exception as e:
+            # Fail open: an unavailable limiter store must not take the API down
+            logger.error(f"Rate limiter backend error: {str(e)}")
+            return True
+    
+    def get_remaining_requests(self, identifier: str, max_requests: int = 100, 
+                              window_seconds: int = 3600) -> int:
+        """Get remaining requests for identifier"""
+        current_time = time.time()
+        current_key, previous_key, window_start = self._bucket_keys(identifier, window_seconds, current_time)
+        try:
+            previous, current = self.redis.mget(previous_key, current_key)
+        except Exception:
+            return max_requests
+        estimate = self._estimate(previous, current, window_start, current_time, window_seconds)
+        return max(0, int(max_requests - estimate))
+
+def create_rate_limiter(storage_url: Optional[str] = None):
+    """Build the limiter for RATE_LIMIT_STORAGE_URL (memory:// or redis://)"""
+    storage_url = storage_url or os.getenv('RATE_LIMIT_STORAGE_URL', 'memory://')
+    if storage_url.startswith(('redis://', 'rediss://', 'unix://')):
+        try:
+            return RedisRateLimiter(storage_url)
+        except Exception as e:
+            logger.warning(f"Redis rate limiter unavailable, using in-memory limiter: {str(e)}")
+    return RateLimiter()
 
 # Global rate limiter instance
-rate_limiter = RateLimiter()
+rate_limiter = create_rate_limiter()
 
 def get_client_ip() -> str:
     """Get client IP address from request"""
@@ -405,20 +591,39 @@ def secure_filename(filename: str) -> str:
     
     return filename
 
-def hash_password(password: str, salt: Optional[str] = None) -> tuple:
-    """Hash password with salt"""
-    if salt is None:
-        salt = secrets.token_hex(32)
-    
-    # Use PBKDF2 with SHA-256
-    password_hash = hashlib.pbkdf2_hmac('sha256', 
-                                       password.encode('utf-8'), 
-                                       salt.encode('utf-8'), 
-                                       100000)  # 100,000 iterations
-    
-    return password_hash.hex(), salt
 
-def verify_password(password: str, password_hash: str, salt: str) -> bool:
-    """Verify password against hash"""
-    computed_hash, _ = hash_password(password, salt)
-    return secrets.compare_digest(computed_hash, password_hash)
\ No newline at end of file
+if __name__ == "__main__":
+    # Benchmark: sanitize large nested JSON request bodies
+    import json
+    import random
+    import string
+    
+    def build_body(depth: int, width: int) -> Dict[str, Any]:
+        body = {}
+        for i in range(width):
+            key = f"field_{i}"
+            if depth > 1 and i % 4 == 0:
+                body[key] = build_body(depth - 1, width)
+            elif i % 4 == 1:
+                body[key] = [''.join(random.choices(string.ascii_letters + ' <>&', k=40)) for _ in range(10)]
+            elif i % 4 == 2:
+                body[key] = random.random() * 1000
+            else:
+                body[key] = ''.join(random.choices(string.ascii_letters + string.digits + ' .,', k=200))
+        return body
+    
+    random.seed(42)
+    body = build_body(depth=4, width=24)
+    body_size = len(json.dumps(body))
+    iterations = 50
+    
+    start = time.perf_counter()
+    for _ in range(iterations):
+        InputSanitizer.sanitize_dict(body)
+    elapsed = time.perf_counter() - start
+    
+    print("InputSanitizer Benchmark")
+    print("=" * 40)
+    print(f"Body size: {body_size / 1024:.1f} KB")
+    print(f"Per body: {elapsed / iterations * 1000:.2f} ms")
+    print(f"Throughput: {body_size * iterations / elapsed / (1024 * 1024):.1f} MB/s")
@@ -0,0 +1,228 @@
+"""
+Write-behind buffer for analytics records
+
+Search history and recommendation logs are written by a background thread in
+batches, so request handlers only pay for an in-memory enqueue.
+"""
+
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from models.database import get_db_session
+from models.repositories import RecommendationRepository, SearchHistoryRepository
+
+logger = logging.getLogger(__name__)
+
+# Record kinds understood by the writer
+SEARCH_RECORD = 'search_history'
+RECOMMENDATION_SESSION = 'recommendation_session'
+RECOMMENDATION_RESULT = 'recommendation_result'
+
+# Batch insert method for each record kind
+_BATCH_WRITERS = {
+    SEARCH_RECORD: SearchHistoryRepository.create_search_records,
+    RECOMMENDATION_SESSION: RecommendationRepository.create_recommendation_sessions,
+    RECOMMENDATION_RESULT: RecommendationRepository.create_recommendation_results,
+}
+
+
+class WriteBehindQueue:
+    """Bounded queue drained in batches by a daemon thread"""
+
+    def __init__(self, max_queue_size: Optional[int] = None,
+                 batch_size: Optional[int] = None,
+                 flush_interval_ms: Optional[int] = None,
+                 high_water_ratio: float = 0.8):
+        self.max_queue_size = max_queue_size or int(os.getenv('HISTORY_QUEUE_SIZE', '10000'))
+        self.batch_size = batch_size or int(os.getenv('HISTORY_BATCH_SIZE', '200'))
+        self.flush_interval = (flush_interval_ms or int(os.getenv('HISTORY_FLUSH_INTERVAL_MS', '500'))) / 1000.0
+        self.high_water_mark = max(1, int(self.max_queue_size * high_water_ratio))
+
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._flush_now = threading.Event()
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+        self._stats = {
+            'enqueued': 0,
+            'written': 0,
+            'dropped': 0,
+            'failed': 0,
+            'batches': 0,
+            'backpressure_events': 0,
+        }
+
+    def start(self):
+        """Start the background writer thread if it is not running"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def enqueue(self, kind: str, record: Dict[str, Any]) -> bool:
+        """Queue a record without blocking; returns False when it was dropped"""
+        if kind not in _BATCH_WRITERS:
+            raise ValueError(f"Unknown record kind: {kind}")
+
+        if self._stopping.is_set():
+            self._increment('dropped')
+            return False
+
+        self.start()
+
+        try:
+            self._queue.put_nowait((kind, record))
+        except queue.Full:
+            self._increment('dropped')
+            return False
+
+        self._increment('enqueued')
+
+        # Past the high-water mark, ask the writer to drain immediately
+        if self._queue.qsize() >= self.high_water_mark:
+            self._increment('backpressure_events')
+            self._flush_now.set()
+
+        return True
+
+    def record_search(self, user_id: int, search_query: Dict[str, Any],
+                      search_type: str, results_count: int) -> bool:
+        """Queue a search history record"""
+        return self.enqueue(SEARCH_RECORD, {
+            'user_id': user_id,
+            'search_query': search_query,
+            'search_type': search_type,
+            'results_count': results_count
+        })
+
+    def record_recommendations(self, user_id: int, session_type: str,
+                               user_profile_snapshot: Dict[str, Any],
+                               recommendations: List[Dict[str, Any]],
+                               filters_applied: Optional[Dict[str, Any]] = None) -> bool:
+        """Queue a recommendation session together with its ranked results"""
+        accepted = self.enqueue(RECOMMENDATION_SESSION, {
+            'user_id': user_id,
+            'session_type': session_type,
+            'user_profile_snapshot': user_profile_snapshot,
+            'filters_applied': filters_applied,
+            'total_recommendations': len(recommendations)
+        })
+
+        for position, rec in enumerate(recommendations, 1):
+            scores = rec.get('scores', {})
+            accepted &= self.enqueue(RECOMMENDATION_RESULT, {
+                'user_id': user_id,
+                'university_id': rec.get('university_id'),
+                'university_name': rec.get('university_name', ''),
+                'university_country': rec.get('country'),
+                'admission_probability': rec.get('admission_probability'),
+                'cost_fit_score': rec.get('cost_fit_score'),
+                'overall_score': rec.get('overall_score'),
+                'ranking_position': position,
+                'reasons': rec.get('explanation', []),
+                'confidence_level': scores.get('admission_category')
+            })
+
+        return accepted
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far has been written"""
+        if not self._thread or not self._thread.is_alive():
+            self._drain()
+            return self._queue.empty()
+
+        deadline = time.monotonic() + timeout
+        self._flush_now.set()
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self._queue.unfinished_tasks == 0
+
+    def shutdown(self, timeout: float = 5.0):
+        """Stop accepting records and flush what is left"""
+        self._stopping.set()
+        self._flush_now.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+        # Anything the thread could not reach is written synchronously
+        self._drain()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for monitoring endpoints"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self.max_queue_size,
+            'running': bool(self._thread and self._thread.is_alive())
+        })
+        return stats
+
+    def _increment(self, counter: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[counter] += amount
+
+    def _run(self):
+        """Writer loop: collect up to batch_size records or flush_interval, then write"""
+        while not self._stopping.is_set():
+            self._flush_now.wait(self.flush_interval)
+            self._flush_now.clear()
+            self._drain()
+
+    def _drain(self):
+        """Write queued records in batches until the queue is empty"""
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if not batch:
+                return
+
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: List[tuple]):
+        """Group a batch by record kind and insert each group with one commit"""
+        grouped = {}
+        for kind, record in batch:
+            grouped.setdefault(kind, []).append(record)
+
+        try:
+            session = next(get_db_session())
+        except Exception as e:
+            logger.error(f"Write-behind batch lost, no database session: {str(e)}")
+            self._increment('failed', len(batch))
+            return
+
+        try:
+            for kind, records in grouped.items():
+                try:
+                    written = _BATCH_WRITERS[kind](session, records)
+                    self._increment('written', written)
+                except Exception as e:
+                    session.rollback()
+                    logger.error(f"Write-behind insert of {len(records)} {kind} records failed: {str(e)}")
+                    self._increment('failed', len(records))
+            self._increment('batches')
+        finally:
+            session.close()
+
+
+# Global write-behind queue instance
+history_writer = WriteBehindQueue()
@@ -0,0 +1,11 @@
+"""
+WSGI entry point for production servers
+
+    gunicorn wsgi:app            (settings come from gunicorn.conf.py)
+
+With preload enabled the master imports this module once; gunicorn.conf.py
+then runs the pre-fork warmup before workers are forked.
+"""
+from app import app
+
+__all__ = ['app']